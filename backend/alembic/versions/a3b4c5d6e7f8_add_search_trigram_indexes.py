@@ -0,0 +1,68 @@
+"""Add trigram-indexed search columns to leads, users and appointments
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-17 13:00:00.000000
+
+Adds STORED generated columns (search_text, phone_digits) and GIN pg_trgm
+indexes on them so substring searches (LIKE '%term%') stop scanning the
+whole table. Adding a stored generated column rewrites the table, so run
+this migration in a maintenance window on large tenants.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = 'f2a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def _phone_digits(column: str) -> str:
+    expression = column
+    for separator in (' ', '-', '(', ')', '.', '+', '/'):
+        expression = f"replace({expression}, '{separator}', '')"
+    return expression
+
+
+SEARCH_COLUMNS = {
+    'leads': "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(email, ''))",
+    'users': "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(full_name, '') || ' ' || coalesce(email, ''))",
+    'appointments': "lower(coalesce(patient_name, '') || ' ' || coalesce(patient_email, '') || ' ' || coalesce(notes, ''))",
+}
+
+PHONE_COLUMNS = {
+    'leads': _phone_digits('phone'),
+    'appointments': _phone_digits('patient_phone'),
+}
+
+
+def _create_trigram_index(table: str, column: str) -> None:
+    op.create_index(
+        f'ix_{table}_{column}_trgm', table, [column], unique=False,
+        postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+    )
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table, expression in SEARCH_COLUMNS.items():
+        op.add_column(table, sa.Column('search_text', sa.Text(), sa.Computed(expression, persisted=True), nullable=True))
+        _create_trigram_index(table, 'search_text')
+
+    for table, expression in PHONE_COLUMNS.items():
+        op.add_column(table, sa.Column('phone_digits', sa.String(length=50), sa.Computed(expression, persisted=True), nullable=True))
+        _create_trigram_index(table, 'phone_digits')
+
+
+def downgrade() -> None:
+    for table in PHONE_COLUMNS:
+        op.drop_index(f'ix_{table}_phone_digits_trgm', table_name=table)
+        op.drop_column(table, 'phone_digits')
+
+    for table in SEARCH_COLUMNS:
+        op.drop_index(f'ix_{table}_search_text_trgm', table_name=table)
+        op.drop_column(table, 'search_text')
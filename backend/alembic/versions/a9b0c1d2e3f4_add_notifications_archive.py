@@ -0,0 +1,65 @@
+"""Add notifications_archive and compaction indexes
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-17 21:00:00.000000
+
+Old read notifications are moved to notifications_archive by
+compact_notifications.py. The inbox gets a (user_id, is_read, created_at)
+index; the single-column indexes on id (duplicate of the primary key),
+user_id (prefix of the composite indexes) and is_read (boolean) are dropped.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9b0c1d2e3f4'
+down_revision = 'f8a9b0c1d2e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    notification_type = postgresql.ENUM(
+        'INFO', 'SUCCESS', 'WARNING', 'ERROR', name='notificationtype', create_type=False
+    )
+    op.create_table(
+        'notifications_archive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('type', notification_type, nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('action_url', sa.String(length=500), nullable=True),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_notifications_archive_user_created', 'notifications_archive', ['user_id', 'created_at'], unique=False
+    )
+    op.create_index('ix_notifications_archive_created', 'notifications_archive', ['created_at'], unique=False)
+
+    op.create_index(
+        'ix_notifications_user_read_created', 'notifications', ['user_id', 'is_read', 'created_at'], unique=False
+    )
+    op.drop_index('ix_notifications_user_id', table_name='notifications')
+    op.drop_index('ix_notifications_is_read', table_name='notifications')
+    op.drop_index('ix_notifications_id', table_name='notifications')
+
+
+def downgrade() -> None:
+    op.create_index('ix_notifications_id', 'notifications', ['id'], unique=False)
+    op.create_index('ix_notifications_is_read', 'notifications', ['is_read'], unique=False)
+    op.create_index('ix_notifications_user_id', 'notifications', ['user_id'], unique=False)
+    op.drop_index('ix_notifications_user_read_created', table_name='notifications')
+
+    op.drop_index('ix_notifications_archive_created', table_name='notifications_archive')
+    op.drop_index('ix_notifications_archive_user_created', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
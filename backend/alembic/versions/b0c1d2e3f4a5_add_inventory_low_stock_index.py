@@ -0,0 +1,35 @@
+"""Add partial index on inventory products below minimum stock
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-17 22:00:00.000000
+
+GET /inventory/low-stock-alerts/ reads only active products at or below
+their minimum stock. The partial index holds just those rows, ordered by
+stock, so the endpoint no longer scans the tenant's whole catalogue.
+Low-stock and out-of-stock alerts are now raised by the stock ledger when
+a product crosses the threshold.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0c1d2e3f4a5'
+down_revision = 'a9b0c1d2e3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_inventory_products_low_stock',
+        'inventory_products',
+        ['tenant_id', 'current_stock'],
+        unique=False,
+        postgresql_where=sa.text('current_stock <= minimum_stock AND is_active = true')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_products_low_stock', table_name='inventory_products')
@@ -0,0 +1,115 @@
+"""Partition audit_logs by month on timestamp
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-17 15:00:00.000000
+
+Rebuilds audit_logs as a RANGE-partitioned table (one partition per month
+plus a default partition) and copies the existing rows. The primary key
+becomes (id, timestamp) because PostgreSQL requires the partition key in
+every unique constraint. The copy locks audit_logs for its duration, so run
+it in a maintenance window on large installations.
+
+Afterwards, keep future months created and old ones archived with
+manage_audit_partitions.py.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+MONTHS_AHEAD = 3
+
+COLUMNS = """
+    id UUID NOT NULL,
+    timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    user_email VARCHAR(255),
+    tenant_id UUID REFERENCES tenants(id) ON DELETE SET NULL,
+    action VARCHAR(50) NOT NULL,
+    category VARCHAR(30) NOT NULL DEFAULT 'auth',
+    entity_type VARCHAR(50),
+    entity_id VARCHAR(50),
+    ip_address VARCHAR(45),
+    user_agent VARCHAR(500),
+    details TEXT
+"""
+
+INDEXES = {
+    'ix_audit_logs_timestamp': ['timestamp'],
+    'ix_audit_logs_action': ['action'],
+    'ix_audit_logs_category': ['category'],
+    'ix_audit_logs_user_id': ['user_id'],
+    'ix_audit_logs_tenant_id': ['tenant_id'],
+    'ix_audit_logs_timestamp_id': ['timestamp', 'id'],
+    'ix_audit_logs_tenant_timestamp_id': ['tenant_id', 'timestamp', 'id'],
+}
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_indexes() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'audit_logs', columns, unique=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM audit_logs")).scalar()
+
+    op.execute(f"""
+        CREATE TABLE audit_logs_partitioned ({COLUMNS},
+            CONSTRAINT audit_logs_partitioned_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+
+    current = date.today().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF audit_logs_partitioned FOR VALUES FROM ('{month}') TO ('{upper}')"
+        )
+        month = upper
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs_partitioned DEFAULT")
+
+    op.execute("INSERT INTO audit_logs_partitioned SELECT id, timestamp, user_id, user_email, tenant_id, action, "
+               "category, entity_type, entity_id, ip_address, user_agent, details FROM audit_logs")
+    op.drop_table('audit_logs')
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME TO audit_logs")
+    op.execute("ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_partitioned_pkey TO audit_logs_pkey")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute(f"""
+        CREATE TABLE audit_logs_plain ({COLUMNS},
+            CONSTRAINT audit_logs_plain_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("INSERT INTO audit_logs_plain SELECT id, timestamp, user_id, user_email, tenant_id, action, "
+               "category, entity_type, entity_id, ip_address, user_agent, details FROM audit_logs")
+    _drop_indexes()
+    # Dropping the parent drops every attached partition
+    op.drop_table('audit_logs')
+    op.execute("ALTER TABLE audit_logs_plain RENAME TO audit_logs")
+    op.execute("ALTER TABLE audit_logs RENAME CONSTRAINT audit_logs_plain_pkey TO audit_logs_pkey")
+    _create_indexes()
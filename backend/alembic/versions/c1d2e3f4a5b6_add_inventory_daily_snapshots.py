@@ -0,0 +1,45 @@
+"""Add inventory_daily_snapshots
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-17 23:00:00.000000
+
+Per-product daily snapshot (closing stock, value and usage) written by
+snapshot_inventory.py. The inventory dashboard reads it plus the
+movements after the latest snapshot, and projects days until stock-out.
+Run `python snapshot_inventory.py --backfill-days 30` after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1d2e3f4a5b6'
+down_revision = 'b0c1d2e3f4a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'inventory_daily_snapshots',
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('stock', sa.Integer(), nullable=False),
+        sa.Column('inventory_value', sa.Float(), nullable=False),
+        sa.Column('usage_out', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['inventory_products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id']),
+        sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+    op.create_index(
+        'ix_inventory_daily_snapshots_tenant_day', 'inventory_daily_snapshots', ['tenant_id', 'day'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_daily_snapshots_tenant_day', table_name='inventory_daily_snapshots')
+    op.drop_table('inventory_daily_snapshots')
@@ -0,0 +1,59 @@
+"""Add audit_daily_counters
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-17 16:00:00.000000
+
+Per tenant/day/category/action counters of audit_logs, maintained by the
+audit writer (upsert on the unique key) and read by the /audit-logs stats
+endpoints. The upgrade
+backfills them from the existing rows (same as rebuild_audit_counters.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d6e7f8a9b0'
+down_revision = 'b4c5d6e7f8a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_daily_counters',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=30), nullable=False),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # One row per key; NULL tenant_id (platform-wide actions) is coalesced so it is unique too
+    op.create_index(
+        'uq_audit_daily_counters_key',
+        'audit_daily_counters',
+        [sa.text("coalesce(tenant_id, '00000000-0000-0000-0000-000000000000')"), 'day', 'category', 'action'],
+        unique=True
+    )
+    op.create_index('ix_audit_daily_counters_tenant_day', 'audit_daily_counters', ['tenant_id', 'day'], unique=False)
+    op.create_index('ix_audit_daily_counters_day', 'audit_daily_counters', ['day'], unique=False)
+
+    op.execute("""
+        INSERT INTO audit_daily_counters (id, tenant_id, day, category, action, count, updated_at)
+        SELECT gen_random_uuid(), tenant_id, timestamp::date, category, action, count(*), now()
+        FROM audit_logs
+        GROUP BY tenant_id, timestamp::date, category, action
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_daily_counters_day', table_name='audit_daily_counters')
+    op.drop_index('ix_audit_daily_counters_tenant_day', table_name='audit_daily_counters')
+    op.drop_index('uq_audit_daily_counters_key', table_name='audit_daily_counters')
+    op.drop_table('audit_daily_counters')
@@ -0,0 +1,34 @@
+"""Add partial index on inventory products by expiration date
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-18 00:30:00.000000
+
+The nightly expiry sweep (sweep_inventory_expiry.py) and
+GET /inventory/expiring/ read active products with an expiration date by
+range. The partial index holds only those rows, per tenant and ordered by
+expiration date, so neither scans the whole catalogue.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e3f4a5b6c7'
+down_revision = 'c1d2e3f4a5b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_inventory_products_expiration',
+        'inventory_products',
+        ['tenant_id', 'expiration_date'],
+        unique=False,
+        postgresql_where=sa.text('expiration_date IS NOT NULL AND is_active = true')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_products_expiration', table_name='inventory_products')
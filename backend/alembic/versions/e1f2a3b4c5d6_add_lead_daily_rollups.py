@@ -0,0 +1,74 @@
+"""Add lead_daily_rollups table
+
+Revision ID: e1f2a3b4c5d6
+Revises: 91d91178aba2
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = '91d91178aba2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('lead_daily_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', postgresql.ENUM('nuevo', 'contactado', 'calificado', 'cita_agendada', 'vino_a_cita', 'en_tratamiento', 'completado', 'perdido', 'no_contesta', 'no_califica', 'no_show', 'rechazo_presupuesto', 'abandono', name='leadstatus', create_type=False), nullable=False),
+        sa.Column('source', postgresql.ENUM('facebook', 'google', 'website', 'whatsapp', 'phone', 'referral', 'walk_in', 'email', 'sms', 'other', name='leadsource', create_type=False), nullable=False),
+        sa.Column('priority', postgresql.ENUM('alta', 'media', 'baja', name='leadpriority', create_type=False), nullable=False),
+        sa.Column('assigned_to_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('lead_count', sa.Integer(), nullable=False),
+        sa.Column('converted_count', sa.Integer(), nullable=False),
+        sa.Column('lead_score_sum', sa.Integer(), nullable=False),
+        sa.Column('scored_count', sa.Integer(), nullable=False),
+        sa.Column('conversion_days_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['assigned_to_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Una fila por bucket; los leads sin asignar (NULL) se agrupan con coalesce
+    op.create_index(
+        'uq_lead_daily_rollups_bucket',
+        'lead_daily_rollups',
+        ['tenant_id', 'day', 'status', 'source', 'priority',
+         sa.text("coalesce(assigned_to_id, '00000000-0000-0000-0000-000000000000')")],
+        unique=True
+    )
+    op.create_index('ix_lead_daily_rollups_tenant_day', 'lead_daily_rollups', ['tenant_id', 'day'], unique=False)
+    op.create_index('ix_lead_daily_rollups_tenant_assignee_day', 'lead_daily_rollups', ['tenant_id', 'assigned_to_id', 'day'], unique=False)
+
+    # Backfill desde los leads existentes
+    op.execute("""
+        INSERT INTO lead_daily_rollups (
+            id, tenant_id, day, status, source, priority, assigned_to_id,
+            lead_count, converted_count, lead_score_sum, scored_count, conversion_days_sum, updated_at
+        )
+        SELECT
+            gen_random_uuid(), tenant_id, created_at::date, status, source, priority, assigned_to_id,
+            COUNT(*),
+            COUNT(conversion_date),
+            COALESCE(SUM(lead_score), 0),
+            COUNT(lead_score),
+            COALESCE(SUM(EXTRACT(EPOCH FROM conversion_date - created_at) / 86400), 0),
+            now()
+        FROM leads
+        WHERE is_active = true
+        GROUP BY tenant_id, created_at::date, status, source, priority, assigned_to_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_lead_daily_rollups_tenant_assignee_day', table_name='lead_daily_rollups')
+    op.drop_index('ix_lead_daily_rollups_tenant_day', table_name='lead_daily_rollups')
+    op.drop_index('uq_lead_daily_rollups_bucket', table_name='lead_daily_rollups')
+    op.drop_table('lead_daily_rollups')
@@ -0,0 +1,33 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_leads_tenant_created_id', 'leads', ['tenant_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_appointments_tenant_scheduled_id', 'appointments', ['tenant_id', 'scheduled_at', 'id'], unique=False)
+    op.create_index('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audit_logs_timestamp_id', 'audit_logs', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_audit_logs_tenant_timestamp_id', 'audit_logs', ['tenant_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_inventory_movements_tenant_created_id', 'inventory_movements', ['tenant_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_movements_tenant_created_id', table_name='inventory_movements')
+    op.drop_index('ix_audit_logs_tenant_timestamp_id', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_timestamp_id', table_name='audit_logs')
+    op.drop_index('ix_notifications_user_created_id', table_name='notifications')
+    op.drop_index('ix_appointments_tenant_scheduled_id', table_name='appointments')
+    op.drop_index('ix_leads_tenant_created_id', table_name='leads')
@@ -0,0 +1,63 @@
+"""Add notification_broadcasts and notification_broadcast_reads
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-17 20:00:00.000000
+
+Tenant-wide announcements stored once per broadcast, with one read receipt
+per user that has read them.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8a9b0c1d2e3'
+down_revision = 'e7f8a9b0c1d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    notification_type = postgresql.ENUM(
+        'INFO', 'SUCCESS', 'WARNING', 'ERROR', name='notificationtype', create_type=False
+    )
+    op.create_table(
+        'notification_broadcasts',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('type', notification_type, nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('action_url', sa.String(length=500), nullable=True),
+        sa.Column('created_by_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_notification_broadcasts_tenant_created', 'notification_broadcasts',
+        ['tenant_id', 'created_at'], unique=False
+    )
+
+    op.create_table(
+        'notification_broadcast_reads',
+        sa.Column('broadcast_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['notification_broadcasts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('broadcast_id', 'user_id')
+    )
+    op.create_index(
+        'ix_notification_broadcast_reads_user', 'notification_broadcast_reads', ['user_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_broadcast_reads_user', table_name='notification_broadcast_reads')
+    op.drop_table('notification_broadcast_reads')
+    op.drop_index('ix_notification_broadcasts_tenant_created', table_name='notification_broadcasts')
+    op.drop_table('notification_broadcasts')
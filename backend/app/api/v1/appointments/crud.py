@@ -1,12 +1,15 @@
 """Appointment CRUD endpoints."""
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc, func, cast, Date
+from sqlalchemy import desc, asc, cast, Date
 from typing import List, Optional
 from datetime import datetime, date
 from uuid import UUID
 
+from app.db.search import text_search_filter
 from app.db.session import get_db
+from app.core.concurrency import run_blocking
+from app.core.pagination import PAGINATION_MODE_PATTERN, paginate_keyset
 from app.core.security import get_current_tenant_member
 from app.models.user import User, UserRole
 from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
@@ -24,6 +27,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[AppointmentSchema])
 async def get_appointments(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_tenant_member),
     # Filtros básicos
@@ -42,6 +46,8 @@ async def get_appointments(
     # Paginación
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=1000),
+    pagination: str = Query("offset", pattern=PAGINATION_MODE_PATTERN),
+    cursor: Optional[str] = Query(None),
     # Ordenamiento
     order_by: str = Query("scheduled_at", pattern="^(scheduled_at|created_at|patient_name|provider_name)$"),
     order_direction: str = Query("asc", pattern="^(asc|desc)$")
@@ -49,88 +55,108 @@ async def get_appointments(
     """
     Obtener lista de citas del tenant.
     Filtros disponibles: estado, tipo, proveedor, servicio, fechas, búsqueda.
+
+    Con pagination=cursor (o enviando cursor) la página se obtiene por keyset
+    y el cursor de la siguiente se devuelve en la cabecera X-Next-Cursor.
     """
 
-    query = db.query(Appointment).options(
-        joinedload(Appointment.service),
-        joinedload(Appointment.provider),
-        joinedload(Appointment.patient),
-        joinedload(Appointment.lead)
-    ).filter(
-        Appointment.tenant_id == current_user.current_tenant_id
-    )
+    def _load() -> List[AppointmentSchema]:
+        query = db.query(Appointment).options(
+            joinedload(Appointment.service),
+            joinedload(Appointment.provider),
+            joinedload(Appointment.patient),
+            joinedload(Appointment.lead)
+        ).filter(
+            Appointment.tenant_id == current_user.current_tenant_id
+        )
 
-    # Si el usuario es médico, solo mostrar sus citas
-    if current_user.role == UserRole.medico:
-        query = query.filter(Appointment.provider_id == current_user.id)
+        # Si el usuario es médico, solo mostrar sus citas
+        if current_user.role == UserRole.medico:
+            query = query.filter(Appointment.provider_id == current_user.id)
 
-    # Aplicar filtros
-    if status:
-        query = query.filter(Appointment.status.in_(status))
+        # Aplicar filtros
+        if status:
+            query = query.filter(Appointment.status.in_(status))
 
-    if type:
-        query = query.filter(Appointment.type.in_(type))
+        if type:
+            query = query.filter(Appointment.type.in_(type))
 
-    if provider_id:
-        query = query.filter(Appointment.provider_id == provider_id)
+        if provider_id:
+            query = query.filter(Appointment.provider_id == provider_id)
 
-    if service_id:
-        query = query.filter(Appointment.service_id == service_id)
+        if service_id:
+            query = query.filter(Appointment.service_id == service_id)
 
-    if patient_id:
-        query = query.filter(Appointment.patient_id == patient_id)
+        if patient_id:
+            query = query.filter(Appointment.patient_id == patient_id)
 
-    if lead_id:
-        query = query.filter(Appointment.lead_id == lead_id)
+        if lead_id:
+            query = query.filter(Appointment.lead_id == lead_id)
 
-    # Filtros de fecha
-    if date_from:
-        query = query.filter(cast(Appointment.scheduled_at, Date) >= date_from)
-
-    if date_to:
-        query = query.filter(cast(Appointment.scheduled_at, Date) <= date_to)
-
-    if is_today:
-        today = datetime.now().date()
-        query = query.filter(cast(Appointment.scheduled_at, Date) == today)
-
-    # Búsqueda en nombre, email, teléfono
-    if search:
-        search_term = f"%{search.lower()}%"
-        query = query.filter(
-            or_(
-                func.lower(Appointment.patient_name).like(search_term),
-                func.lower(Appointment.patient_email).like(search_term),
-                func.lower(Appointment.patient_phone).like(search_term),
-                func.lower(Appointment.notes).like(search_term)
-            )
-        )
+        # Filtros de fecha
+        if date_from:
+            query = query.filter(cast(Appointment.scheduled_at, Date) >= date_from)
 
-    # Ordenamiento
-    if order_direction == "desc":
-        order_func = desc
-    else:
-        order_func = asc
-
-    if order_by == "patient_name":
-        query = query.order_by(order_func(Appointment.patient_name))
-    elif order_by == "provider_name":
-        query = query.join(User, Appointment.provider_id == User.id).order_by(order_func(User.first_name))
-    elif order_by == "created_at":
-        query = query.order_by(order_func(Appointment.created_at))
-    else:  # scheduled_at
-        query = query.order_by(order_func(Appointment.scheduled_at))
+        if date_to:
+            query = query.filter(cast(Appointment.scheduled_at, Date) <= date_to)
 
-    # Paginación
-    offset = (page - 1) * page_size
-    appointments = query.offset(offset).limit(page_size).all()
+        if is_today:
+            today = datetime.now().date()
+            query = query.filter(cast(Appointment.scheduled_at, Date) == today)
 
-    # Construir respuesta con información adicional
-    result = []
-    for appointment in appointments:
-        result.append(build_appointment_response(appointment))
+        # Búsqueda en nombre, email, notas y teléfono normalizado (índices pg_trgm)
+        if search:
+            query = query.filter(
+                text_search_filter(Appointment.search_text, Appointment.phone_digits, search)
+            )
 
-    return result
+        if pagination == "cursor" or cursor:
+            if order_by == "provider_name":
+                raise HTTPException(
+                    status_code=400,
+                    detail="La paginación por cursor no admite order_by=provider_name"
+                )
+            # Paginación por keyset: el coste no crece con la profundidad de página
+            appointments, next_cursor = paginate_keyset(
+                query,
+                getattr(Appointment, order_by),
+                Appointment.id,
+                cursor=cursor,
+                limit=page_size,
+                descending=order_direction == "desc"
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return [build_appointment_response(appointment) for appointment in appointments]
+
+        # Ordenamiento
+        if order_direction == "desc":
+            order_func = desc
+        else:
+            order_func = asc
+
+        if order_by == "patient_name":
+            query = query.order_by(order_func(Appointment.patient_name))
+        elif order_by == "provider_name":
+            query = query.join(User, Appointment.provider_id == User.id).order_by(order_func(User.first_name))
+        elif order_by == "created_at":
+            query = query.order_by(order_func(Appointment.created_at))
+        else:  # scheduled_at
+            query = query.order_by(order_func(Appointment.scheduled_at))
+
+        # Paginación
+        offset = (page - 1) * page_size
+        appointments = query.offset(offset).limit(page_size).all()
+
+        # Construir respuesta con información adicional
+        result = []
+        for appointment in appointments:
+            result.append(build_appointment_response(appointment))
+
+        return result
+
+    # Consultas en el threadpool para no bloquear el event loop
+    return await run_blocking(_load)
 
 
 @router.post("/", response_model=AppointmentSchema)
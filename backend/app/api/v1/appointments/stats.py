@@ -1,9 +1,9 @@
 """Appointment statistics endpoints."""
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import cast, Date
+from sqlalchemy import and_, cast, func, Date
 from typing import Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 from app.db.session import get_db
 from app.core.security import get_current_tenant_member
@@ -36,45 +36,72 @@ async def get_appointment_stats(
     if date_to:
         query = query.filter(cast(Appointment.scheduled_at, Date) <= date_to)
 
-    appointments = query.all()
+    now = datetime.utcnow()
+    today_start = datetime.combine(datetime.now().date(), datetime.min.time())
 
-    today = datetime.now().date()
+    # Una sola pasada agrupada por estado y tipo; el resto son sumas filtradas
+    rows = query.with_entities(
+        Appointment.status,
+        Appointment.type,
+        func.count(Appointment.id).label("total"),
+        func.count(Appointment.id).filter(
+            and_(
+                Appointment.scheduled_at >= today_start,
+                Appointment.scheduled_at < today_start + timedelta(days=1)
+            )
+        ).label("today"),
+        func.count(Appointment.id).filter(
+            and_(
+                Appointment.scheduled_at > now,
+                Appointment.scheduled_at <= now + timedelta(hours=24)
+            )
+        ).label("upcoming"),
+        func.count(Appointment.actual_duration_minutes).filter(
+            Appointment.actual_duration_minutes > 0
+        ).label("with_duration"),
+        func.sum(Appointment.actual_duration_minutes).filter(
+            Appointment.actual_duration_minutes > 0
+        ).label("duration_sum"),
+    ).group_by(Appointment.status, Appointment.type).all()
 
-    # Calcular estadísticas
-    total_appointments = len(appointments)
-    today_appointments = len([a for a in appointments if a.scheduled_at.date() == today])
-    upcoming_appointments = len([a for a in appointments if a.is_upcoming])
-    completed_appointments = len([a for a in appointments if a.status == AppointmentStatus.completed])
-    cancelled_appointments = len([a for a in appointments if a.status in [
-        AppointmentStatus.cancelled_by_patient,
-        AppointmentStatus.cancelled_by_clinic
-    ]])
-    no_show_appointments = len([a for a in appointments if a.status == AppointmentStatus.no_show])
+    appointments_by_status = {status.value: 0 for status in AppointmentStatus}
+    appointments_by_type = {type_val.value: 0 for type_val in AppointmentType}
+    total_appointments = 0
+    today_appointments = 0
+    upcoming_appointments = 0
+    completed_with_duration = 0
+    completed_duration_sum = 0
 
-    # Estadísticas por estado
-    appointments_by_status = {}
-    for status in AppointmentStatus:
-        count = len([a for a in appointments if a.status == status])
-        appointments_by_status[status.value] = count
+    for row in rows:
+        row_status = AppointmentStatus(row.status)
+        appointments_by_status[row_status.value] += row.total
+        appointments_by_type[AppointmentType(row.type).value] += row.total
+        total_appointments += row.total
+        today_appointments += row.today
+        upcoming_appointments += row.upcoming
+        if row_status == AppointmentStatus.completed:
+            completed_with_duration += row.with_duration
+            completed_duration_sum += row.duration_sum or 0
 
-    # Estadísticas por tipo
-    appointments_by_type = {}
-    for type_val in AppointmentType:
-        count = len([a for a in appointments if a.type == type_val])
-        appointments_by_type[type_val.value] = count
+    # Calcular estadísticas
+    completed_appointments = appointments_by_status[AppointmentStatus.completed.value]
+    cancelled_appointments = (
+        appointments_by_status[AppointmentStatus.cancelled_by_patient.value] +
+        appointments_by_status[AppointmentStatus.cancelled_by_clinic.value]
+    )
+    no_show_appointments = appointments_by_status[AppointmentStatus.no_show.value]
 
     # Métricas de performance
     total_scheduled = total_appointments - cancelled_appointments
     show_up_rate = 0.0
     if total_scheduled > 0:
-        show_ups = completed_appointments + len([a for a in appointments if a.status == AppointmentStatus.in_progress])
+        show_ups = completed_appointments + appointments_by_status[AppointmentStatus.in_progress.value]
         show_up_rate = (show_ups / total_scheduled) * 100
 
     # Duración promedio
-    completed_with_duration = [a for a in appointments if a.actual_duration_minutes and a.status == AppointmentStatus.completed]
     average_duration = 0.0
     if completed_with_duration:
-        average_duration = sum(a.actual_duration_minutes for a in completed_with_duration) / len(completed_with_duration)
+        average_duration = completed_duration_sum / completed_with_duration
 
     return AppointmentStats(
         total_appointments=total_appointments,
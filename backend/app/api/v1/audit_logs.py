@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from sqlalchemy import desc
 from typing import Optional
 from datetime import datetime, timedelta
-from uuid import UUID
+from uuid import UUID, uuid4
 import json
 
 from app.db.session import get_db
@@ -15,7 +15,16 @@ from app.schemas.audit_log import (
     AuditLogCreate,
     AuditStats,
 )
+from app.core.pagination import (
+    COUNT_MODE_PATTERN,
+    PAGINATION_MODE_PATTERN,
+    count_rows,
+    paginate_keyset,
+)
+from app.core.config import settings
 from app.core.security import get_current_user
+from app.services.audit_stats import TENANT_IMPORTANT_ACTIONS, compute_audit_stats, record_audit_counts
+from app.services.audit_writer import audit_writer
 
 router = APIRouter()
 
@@ -33,9 +42,18 @@ def create_audit_log(
     ip_address: str = None,
     user_agent: str = None,
     details: dict = None,
-) -> AuditLog:
-    """Helper function to create an audit log entry."""
-    audit_log = AuditLog(
+    sync: bool = False,
+) -> Optional[AuditLog]:
+    """Helper function to create an audit log entry.
+
+    By default the entry is queued and written in batches by the audit
+    writer, so the request does not pay for an extra commit. Pass sync=True
+    when the entry must be persisted before the response; it is then added
+    and committed on the caller's session and returned.
+    """
+    values = dict(
+        id=uuid4(),
+        timestamp=datetime.utcnow(),
         action=action,
         category=category,
         user_id=user_id,
@@ -47,7 +65,12 @@ def create_audit_log(
         user_agent=user_agent,
         details=json.dumps(details) if details else None,
     )
+    if not sync and settings.AUDIT_ASYNC_WRITES and audit_writer.submit(values):
+        return None
+
+    audit_log = AuditLog(**values)
     db.add(audit_log)
+    record_audit_counts(db, [values])
     db.commit()
     db.refresh(audit_log)
     return audit_log
@@ -61,10 +84,62 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else None
 
 
+def timestamp_range_filter(query, start_date: Optional[datetime], end_date: Optional[datetime]):
+    """Restrict a query to a timestamp range.
+
+    audit_logs is partitioned by month on timestamp, so a bounded range
+    lets PostgreSQL scan only the partitions it covers.
+    """
+    if start_date:
+        query = query.filter(AuditLog.timestamp >= start_date)
+    if end_date:
+        query = query.filter(AuditLog.timestamp <= end_date)
+    return query
+
+
+def paginate_audit_logs(
+    query,
+    page: int,
+    page_size: int,
+    pagination: str = "offset",
+    cursor: Optional[str] = None,
+    count_mode: str = "exact",
+) -> AuditLogListResponse:
+    """Page a filtered audit log query, newest first (offset or keyset cursor)."""
+    total = count_rows(query, count_mode)
+
+    next_cursor = None
+    if pagination == "cursor" or cursor:
+        logs, next_cursor = paginate_keyset(
+            query, AuditLog.timestamp, AuditLog.id, cursor=cursor, limit=page_size
+        )
+    else:
+        logs = (
+            query.order_by(desc(AuditLog.timestamp))
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+            .all()
+        )
+
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
+
+    return AuditLogListResponse(
+        items=[AuditLogResponse.model_validate(log) for log in logs],
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages,
+        next_cursor=next_cursor,
+    )
+
+
 @router.get("", response_model=AuditLogListResponse)
 async def list_audit_logs(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    pagination: str = Query("offset", pattern=PAGINATION_MODE_PATTERN),
+    cursor: Optional[str] = None,
+    count_mode: str = Query("exact", pattern=COUNT_MODE_PATTERN),
     action: Optional[str] = None,
     category: Optional[str] = None,
     user_id: Optional[UUID] = None,
@@ -93,10 +168,7 @@ async def list_audit_logs(
         query = query.filter(AuditLog.tenant_id == tenant_id)
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
-    if start_date:
-        query = query.filter(AuditLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(AuditLog.timestamp <= end_date)
+    query = timestamp_range_filter(query, start_date, end_date)
     if search:
         query = query.filter(
             AuditLog.user_email.ilike(f"%{search}%")
@@ -104,98 +176,27 @@ async def list_audit_logs(
             | AuditLog.details.ilike(f"%{search}%")
         )
 
-    # Get total count
-    total = query.count()
-
-    # Apply pagination and ordering
-    logs = (
-        query.order_by(desc(AuditLog.timestamp))
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-
-    total_pages = (total + page_size - 1) // page_size
-
-    return AuditLogListResponse(
-        items=[AuditLogResponse.model_validate(log) for log in logs],
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    return paginate_audit_logs(query, page, page_size, pagination, cursor, count_mode)
 
 
 @router.get("/stats", response_model=AuditStats)
 async def get_audit_stats(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get audit log statistics. Superadmin only."""
+    """Get audit log statistics. Superadmin only.
+
+    Served from audit_daily_counters (see app.services.audit_stats).
+    total_logs, actions_by_category and recent_critical_actions cover
+    start_date..end_date when given (counters at day granularity); login
+    counters always cover today.
+    """
     if current_user.role != UserRole.superadmin:
         raise HTTPException(status_code=403, detail="Only superadmin can access audit stats")
 
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Total logs
-    total_logs = db.query(func.count(AuditLog.id)).scalar()
-
-    # Logins today
-    logins_today = (
-        db.query(func.count(AuditLog.id))
-        .filter(
-            and_(
-                AuditLog.action == AuditAction.LOGIN_SUCCESS,
-                AuditLog.timestamp >= today_start,
-            )
-        )
-        .scalar()
-    )
-
-    # Failed logins today
-    failed_logins_today = (
-        db.query(func.count(AuditLog.id))
-        .filter(
-            and_(
-                AuditLog.action == AuditAction.LOGIN_FAILED,
-                AuditLog.timestamp >= today_start,
-            )
-        )
-        .scalar()
-    )
-
-    # Actions by category
-    category_counts = (
-        db.query(AuditLog.category, func.count(AuditLog.id))
-        .group_by(AuditLog.category)
-        .all()
-    )
-    actions_by_category = {cat: count for cat, count in category_counts}
-
-    # Recent critical actions (last 10)
-    critical_actions = [
-        AuditAction.TENANT_CREATED,
-        AuditAction.TENANT_DELETED,
-        AuditAction.TENANT_SUSPENDED,
-        AuditAction.USER_DELETED,
-        AuditAction.SYSTEM_CONFIG_CHANGED,
-        AuditAction.PLAN_CHANGED,
-    ]
-    recent_critical = (
-        db.query(AuditLog)
-        .filter(AuditLog.action.in_(critical_actions))
-        .order_by(desc(AuditLog.timestamp))
-        .limit(10)
-        .all()
-    )
-
-    return AuditStats(
-        total_logs=total_logs or 0,
-        logins_today=logins_today or 0,
-        failed_logins_today=failed_logins_today or 0,
-        actions_by_category=actions_by_category,
-        recent_critical_actions=[AuditLogResponse.model_validate(log) for log in recent_critical],
-    )
+    return compute_audit_stats(db, start_date=start_date, end_date=end_date)
 
 
 @router.get("/actions", response_model=list[str])
@@ -266,6 +267,9 @@ async def get_audit_log(
 async def list_tenant_activity_logs(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    pagination: str = Query("offset", pattern=PAGINATION_MODE_PATTERN),
+    cursor: Optional[str] = None,
+    count_mode: str = Query("exact", pattern=COUNT_MODE_PATTERN),
     action: Optional[str] = None,
     category: Optional[str] = None,
     user_id: Optional[UUID] = None,
@@ -314,10 +318,7 @@ async def list_tenant_activity_logs(
         query = query.filter(AuditLog.user_id == user_id)
     if entity_type:
         query = query.filter(AuditLog.entity_type == entity_type)
-    if start_date:
-        query = query.filter(AuditLog.timestamp >= start_date)
-    if end_date:
-        query = query.filter(AuditLog.timestamp <= end_date)
+    query = timestamp_range_filter(query, start_date, end_date)
     if search:
         query = query.filter(
             AuditLog.user_email.ilike(f"%{search}%")
@@ -325,36 +326,21 @@ async def list_tenant_activity_logs(
             | AuditLog.details.ilike(f"%{search}%")
         )
 
-    # Get total count
-    total = query.count()
-
-    # Apply pagination and ordering
-    logs = (
-        query.order_by(desc(AuditLog.timestamp))
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-
-    total_pages = (total + page_size - 1) // page_size
-
-    return AuditLogListResponse(
-        items=[AuditLogResponse.model_validate(log) for log in logs],
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-    )
+    return paginate_audit_logs(query, page, page_size, pagination, cursor, count_mode)
 
 
 @router.get("/tenant/stats", response_model=AuditStats)
 async def get_tenant_activity_stats(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get activity log statistics for the current tenant.
     Accessible by tenant_admin, manager, and user roles.
+    Served from audit_daily_counters; totals, categories and recent actions
+    are limited to start_date..end_date when given.
     """
     # Only allow tenant users (not superadmin or clients)
     if current_user.role == UserRole.superadmin:
@@ -375,75 +361,10 @@ async def get_tenant_activity_stats(
             detail="User does not belong to a tenant"
         )
 
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # All queries filtered by tenant_id
-    tenant_filter = AuditLog.tenant_id == current_user.current_tenant_id
-
-    # Total logs for this tenant
-    total_logs = db.query(func.count(AuditLog.id)).filter(tenant_filter).scalar()
-
-    # Logins today
-    logins_today = (
-        db.query(func.count(AuditLog.id))
-        .filter(
-            and_(
-                tenant_filter,
-                AuditLog.action == AuditAction.LOGIN_SUCCESS,
-                AuditLog.timestamp >= today_start,
-            )
-        )
-        .scalar()
-    )
-
-    # Failed logins today
-    failed_logins_today = (
-        db.query(func.count(AuditLog.id))
-        .filter(
-            and_(
-                tenant_filter,
-                AuditLog.action == AuditAction.LOGIN_FAILED,
-                AuditLog.timestamp >= today_start,
-            )
-        )
-        .scalar()
-    )
-
-    # Actions by category
-    category_counts = (
-        db.query(AuditLog.category, func.count(AuditLog.id))
-        .filter(tenant_filter)
-        .group_by(AuditLog.category)
-        .all()
-    )
-    actions_by_category = {cat: count for cat, count in category_counts}
-
-    # Recent important actions (last 10) - exclude some superadmin-only actions
-    important_actions = [
-        AuditAction.USER_CREATED,
-        AuditAction.USER_DELETED,
-        AuditAction.USER_ACTIVATED,
-        AuditAction.USER_DEACTIVATED,
-        AuditAction.PASSWORD_CHANGED,
-        AuditAction.LOGIN_FAILED,  # Security concern
-    ]
-    recent_important = (
-        db.query(AuditLog)
-        .filter(
-            and_(
-                tenant_filter,
-                AuditLog.action.in_(important_actions)
-            )
-        )
-        .order_by(desc(AuditLog.timestamp))
-        .limit(10)
-        .all()
-    )
-
-    return AuditStats(
-        total_logs=total_logs or 0,
-        logins_today=logins_today or 0,
-        failed_logins_today=failed_logins_today or 0,
-        actions_by_category=actions_by_category,
-        recent_critical_actions=[AuditLogResponse.model_validate(log) for log in recent_important],
+    return compute_audit_stats(
+        db,
+        tenant_id=current_user.current_tenant_id,
+        start_date=start_date,
+        end_date=end_date,
+        recent_actions=TENANT_IMPORTANT_ACTIONS,
     )
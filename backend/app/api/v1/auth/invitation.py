@@ -8,7 +8,7 @@ from pydantic import BaseModel
 
 from app.core.security import verify_password, get_password_hash
 from app.core.email import send_welcome_email
-from app.core.notifications import create_notification
+from app.core.notifications import create_notification, create_notifications_bulk, tenant_user_ids
 from app.db.session import get_db
 from app.models.user import User, UserRole
 from app.models.tenant import Tenant
@@ -316,24 +316,18 @@ async def _send_invitation_notifications(db: Session, user: User, role: UserRole
         try:
             tenant = db.query(Tenant).filter(Tenant.id == user.tenant_id).first()
             if tenant:
-                admin_users = db.query(User).filter(
-                    User.tenant_id == user.tenant_id,
-                    User.role == UserRole.tenant_admin,
-                    User.id != user.id,
-                    User.is_active == True
-                ).all()
-
                 user_name = user.first_name or user.email.split('@')[0]
-                for admin in admin_users:
-                    await create_notification(
-                        db=db,
-                        user_id=admin.id,
-                        type=NotificationType.INFO,
-                        title="Nuevo miembro en el equipo",
-                        message=f"{user_name} ha aceptado tu invitación y se ha unido como {role_display}.",
-                        action_url="/dashboard/users",
-                        tenant_id=user.tenant_id
-                    )
+                await create_notifications_bulk(
+                    db=db,
+                    recipients=tenant_user_ids(
+                        user.tenant_id, roles=[UserRole.tenant_admin]
+                    ).where(User.id != user.id),
+                    type=NotificationType.INFO,
+                    title="Nuevo miembro en el equipo",
+                    message=f"{user_name} ha aceptado tu invitación y se ha unido como {role_display}.",
+                    action_url="/dashboard/users",
+                    tenant_id=user.tenant_id
+                )
         except Exception as e:
             print(f"Error notifying admins: {e}")
 
@@ -350,48 +344,18 @@ async def _notify_admins_about_new_member(
         return
 
     try:
-        admin_users = db.query(User).filter(
-            User.tenant_id == membership.tenant_id,
-            User.role == UserRole.tenant_admin,
-            User.id != user.id,
-            User.is_active == True
-        ).all()
-
-        admin_memberships = db.query(TenantMembership).filter(
-            TenantMembership.tenant_id == membership.tenant_id,
-            TenantMembership.role == UserRole.tenant_admin,
-            TenantMembership.user_id != user.id,
-            TenantMembership.is_active == True
-        ).all()
-
-        notified_admin_ids = set()
+        # Tenant admins (direct or through a membership), inserted in one statement
         user_name = user.first_name or user.email.split('@')[0]
-
-        for admin in admin_users:
-            if admin.id not in notified_admin_ids:
-                await create_notification(
-                    db=db,
-                    user_id=admin.id,
-                    type=NotificationType.INFO,
-                    title="Nuevo miembro en el equipo",
-                    message=f"{user_name} ha aceptado tu invitación y se ha unido como {role_display}.",
-                    action_url="/dashboard/users",
-                    tenant_id=membership.tenant_id
-                )
-                notified_admin_ids.add(admin.id)
-
-        for admin_membership in admin_memberships:
-            if admin_membership.user_id not in notified_admin_ids:
-                await create_notification(
-                    db=db,
-                    user_id=admin_membership.user_id,
-                    type=NotificationType.INFO,
-                    title="Nuevo miembro en el equipo",
-                    message=f"{user_name} ha aceptado tu invitación y se ha unido como {role_display}.",
-                    action_url="/dashboard/users",
-                    tenant_id=membership.tenant_id
-                )
-                notified_admin_ids.add(admin_membership.user_id)
-
+        await create_notifications_bulk(
+            db=db,
+            recipients=tenant_user_ids(
+                membership.tenant_id, roles=[UserRole.tenant_admin]
+            ).where(User.id != user.id),
+            type=NotificationType.INFO,
+            title="Nuevo miembro en el equipo",
+            message=f"{user_name} ha aceptado tu invitación y se ha unido como {role_display}.",
+            action_url="/dashboard/users",
+            tenant_id=membership.tenant_id
+        )
     except Exception as e:
         print(f"Error notifying admins: {e}")
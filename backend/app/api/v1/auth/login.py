@@ -24,12 +24,17 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=LoginResponseMultiTenant)
-async def login(
+def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    """Login and get access token."""
+    """
+    Login and get access token.
+
+    Plain `def`: FastAPI runs it in the threadpool, so bcrypt and the
+    queries do not stall the event loop.
+    """
     ip_address = get_client_ip(request)
     user_agent = request.headers.get("User-Agent", "")[:500]
 
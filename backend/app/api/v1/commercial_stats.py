@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, cast, Date
+from sqlalchemy import and_, or_, func, cast, distinct, Date
 from typing import Optional
 from datetime import datetime, date, timedelta
 
@@ -38,141 +38,197 @@ async def get_commercial_stats(
     last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
     last_month_end = current_month_start - timedelta(days=1)
     
-    # Filtrar por comercial si es usuario comercial
-    lead_query = db.query(Lead).filter(
+    converted_statuses = [LeadStatus.en_tratamiento, LeadStatus.completado]
+    active_since = today - timedelta(days=30)
+
+    # Filtros comunes (tenant, comercial y rango de fechas)
+    lead_filters = [
         Lead.tenant_id == current_user.current_tenant_id,
         Lead.is_active == True
-    )
-    
-    appointment_query = db.query(Appointment).filter(
+    ]
+    appointment_filters = [
         Appointment.tenant_id == current_user.current_tenant_id
-    )
-    
+    ]
+
     if current_user.role == UserRole.closer:
-        lead_query = lead_query.filter(Lead.assigned_to_id == current_user.id)
-        appointment_query = appointment_query.filter(Appointment.provider_id == current_user.id)
-    
+        lead_filters.append(Lead.assigned_to_id == current_user.id)
+        appointment_filters.append(Appointment.provider_id == current_user.id)
+
     # Aplicar filtros de fecha si se proporcionan
     if date_from:
-        lead_query = lead_query.filter(cast(Lead.created_at, Date) >= date_from)
-        appointment_query = appointment_query.filter(cast(Appointment.scheduled_at, Date) >= date_from)
-    
+        lead_filters.append(cast(Lead.created_at, Date) >= date_from)
+        appointment_filters.append(cast(Appointment.scheduled_at, Date) >= date_from)
+
     if date_to:
-        lead_query = lead_query.filter(cast(Lead.created_at, Date) <= date_to)
-        appointment_query = appointment_query.filter(cast(Appointment.scheduled_at, Date) <= date_to)
-    
+        lead_filters.append(cast(Lead.created_at, Date) <= date_to)
+        appointment_filters.append(cast(Appointment.scheduled_at, Date) <= date_to)
+
+    # Paciente activo: cita en curso o completada en los últimos 30 días
+    is_active_patient = or_(
+        Appointment.status == AppointmentStatus.in_progress,
+        and_(
+            Appointment.status == AppointmentStatus.completed,
+            cast(Appointment.scheduled_at, Date) >= active_since
+        )
+    )
+
     # ===============================
-    # OVERVIEW METRICS
+    # QUERY 1: LEADS POR ESTADO, FUENTE Y ASIGNADO
     # ===============================
-    
-    # Total leads
-    total_leads = lead_query.count()
-    
-    # Leads este mes
-    leads_this_month = lead_query.filter(
-        cast(Lead.created_at, Date) >= current_month_start
-    ).count()
-    
-    # Tasa de conversión (leads que llegaron a en_tratamiento o completado)
-    converted_leads = lead_query.filter(
-        Lead.status.in_([LeadStatus.en_tratamiento, LeadStatus.completado])
-    ).count()
-    conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
-    
-    # Pacientes activos (appointments en progreso o completadas recientemente)
-    active_patients = appointment_query.filter(
-        or_(
-            Appointment.status == AppointmentStatus.in_progress,
+
+    lead_rows = db.query(
+        Lead.status,
+        Lead.source,
+        Lead.assigned_to_id,
+        func.count(Lead.id).label("total"),
+        func.count(Lead.id).filter(
+            cast(Lead.created_at, Date) >= current_month_start
+        ).label("this_month"),
+        func.count(Lead.id).filter(
+            and_(
+                cast(Lead.created_at, Date) >= last_month_start,
+                cast(Lead.created_at, Date) <= last_month_end
+            )
+        ).label("last_month"),
+        func.count(Lead.id).filter(
+            and_(
+                cast(Lead.conversion_date, Date) >= last_month_start,
+                cast(Lead.conversion_date, Date) <= last_month_end
+            )
+        ).label("converted_last_month"),
+    ).filter(*lead_filters).group_by(Lead.status, Lead.source, Lead.assigned_to_id).all()
+
+    total_leads = 0
+    leads_this_month = 0
+    leads_last_month = 0
+    converted_leads = 0
+    converted_last_month = 0
+    status_counts = {}
+    source_counts = {}
+    leads_by_assignee = {}
+    converted_by_assignee = {}
+
+    for row in lead_rows:
+        lead_status = LeadStatus(row.status)
+        is_converted = lead_status in converted_statuses
+
+        total_leads += row.total
+        leads_this_month += row.this_month
+        leads_last_month += row.last_month
+        status_counts[lead_status] = status_counts.get(lead_status, 0) + row.total
+        source_counts[LeadSource(row.source)] = source_counts.get(LeadSource(row.source), 0) + row.total
+        leads_by_assignee[row.assigned_to_id] = leads_by_assignee.get(row.assigned_to_id, 0) + row.total
+
+        if is_converted:
+            converted_leads += row.total
+            converted_last_month += row.converted_last_month
+            converted_by_assignee[row.assigned_to_id] = converted_by_assignee.get(row.assigned_to_id, 0) + row.total
+
+    # ===============================
+    # QUERY 2: CITAS DEL TENANT
+    # ===============================
+
+    appointment_totals = db.query(
+        func.count(distinct(Appointment.patient_id)).filter(is_active_patient).label("active_patients"),
+        func.count(Appointment.id).filter(
             and_(
                 Appointment.status == AppointmentStatus.completed,
-                cast(Appointment.scheduled_at, Date) >= (today - timedelta(days=30))
+                cast(Appointment.scheduled_at, Date) >= current_month_start
             )
-        )
-    ).distinct(Appointment.patient_id).count()
-    
+        ).label("completed_this_month"),
+        func.count(Appointment.id).filter(
+            and_(
+                Appointment.status == AppointmentStatus.completed,
+                cast(Appointment.scheduled_at, Date) >= last_month_start,
+                cast(Appointment.scheduled_at, Date) <= last_month_end
+            )
+        ).label("completed_last_month"),
+    ).filter(*appointment_filters).one()
+
+    # ===============================
+    # QUERY 3: MÉDICOS CON PACIENTES ACTIVOS
+    # ===============================
+
+    doctor_patients = db.query(
+        Appointment.provider_id.label("provider_id"),
+        func.count(distinct(Appointment.patient_id)).label("active_patients")
+    ).filter(*appointment_filters, is_active_patient).group_by(Appointment.provider_id).subquery()
+
+    doctors = db.query(
+        User.id,
+        User.full_name,
+        User.first_name,
+        User.last_name,
+        func.coalesce(doctor_patients.c.active_patients, 0)
+    ).outerjoin(
+        doctor_patients, doctor_patients.c.provider_id == User.id
+    ).filter(
+        User.tenant_id == current_user.current_tenant_id,
+        User.role == UserRole.medico,
+        User.is_active == True
+    ).all()
+
+    # ===============================
+    # OVERVIEW METRICS
+    # ===============================
+
+    # Tasa de conversión (leads que llegaron a en_tratamiento o completado)
+    conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
+
     overview = CommercialOverview(
         total_leads=total_leads,
         leads_this_month=leads_this_month,
         conversion_rate=round(conversion_rate, 2),
-        active_patients=active_patients
+        active_patients=appointment_totals.active_patients or 0
     )
-    
+
     # ===============================
     # MONTHLY TRENDS
     # ===============================
-    
-    # Leads mes pasado
-    leads_last_month = lead_query.filter(
-        and_(
-            cast(Lead.created_at, Date) >= last_month_start,
-            cast(Lead.created_at, Date) <= last_month_end
-        )
-    ).count()
-    
+
     # Crecimiento de leads
     leads_growth = 0.0
     if leads_last_month > 0:
         leads_growth = ((leads_this_month - leads_last_month) / leads_last_month * 100)
     elif leads_this_month > 0:
         leads_growth = 100.0  # Si no había leads el mes pasado pero hay este mes
-    
-    # Conversión mes pasado
-    converted_last_month = lead_query.filter(
-        and_(
-            cast(Lead.conversion_date, Date) >= last_month_start,
-            cast(Lead.conversion_date, Date) <= last_month_end,
-            Lead.status.in_([LeadStatus.en_tratamiento, LeadStatus.completado])
-        )
-    ).count()
-    
+
     last_month_conversion_rate = (converted_last_month / leads_last_month * 100) if leads_last_month > 0 else 0
     conversion_growth = conversion_rate - last_month_conversion_rate
-    
+
     # Crecimiento de ingresos (simplificado basado en citas completadas)
-    completed_this_month = appointment_query.filter(
-        and_(
-            Appointment.status == AppointmentStatus.completed,
-            cast(Appointment.scheduled_at, Date) >= current_month_start
-        )
-    ).count()
-    
-    completed_last_month = appointment_query.filter(
-        and_(
-            Appointment.status == AppointmentStatus.completed,
-            cast(Appointment.scheduled_at, Date) >= last_month_start,
-            cast(Appointment.scheduled_at, Date) <= last_month_end
-        )
-    ).count()
-    
+    completed_this_month = appointment_totals.completed_this_month or 0
+    completed_last_month = appointment_totals.completed_last_month or 0
+
     revenue_growth = 0.0
     if completed_last_month > 0:
         revenue_growth = ((completed_this_month - completed_last_month) / completed_last_month * 100)
     elif completed_this_month > 0:
         revenue_growth = 100.0
-    
+
     monthly_trends = MonthlyTrends(
         leads_growth=round(leads_growth, 1),
         conversion_growth=round(conversion_growth, 1),
         revenue_growth=round(revenue_growth, 1)
     )
-    
+
     # ===============================
     # FUNNEL DATA
     # ===============================
-    
+
     funnel = FunnelData(
-        nuevo=lead_query.filter(Lead.status == LeadStatus.nuevo).count(),
-        contactado=lead_query.filter(Lead.status == LeadStatus.contactado).count(),
-        calificado=lead_query.filter(Lead.status == LeadStatus.calificado).count(),
-        cita_agendada=lead_query.filter(Lead.status == LeadStatus.cita_agendada).count(),
-        en_tratamiento=lead_query.filter(Lead.status == LeadStatus.en_tratamiento).count(),
-        completado=lead_query.filter(Lead.status == LeadStatus.completado).count()
+        nuevo=status_counts.get(LeadStatus.nuevo, 0),
+        contactado=status_counts.get(LeadStatus.contactado, 0),
+        calificado=status_counts.get(LeadStatus.calificado, 0),
+        cita_agendada=status_counts.get(LeadStatus.cita_agendada, 0),
+        en_tratamiento=status_counts.get(LeadStatus.en_tratamiento, 0),
+        completado=status_counts.get(LeadStatus.completado, 0)
     )
-    
+
     # ===============================
     # SOURCES DATA
     # ===============================
-    
+
     # Mapear fuentes a nombres más amigables
     source_mapping = {
         LeadSource.website: "website",
@@ -192,8 +248,7 @@ async def get_commercial_stats(
     }
     
     for source_enum, source_name in source_mapping.items():
-        count = lead_query.filter(Lead.source == source_enum).count()
-        sources_data[source_name] = count
+        sources_data[source_name] = source_counts.get(source_enum, 0)
     
     # Instagram se agrupa con Facebook (Facebook/Instagram Ads)
     sources_data["instagram"] = sources_data["facebook"]
@@ -204,35 +259,14 @@ async def get_commercial_stats(
     # DOCTORS PERFORMANCE
     # ===============================
     
-    # Obtener médicos del tenant
-    doctors = db.query(User).filter(
-        User.tenant_id == current_user.current_tenant_id,
-        User.role == UserRole.medico,
-        User.is_active == True
-    ).all()
-    
     doctors_performance = []
-    for doctor in doctors:
-        doctor_leads = lead_query.filter(Lead.assigned_to_id == doctor.id).count()
-        doctor_converted = lead_query.filter(
-            Lead.assigned_to_id == doctor.id,
-            Lead.status.in_([LeadStatus.en_tratamiento, LeadStatus.completado])
-        ).count()
+    for doctor_id, full_name, first_name, last_name, doctor_active_patients in doctors:
+        doctor_leads = leads_by_assignee.get(doctor_id, 0)
+        doctor_converted = converted_by_assignee.get(doctor_id, 0)
         doctor_conversion_rate = (doctor_converted / doctor_leads * 100) if doctor_leads > 0 else 0
         
-        doctor_active_patients = appointment_query.filter(
-            Appointment.provider_id == doctor.id,
-            or_(
-                Appointment.status == AppointmentStatus.in_progress,
-                and_(
-                    Appointment.status == AppointmentStatus.completed,
-                    cast(Appointment.scheduled_at, Date) >= (today - timedelta(days=30))
-                )
-            )
-        ).distinct(Appointment.patient_id).count()
-        
         doctors_performance.append(DoctorPerformance(
-            name=doctor.full_name or f"{doctor.first_name} {doctor.last_name}",
+            name=full_name or f"{first_name} {last_name}",
             leads_assigned=doctor_leads,
             conversion_rate=round(doctor_conversion_rate, 1),
             active_patients=doctor_active_patients
@@ -244,4 +278,4 @@ async def get_commercial_stats(
         funnel=funnel,
         sources=sources,
         doctors_performance=doctors_performance
-    )
\ No newline at end of file
+    )
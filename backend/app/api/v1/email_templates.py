@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.security import get_current_admin_user
+from app.core.template_cache import render_template
 from app.db.session import get_db
 from app.models.email_template import EmailTemplate, EmailTemplateType
 from app.models.user import User
@@ -158,7 +159,6 @@ async def preview_email_template(
         )
 
     # Sample data for preview
-    from jinja2 import Template
     from datetime import datetime
 
     sample_data = {
@@ -171,8 +171,7 @@ async def preview_email_template(
     }
 
     try:
-        jinja_template = Template(template.html_content)
-        rendered_html = jinja_template.render(**sample_data)
+        _, rendered_html = render_template(template, sample_data)
 
         return {
             "subject": template.subject,
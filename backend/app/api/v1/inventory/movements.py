@@ -1,10 +1,11 @@
 """Inventory movements endpoints."""
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import desc
 
+from app.core.pagination import PAGINATION_MODE_PATTERN, paginate_keyset
 from app.core.security import get_current_active_user as get_current_user
 from app.db.session import get_db
 from app.models.user import User
@@ -16,16 +17,24 @@ router = APIRouter()
 
 @router.get("/movements/", response_model=List[InventoryMovementSchema])
 async def get_inventory_movements(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     product_id: Optional[str] = Query(None),
     movement_type: Optional[str] = Query(None),
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
+    pagination: str = Query("offset", pattern=PAGINATION_MODE_PATTERN),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtener movimientos de inventario"""
+    """
+    Obtener movimientos de inventario.
+
+    En modo cursor el cursor de la siguiente página se devuelve en la
+    cabecera X-Next-Cursor.
+    """
 
     query = db.query(InventoryMovement).options(
         joinedload(InventoryMovement.product)
@@ -45,5 +54,13 @@ async def get_inventory_movements(
     if end_date:
         query = query.filter(InventoryMovement.created_at <= end_date)
 
+    if pagination == "cursor" or cursor:
+        movements, next_cursor = paginate_keyset(
+            query, InventoryMovement.created_at, InventoryMovement.id, cursor=cursor, limit=limit
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return movements
+
     movements = query.order_by(desc(InventoryMovement.created_at)).offset(skip).limit(limit).all()
     return movements
@@ -1,10 +1,12 @@
 """Inventory products endpoints."""
 from typing import List, Optional
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Response
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, desc, func
 
+from app.core.pagination import paginate_keyset
 from app.core.security import get_current_active_user as get_current_user, get_current_tenant_admin
 from app.db.session import get_db
 from app.models.user import User
@@ -15,8 +17,10 @@ from app.models.inventory import (
 from app.schemas.inventory import (
     InventoryProduct as InventoryProductSchema,
     InventoryProductCreate, InventoryProductUpdate,
-    InventoryProductStockUpdate, InventoryProductWithStats,
+    InventoryProductStockUpdate, InventoryProductWithStats, ExpiringProduct,
 )
+from app.services.inventory_expiry import days_until_expiry, expiring_products_filter, is_expired
+from app.services.inventory_ledger import StockMovement, apply_movement, record_threshold_crossings
 from .helpers import check_and_create_alerts
 
 router = APIRouter()
@@ -110,6 +114,56 @@ async def get_inventory_products(
     return products_with_stats
 
 
+@router.get("/expiring/", response_model=List[ExpiringProduct])
+async def get_expiring_products(
+    response: Response,
+    days: int = Query(30, ge=0, le=365),
+    include_expired: bool = Query(True),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Productos activos que vencen en los próximos `days` días (y los ya
+    vencidos), del vencimiento más próximo al más lejano.
+
+    Paginado por cursor sobre el índice (tenant_id, expiration_date): el
+    cursor de la siguiente página se devuelve en la cabecera X-Next-Cursor.
+    """
+    now = datetime.utcnow()
+    query = db.query(
+        InventoryProduct.id,
+        InventoryProduct.name,
+        InventoryProduct.sku,
+        InventoryProduct.current_stock,
+        InventoryProduct.unit_type,
+        InventoryProduct.expiration_date
+    ).filter(
+        InventoryProduct.tenant_id == current_user.current_tenant_id,
+        expiring_products_filter(now + timedelta(days=days))
+    )
+
+    if not include_expired:
+        query = query.filter(InventoryProduct.expiration_date > now)
+
+    products, next_cursor = paginate_keyset(
+        query, InventoryProduct.expiration_date, InventoryProduct.id,
+        cursor=cursor, limit=limit, descending=False
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return [
+        ExpiringProduct(
+            **product._mapping,
+            days_until_expiry=days_until_expiry(product.expiration_date, now),
+            is_expired=is_expired(product.expiration_date, now)
+        )
+        for product in products
+    ]
+
+
 @router.get("/products/{product_id}", response_model=InventoryProductWithStats)
 async def get_inventory_product(
     product_id: str,
@@ -226,14 +280,17 @@ async def create_inventory_product(
             notes="Stock inicial"
         )
         db.add(movement)
-        db.commit()
+
+    # Alertas si el producto se crea ya por debajo de su mínimo o sin stock
+    record_threshold_crossings(db, db_product.tenant_id, [(db_product, db_product.current_stock, None)])
+    db.commit()
 
     return db_product
 
 
 @router.put("/products/{product_id}", response_model=InventoryProductSchema)
 async def update_inventory_product(
-    product_id: str,
+    product_id: UUID,
     product: InventoryProductUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_tenant_admin)
@@ -278,10 +335,18 @@ async def update_inventory_product(
                 detail=f"Ya existe un producto con el SKU '{product.sku}'"
             )
 
+    stock_before = db_product.current_stock
+    minimum_before = db_product.minimum_stock if db_product.is_active else None
+
     # Actualizar campos
-    for field, value in product.model_dump(exclude_unset=True).items():
+    update_data = product.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(db_product, field, value)
 
+    # Un nuevo mínimo o la (des)activación pueden crear o resolver alertas de stock
+    if update_data.keys() & {"minimum_stock", "is_active"}:
+        record_threshold_crossings(db, db_product.tenant_id, [(db_product, stock_before, minimum_before)])
+
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -289,7 +354,7 @@ async def update_inventory_product(
 
 @router.put("/products/{product_id}/stock", response_model=InventoryProductSchema)
 async def update_product_stock(
-    product_id: str,
+    product_id: UUID,
     stock_update: InventoryProductStockUpdate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -297,12 +362,13 @@ async def update_product_stock(
 ):
     """Actualizar stock de un producto y crear movimiento"""
 
+    # Bloqueado hasta el commit: la diferencia se calcula sobre el stock vigente
     db_product = db.query(InventoryProduct).filter(
         and_(
             InventoryProduct.id == product_id,
             InventoryProduct.tenant_id == current_user.current_tenant_id
         )
-    ).first()
+    ).with_for_update().first()
 
     if not db_product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
@@ -315,29 +381,21 @@ async def update_product_stock(
     if quantity_change == 0:
         raise HTTPException(status_code=400, detail="El stock no ha cambiado")
 
-    # Actualizar stock del producto
-    db_product.current_stock = new_stock
-
-    # Actualizar fecha de restock si es una entrada
-    if quantity_change > 0 and stock_update.movement_type in [MovementType.IN_PURCHASE, MovementType.IN_DONATION, MovementType.IN_RETURN]:
-        db_product.last_restock_date = datetime.now()
-
-    # Crear movimiento de inventario
-    movement = InventoryMovement(
-        tenant_id=current_user.current_tenant_id,
-        product_id=product_id,
-        movement_type=stock_update.movement_type,
+    # Actualizar stock del producto y crear movimiento de inventario
+    apply_movement(db, current_user.current_tenant_id, current_user.id, StockMovement(
+        product_id=db_product.id,
         quantity=quantity_change,
+        movement_type=stock_update.movement_type,
         unit_cost=stock_update.unit_cost,
-        total_cost=stock_update.unit_cost * abs(quantity_change) if stock_update.unit_cost else None,
-        user_id=current_user.id,
-        stock_after=new_stock,
         notes=stock_update.notes,
         reference_number=stock_update.reference_number,
         supplier=stock_update.supplier
-    )
+    ))
+
+    # Actualizar fecha de restock si es una entrada
+    if quantity_change > 0 and stock_update.movement_type in [MovementType.IN_PURCHASE, MovementType.IN_DONATION, MovementType.IN_RETURN]:
+        db_product.last_restock_date = datetime.now()
 
-    db.add(movement)
     db.commit()
     db.refresh(db_product)
 
@@ -3,7 +3,7 @@ from typing import List
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, desc, func
+from sqlalchemy import and_, desc, func, select
 
 from app.core.security import get_current_active_user as get_current_user
 from app.db.session import get_db
@@ -13,6 +13,9 @@ from app.models.inventory import (
     MovementType
 )
 from app.schemas.inventory import InventoryStats, LowStockAlert
+from app.services.inventory_snapshots import (
+    USAGE_WINDOW_DAYS, latest_snapshot_day, project_stockouts, usage_since
+)
 
 router = APIRouter()
 
@@ -22,83 +25,58 @@ async def get_inventory_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtener estadísticas del inventario"""
+    """
+    Obtener estadísticas del inventario.
 
-    # Estadísticas básicas
-    total_products = db.query(func.count(InventoryProduct.id)).filter(
-        and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.is_active == True
-        )
-    ).scalar() or 0
+    Los totales salen de una sola consulta agregada sobre los productos; los
+    más usados, de las fotos diarias (inventory_daily_snapshots) más los
+    movimientos posteriores a la última foto, y la proyección de días hasta
+    agotar stock, de las fotos con funciones de ventana.
+    """
+    tenant_id = current_user.current_tenant_id
 
-    total_categories = db.query(func.count(InventoryCategory.id)).filter(
-        and_(
-            InventoryCategory.tenant_id == current_user.current_tenant_id,
-            InventoryCategory.is_active == True
-        )
-    ).scalar() or 0
-
-    products_low_stock = db.query(func.count(InventoryProduct.id)).filter(
-        and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.current_stock <= InventoryProduct.minimum_stock,
-            InventoryProduct.is_active == True
-        )
-    ).scalar() or 0
-
-    products_out_of_stock = db.query(func.count(InventoryProduct.id)).filter(
-        and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.current_stock == 0,
-            InventoryProduct.is_active == True
-        )
-    ).scalar() or 0
-
-    # Productos vencidos y por vencer
+    # Estadísticas básicas, vencimientos y valor en una consulta
     now = datetime.now()
     next_week = now + timedelta(days=7)
-
-    products_expired = db.query(func.count(InventoryProduct.id)).filter(
+    total_categories = select(func.count(InventoryCategory.id)).where(
         and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.expiration_date < now,
-            InventoryProduct.is_active == True
-        )
-    ).scalar() or 0
-
-    products_expiring_soon = db.query(func.count(InventoryProduct.id)).filter(
-        and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.expiration_date.between(now, next_week),
-            InventoryProduct.is_active == True
+            InventoryCategory.tenant_id == tenant_id,
+            InventoryCategory.is_active == True
         )
-    ).scalar() or 0
-
-    # Valor total del inventario
-    total_inventory_value = db.query(
-        func.sum(InventoryProduct.current_stock * InventoryProduct.cost_per_unit)
+    ).scalar_subquery()
+    totals = db.query(
+        func.count(InventoryProduct.id).label("total_products"),
+        total_categories.label("total_categories"),
+        func.count(InventoryProduct.id).filter(
+            InventoryProduct.current_stock <= InventoryProduct.minimum_stock
+        ).label("products_low_stock"),
+        func.count(InventoryProduct.id).filter(
+            InventoryProduct.current_stock == 0
+        ).label("products_out_of_stock"),
+        func.count(InventoryProduct.id).filter(
+            InventoryProduct.expiration_date < now
+        ).label("products_expired"),
+        func.count(InventoryProduct.id).filter(
+            InventoryProduct.expiration_date.between(now, next_week)
+        ).label("products_expiring_soon"),
+        func.sum(InventoryProduct.current_stock * InventoryProduct.cost_per_unit).label("total_inventory_value")
     ).filter(
         and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryProduct.is_active == True,
-            InventoryProduct.cost_per_unit.isnot(None)
+            InventoryProduct.tenant_id == tenant_id,
+            InventoryProduct.is_active == True
         )
-    ).scalar() or 0.0
+    ).one()
 
-    # Productos más usados (últimos 30 días)
-    thirty_days_ago = now - timedelta(days=30)
+    # Productos más usados (últimos 30 días): fotos diarias + delta intradía
+    today = datetime.utcnow().date()
+    usage = usage_since(
+        db, tenant_id, today - timedelta(days=USAGE_WINDOW_DAYS), latest_snapshot_day(db, tenant_id)
+    )
     most_used_query = db.query(
         InventoryProduct.name,
-        func.sum(InventoryMovement.quantity).label('total_used')
+        func.sum(usage.c.used).label('total_used')
     ).join(
-        InventoryMovement
-    ).filter(
-        and_(
-            InventoryProduct.tenant_id == current_user.current_tenant_id,
-            InventoryMovement.movement_type == MovementType.OUT_USAGE,
-            InventoryMovement.created_at >= thirty_days_ago
-        )
+        usage, usage.c.product_id == InventoryProduct.id
     ).group_by(
         InventoryProduct.id, InventoryProduct.name
     ).order_by(
@@ -114,7 +92,7 @@ async def get_inventory_stats(
     recent_movements_query = db.query(InventoryMovement).options(
         joinedload(InventoryMovement.product)
     ).filter(
-        InventoryMovement.tenant_id == current_user.current_tenant_id
+        InventoryMovement.tenant_id == tenant_id
     ).order_by(
         desc(InventoryMovement.created_at)
     ).limit(10).all()
@@ -131,15 +109,16 @@ async def get_inventory_stats(
     ]
 
     return InventoryStats(
-        total_products=total_products,
-        total_categories=total_categories,
-        products_low_stock=products_low_stock,
-        products_out_of_stock=products_out_of_stock,
-        products_expired=products_expired,
-        products_expiring_soon=products_expiring_soon,
-        total_inventory_value=float(total_inventory_value),
+        total_products=totals.total_products,
+        total_categories=totals.total_categories or 0,
+        products_low_stock=totals.products_low_stock,
+        products_out_of_stock=totals.products_out_of_stock,
+        products_expired=totals.products_expired,
+        products_expiring_soon=totals.products_expiring_soon,
+        total_inventory_value=float(totals.total_inventory_value or 0.0),
         most_used_products=most_used_products,
-        recent_movements=recent_movements
+        recent_movements=recent_movements,
+        stockout_projection=project_stockouts(db, tenant_id, today=today)
     )
 
 
@@ -148,7 +127,13 @@ async def get_low_stock_alerts(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtener alertas de stock bajo"""
+    """
+    Obtener alertas de stock bajo.
+
+    El filtro coincide con el índice parcial ix_inventory_products_low_stock,
+    que solo contiene los productos activos bajo mínimo, y el uso de los
+    últimos 30 días se agrega para todos ellos en una sola consulta.
+    """
 
     products = db.query(InventoryProduct).options(
         joinedload(InventoryProduct.category)
@@ -162,23 +147,27 @@ async def get_low_stock_alerts(
         InventoryProduct.current_stock
     ).all()
 
+    if not products:
+        return []
+
+    # Uso promedio de los últimos 30 días por producto
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    avg_usage = dict(db.query(
+        InventoryMovement.product_id,
+        func.avg(func.abs(InventoryMovement.quantity))
+    ).filter(
+        and_(
+            InventoryMovement.product_id.in_([product.id for product in products]),
+            InventoryMovement.movement_type == MovementType.OUT_USAGE,
+            InventoryMovement.created_at >= thirty_days_ago
+        )
+    ).group_by(InventoryMovement.product_id).all())
+
     alerts = []
     for product in products:
         # Calcular días de suministro basado en uso promedio
         days_of_supply = None
-
-        # Calcular uso promedio de los últimos 30 días
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        avg_daily_usage = db.query(
-            func.avg(func.abs(InventoryMovement.quantity))
-        ).filter(
-            and_(
-                InventoryMovement.product_id == product.id,
-                InventoryMovement.movement_type == MovementType.OUT_USAGE,
-                InventoryMovement.created_at >= thirty_days_ago
-            )
-        ).scalar()
-
+        avg_daily_usage = avg_usage.get(product.id)
         if avg_daily_usage and avg_daily_usage > 0:
             days_of_supply = int(product.current_stock / avg_daily_usage)
 
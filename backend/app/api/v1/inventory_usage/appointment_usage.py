@@ -1,17 +1,20 @@
 """Appointment inventory usage endpoints - CRUD for inventory usage in appointments."""
 from typing import List
+from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 
+from app.api.v1.inventory.helpers import check_and_create_alerts
 from app.core.security import get_current_active_user as get_current_user, get_current_tenant_admin
 from app.db.session import get_db
 from app.models.user import User
 from app.models.inventory import (
-    InventoryProduct, InventoryMovement,
+    InventoryProduct,
     AppointmentInventoryUsage, MovementType
 )
 from app.models.appointment import Appointment
+from app.services.inventory_ledger import InsufficientStockError, StockMovement, apply_movement
 from app.schemas.inventory import (
     AppointmentInventoryUsage as AppointmentInventoryUsageSchema,
     AppointmentInventoryUsageCreate, AppointmentInventoryUsageUpdate
@@ -22,7 +25,7 @@ router = APIRouter()
 
 @router.get("/appointments/{appointment_id}/usage/", response_model=List[AppointmentInventoryUsageSchema])
 async def get_appointment_inventory_usage(
-    appointment_id: str,
+    appointment_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -37,7 +40,7 @@ async def get_appointment_inventory_usage(
     if not appointment:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
-    if current_user.role not in ['tenant_admin', 'manager'] and appointment.medic_id != current_user.id:
+    if current_user.role not in ['tenant_admin', 'manager'] and appointment.provider_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tiene permisos para ver esta información")
 
     usage = db.query(AppointmentInventoryUsage).options(
@@ -51,7 +54,7 @@ async def get_appointment_inventory_usage(
 
 @router.post("/appointments/{appointment_id}/usage/", response_model=AppointmentInventoryUsageSchema)
 async def record_inventory_usage(
-    appointment_id: str,
+    appointment_id: UUID,
     usage: AppointmentInventoryUsageCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -68,7 +71,7 @@ async def record_inventory_usage(
     if not appointment:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
-    if current_user.role not in ['tenant_admin', 'manager'] and appointment.medic_id != current_user.id:
+    if current_user.role not in ['tenant_admin', 'manager'] and appointment.provider_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="No tiene permisos para registrar uso de inventario en esta cita"
@@ -84,40 +87,34 @@ async def record_inventory_usage(
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    if product.current_stock < usage.quantity_used:
+    try:
+        apply_movement(db, current_user.current_tenant_id, current_user.id, StockMovement(
+            product_id=product.id,
+            quantity=-usage.quantity_used,
+            movement_type=MovementType.OUT_USAGE,
+            appointment_id=appointment.id,
+            notes=f"Usado en cita - {usage.notes}" if usage.notes else "Usado en cita médica"
+        ))
+    except InsufficientStockError as e:
+        db.rollback()
         raise HTTPException(
             status_code=400,
-            detail=f"Stock insuficiente. Disponible: {product.current_stock} {product.unit_type}, Solicitado: {usage.quantity_used} {product.unit_type}"
+            detail=f"Stock insuficiente. Disponible: {e.available} {product.unit_type}, Solicitado: {usage.quantity_used} {product.unit_type}"
         )
 
     db_usage = AppointmentInventoryUsage(
         tenant_id=current_user.current_tenant_id,
-        appointment_id=appointment_id,
-        product_id=usage.product_id,
+        appointment_id=appointment.id,
+        product_id=product.id,
         quantity_used=usage.quantity_used,
         notes=usage.notes,
         recorded_by_id=current_user.id
     )
     db.add(db_usage)
 
-    product.current_stock -= usage.quantity_used
-
-    movement = InventoryMovement(
-        tenant_id=current_user.current_tenant_id,
-        product_id=usage.product_id,
-        movement_type=MovementType.OUT_USAGE,
-        quantity=-usage.quantity_used,
-        appointment_id=appointment_id,
-        user_id=current_user.id,
-        stock_after=product.current_stock,
-        notes=f"Usado en cita - {usage.notes}" if usage.notes else "Usado en cita médica"
-    )
-    db.add(movement)
-
     db.commit()
     db.refresh(db_usage)
 
-    from app.api.v1.inventory import check_and_create_alerts
     background_tasks.add_task(check_and_create_alerts, db, product)
 
     return db_usage
@@ -125,8 +122,8 @@ async def record_inventory_usage(
 
 @router.put("/appointments/{appointment_id}/usage/{usage_id}", response_model=AppointmentInventoryUsageSchema)
 async def update_inventory_usage(
-    appointment_id: str,
-    usage_id: str,
+    appointment_id: UUID,
+    usage_id: UUID,
     usage_update: AppointmentInventoryUsageUpdate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -139,7 +136,7 @@ async def update_inventory_usage(
             AppointmentInventoryUsage.appointment_id == appointment_id,
             AppointmentInventoryUsage.tenant_id == current_user.current_tenant_id
         )
-    ).first()
+    ).with_for_update().first()
 
     if not db_usage:
         raise HTTPException(status_code=404, detail="Registro de uso no encontrado")
@@ -156,29 +153,23 @@ async def update_inventory_usage(
         new_quantity = usage_update.quantity_used
         quantity_difference = new_quantity - old_quantity
 
-        if quantity_difference > 0 and product.current_stock < quantity_difference:
+        try:
+            apply_movement(db, current_user.current_tenant_id, current_user.id, StockMovement(
+                product_id=product.id,
+                quantity=-quantity_difference,
+                movement_type=MovementType.OUT_ADJUSTMENT if quantity_difference > 0 else MovementType.IN_ADJUSTMENT,
+                appointment_id=db_usage.appointment_id,
+                notes=f"Ajuste de uso en cita (anterior: {old_quantity}, nuevo: {new_quantity})"
+            ))
+        except InsufficientStockError as e:
+            db.rollback()
             raise HTTPException(
                 status_code=400,
-                detail=f"Stock insuficiente para el ajuste. Disponible: {product.current_stock} {product.unit_type}"
+                detail=f"Stock insuficiente para el ajuste. Disponible: {e.available} {product.unit_type}"
             )
 
-        product.current_stock -= quantity_difference
-
-        movement = InventoryMovement(
-            tenant_id=current_user.current_tenant_id,
-            product_id=db_usage.product_id,
-            movement_type=MovementType.OUT_ADJUSTMENT if quantity_difference > 0 else MovementType.IN_ADJUSTMENT,
-            quantity=-quantity_difference,
-            appointment_id=appointment_id,
-            user_id=current_user.id,
-            stock_after=product.current_stock,
-            notes=f"Ajuste de uso en cita (anterior: {old_quantity}, nuevo: {new_quantity})"
-        )
-        db.add(movement)
-
         db_usage.quantity_used = new_quantity
 
-        from app.api.v1.inventory import check_and_create_alerts
         background_tasks.add_task(check_and_create_alerts, db, product)
 
     if usage_update.notes is not None:
@@ -192,8 +183,8 @@ async def update_inventory_usage(
 
 @router.delete("/appointments/{appointment_id}/usage/{usage_id}")
 async def delete_inventory_usage(
-    appointment_id: str,
-    usage_id: str,
+    appointment_id: UUID,
+    usage_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_tenant_admin)
 ):
@@ -204,32 +195,23 @@ async def delete_inventory_usage(
             AppointmentInventoryUsage.appointment_id == appointment_id,
             AppointmentInventoryUsage.tenant_id == current_user.current_tenant_id
         )
-    ).first()
+    ).with_for_update().first()
 
     if not db_usage:
         raise HTTPException(status_code=404, detail="Registro de uso no encontrado")
 
-    product = db.query(InventoryProduct).filter(
-        InventoryProduct.id == db_usage.product_id
-    ).first()
-
-    if not product:
+    try:
+        apply_movement(db, current_user.current_tenant_id, current_user.id, StockMovement(
+            product_id=db_usage.product_id,
+            quantity=db_usage.quantity_used,
+            movement_type=MovementType.IN_RETURN,
+            appointment_id=db_usage.appointment_id,
+            notes=f"Reversión de uso registrado en cita (cantidad: {db_usage.quantity_used})"
+        ))
+    except LookupError:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    product.current_stock += db_usage.quantity_used
-
-    movement = InventoryMovement(
-        tenant_id=current_user.current_tenant_id,
-        product_id=db_usage.product_id,
-        movement_type=MovementType.IN_RETURN,
-        quantity=db_usage.quantity_used,
-        appointment_id=appointment_id,
-        user_id=current_user.id,
-        stock_after=product.current_stock,
-        notes=f"Reversión de uso registrado en cita (cantidad: {db_usage.quantity_used})"
-    )
-    db.add(movement)
-
     db.delete(db_usage)
 
     db.commit()
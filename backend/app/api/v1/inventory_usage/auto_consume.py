@@ -1,28 +1,42 @@
 """Auto consume endpoints - automatic consumption of service products."""
+from uuid import UUID
+
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, update
 
 from app.core.security import get_current_active_user as get_current_user
 from app.db.session import get_db
 from app.models.user import User
 from app.models.inventory import (
-    InventoryMovement, ServiceProduct,
+    InventoryProduct, ServiceProduct,
     AppointmentInventoryUsage, MovementType
 )
 from app.models.appointment import Appointment
+from app.services.inventory_expiry import sweep_expiry_alerts
+from app.services.inventory_ledger import StockMovement, apply_movements
 
 router = APIRouter()
 
 
 @router.post("/appointments/{appointment_id}/auto-consume/")
 async def auto_consume_service_products(
-    appointment_id: str,
+    appointment_id: UUID,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Consumir automáticamente productos asociados al servicio de la cita"""
+    """
+    Consumir automáticamente productos asociados al servicio de la cita.
+
+    Opera por conjuntos: bloquea todos los productos del servicio con un
+    único SELECT ... FOR UPDATE ordenado por id (dos check-outs simultáneos
+    toman los bloqueos en el mismo orden, así que no hay deadlock ni se
+    vende stock que ya no existe), lee los usos previos de la cita en una
+    consulta e inserta los usos en bloque; el stock y los movimientos se
+    aplican con el ledger (app.services.inventory_ledger). El número de
+    consultas no depende del número de productos del servicio.
+    """
     appointment = db.query(Appointment).options(
         joinedload(Appointment.service)
     ).filter(
@@ -35,112 +49,113 @@ async def auto_consume_service_products(
     if not appointment:
         raise HTTPException(status_code=404, detail="Cita no encontrada")
 
-    if current_user.role not in ['tenant_admin', 'manager'] and appointment.medic_id != current_user.id:
+    if current_user.role not in ['tenant_admin', 'manager'] and appointment.provider_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tiene permisos para esta acción")
 
     if not appointment.service:
         raise HTTPException(status_code=400, detail="La cita no tiene un servicio asociado")
 
-    service_products = db.query(ServiceProduct).options(
-        joinedload(ServiceProduct.product)
+    # Productos del servicio, bloqueados en orden de id
+    rows = db.query(InventoryProduct, ServiceProduct.default_quantity).join(
+        ServiceProduct, ServiceProduct.product_id == InventoryProduct.id
     ).filter(
         and_(
             ServiceProduct.service_id == appointment.service_id,
-            ServiceProduct.is_active == True
+            ServiceProduct.is_active == True,
+            InventoryProduct.tenant_id == current_user.current_tenant_id
         )
-    ).all()
+    ).order_by(InventoryProduct.id).with_for_update(of=InventoryProduct).all()
 
-    if not service_products:
+    if not rows:
         return {"message": "No hay productos asociados al servicio", "consumed_products": []}
 
+    # Un producto asociado dos veces al servicio se consume por la cantidad mayor
+    products, quantity_needed = {}, {}
+    for product, default_quantity in rows:
+        products[product.id] = product
+        quantity_needed[product.id] = max(default_quantity, quantity_needed.get(product.id, 0))
+
+    # Usos ya registrados en la cita (se leen tras el bloqueo)
+    used, first_usage = {}, {}
+    for usage_id, product_id, quantity_used in db.query(
+        AppointmentInventoryUsage.id,
+        AppointmentInventoryUsage.product_id,
+        AppointmentInventoryUsage.quantity_used
+    ).filter(
+        AppointmentInventoryUsage.appointment_id == appointment.id,
+        AppointmentInventoryUsage.product_id.in_(products)
+    ).order_by(AppointmentInventoryUsage.created_at):
+        used[product_id] = used.get(product_id, 0) + quantity_used
+        first_usage.setdefault(product_id, (usage_id, quantity_used))
+
     consumed_products = []
     insufficient_stock = []
+    new_usages, usage_updates, movements = [], [], []
 
-    for service_product in service_products:
-        product = service_product.product
-        quantity_needed = service_product.default_quantity
-
-        if product.current_stock >= quantity_needed:
-            existing_usage = db.query(AppointmentInventoryUsage).filter(
-                and_(
-                    AppointmentInventoryUsage.appointment_id == appointment_id,
-                    AppointmentInventoryUsage.product_id == product.id
-                )
-            ).first()
-
-            if existing_usage:
-                if existing_usage.quantity_used < quantity_needed:
-                    additional_quantity = quantity_needed - existing_usage.quantity_used
-                    if product.current_stock >= additional_quantity:
-                        existing_usage.quantity_used = quantity_needed
-                        product.current_stock -= additional_quantity
-
-                        movement = InventoryMovement(
-                            tenant_id=current_user.current_tenant_id,
-                            product_id=product.id,
-                            movement_type=MovementType.OUT_USAGE,
-                            quantity=-additional_quantity,
-                            appointment_id=appointment_id,
-                            user_id=current_user.id,
-                            stock_after=product.current_stock,
-                            notes=f"Consumo automático adicional - {appointment.service.name}"
-                        )
-                        db.add(movement)
-
-                        consumed_products.append({
-                            "product_name": product.name,
-                            "quantity": additional_quantity,
-                            "action": "updated"
-                        })
-                else:
-                    consumed_products.append({
-                        "product_name": product.name,
-                        "quantity": 0,
-                        "action": "already_consumed"
-                    })
-            else:
-                usage = AppointmentInventoryUsage(
-                    tenant_id=current_user.current_tenant_id,
-                    appointment_id=appointment_id,
-                    product_id=product.id,
-                    quantity_used=quantity_needed,
-                    notes=f"Consumo automático - {appointment.service.name}",
-                    recorded_by_id=current_user.id
-                )
-                db.add(usage)
-
-                product.current_stock -= quantity_needed
-
-                movement = InventoryMovement(
-                    tenant_id=current_user.current_tenant_id,
-                    product_id=product.id,
-                    movement_type=MovementType.OUT_USAGE,
-                    quantity=-quantity_needed,
-                    appointment_id=appointment_id,
-                    user_id=current_user.id,
-                    stock_after=product.current_stock,
-                    notes=f"Consumo automático - {appointment.service.name}"
-                )
-                db.add(movement)
-
-                consumed_products.append({
-                    "product_name": product.name,
-                    "quantity": quantity_needed,
-                    "action": "consumed"
-                })
-
-                from app.api.v1.inventory import check_and_create_alerts
-                background_tasks.add_task(check_and_create_alerts, db, product)
-        else:
+    for product_id, product in products.items():
+        needed = quantity_needed[product_id]
+        already_used = used.get(product_id, 0)
+        quantity = needed - already_used
+
+        if quantity <= 0:
+            consumed_products.append({
+                "product_name": product.name,
+                "quantity": 0,
+                "action": "already_consumed"
+            })
+            continue
+
+        if product.current_stock < quantity:
             insufficient_stock.append({
                 "product_name": product.name,
-                "requested": quantity_needed,
+                "requested": quantity,
                 "available": product.current_stock,
                 "unit_type": product.unit_type
             })
+            continue
+
+        if product_id in first_usage:
+            usage_id, usage_quantity = first_usage[product_id]
+            usage_updates.append({"id": usage_id, "quantity_used": usage_quantity + quantity})
+            notes = f"Consumo automático adicional - {appointment.service.name}"
+            action = "updated"
+        else:
+            notes = f"Consumo automático - {appointment.service.name}"
+            new_usages.append({
+                "tenant_id": current_user.current_tenant_id,
+                "appointment_id": appointment.id,
+                "product_id": product_id,
+                "quantity_used": quantity,
+                "notes": notes,
+                "recorded_by_id": current_user.id
+            })
+            action = "consumed"
+
+        movements.append(StockMovement(
+            product_id=product_id,
+            quantity=-quantity,
+            movement_type=MovementType.OUT_USAGE,
+            appointment_id=appointment.id,
+            notes=notes
+        ))
+        consumed_products.append({
+            "product_name": product.name,
+            "quantity": quantity,
+            "action": action
+        })
+
+    if new_usages:
+        db.execute(insert(AppointmentInventoryUsage), new_usages)
+    if usage_updates:
+        db.execute(update(AppointmentInventoryUsage), usage_updates)
+    # Los productos ya están bloqueados y con stock comprobado
+    apply_movements(db, current_user.current_tenant_id, current_user.id, movements)
 
     db.commit()
 
+    if movements:
+        background_tasks.add_task(_check_alerts, db, [movement.product_id for movement in movements])
+
     response = {
         "message": "Consumo automático completado",
         "consumed_products": consumed_products
@@ -151,3 +166,9 @@ async def auto_consume_service_products(
         response["warning"] = "Algunos productos no pudieron ser consumidos por stock insuficiente"
 
     return response
+
+
+async def _check_alerts(db: Session, product_ids: list):
+    """Revisa las alertas de vencimiento de los productos consumidos en una sola pasada."""
+    sweep_expiry_alerts(db, product_ids=product_ids)
+    db.commit()
@@ -9,7 +9,8 @@ from app.db.session import get_db
 from app.models.user import User, UserRole
 from app.models.lead import Lead as LeadModel, LeadAssignment, LeadStatus
 from app.schemas.lead import Lead, LeadAssign
-from .helpers import get_lead_computed_fields
+from app.services.lead_rollups import lead_rollup_state, record_lead_change
+from .helpers import build_lead_response
 
 router = APIRouter()
 
@@ -67,6 +68,7 @@ async def assign_lead(
     )
 
     # Update lead
+    rollup_before = lead_rollup_state(lead)
     lead.assigned_to_id = assignment.assigned_to_id
     lead.assigned_at = datetime.utcnow()
 
@@ -75,15 +77,11 @@ async def assign_lead(
         lead.status = LeadStatus.contactado
 
     db.add(assignment_record)
+    record_lead_change(db, rollup_before, lead)
     db.commit()
     db.refresh(lead)
 
-    # Get computed fields
-    computed_fields = get_lead_computed_fields(lead, db)
-    lead_dict = lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(lead, db)
 
 
 @router.post("/{lead_id}/unassign", response_model=Lead)
@@ -108,6 +106,7 @@ async def unassign_lead(
         )
 
     # Remove assignment
+    rollup_before = lead_rollup_state(lead)
     lead.assigned_to_id = None
     lead.assigned_at = None
 
@@ -115,12 +114,8 @@ async def unassign_lead(
     if lead.status == LeadStatus.contactado and lead.assigned_to_id is not None:
         lead.status = LeadStatus.nuevo
 
+    record_lead_change(db, rollup_before, lead)
     db.commit()
     db.refresh(lead)
 
-    # Get computed fields
-    computed_fields = get_lead_computed_fields(lead, db)
-    lead_dict = lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(lead, db)
@@ -12,6 +12,7 @@ from app.db.session import get_db
 from app.models.user import User, UserRole
 from app.models.lead import Lead as LeadModel, LeadStatus
 from app.schemas.lead import LeadToPatientConversion, LeadConversionResponse
+from app.services.lead_rollups import lead_rollup_state, record_lead_change
 
 router = APIRouter()
 
@@ -105,6 +106,7 @@ async def convert_lead_to_patient(
             db.flush()  # Get the user ID
 
     # Update lead with conversion information
+    rollup_before = lead_rollup_state(lead)
     conversion_time = datetime.utcnow()
     lead.conversion_date = conversion_time
     lead.converted_by_id = current_user.id
@@ -114,6 +116,8 @@ async def convert_lead_to_patient(
     if patient_user:
         lead.patient_user_id = patient_user.id
 
+    record_lead_change(db, rollup_before, lead)
+
     # Save changes
     db.commit()
     db.refresh(lead)
@@ -4,6 +4,8 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.core.concurrency import run_blocking
+from app.core.pagination import count_rows, paginate_keyset
 from app.core.security import get_current_tenant_member
 from app.db.session import get_db
 from app.models.user import User, UserRole
@@ -16,7 +18,8 @@ from app.schemas.lead import (
     LeadFilters,
     LeadListResponse,
 )
-from .helpers import apply_lead_filters, get_lead_computed_fields
+from app.services.lead_rollups import lead_rollup_state, record_lead_change
+from .helpers import apply_lead_filters, build_lead_response, build_lead_responses
 
 router = APIRouter()
 
@@ -37,48 +40,60 @@ async def list_leads(
     - client (comercial): Only leads assigned to them
     - recepcionista: All leads in tenant
     """
-    # Base query with tenant filtering
-    query = db.query(LeadModel).filter(LeadModel.tenant_id == current_user.current_tenant_id)
-
-    # Role-based filtering
-    if current_user.role in [UserRole.medico, UserRole.closer]:
-        # médicos and comerciales only see their assigned leads
-        query = query.filter(LeadModel.assigned_to_id == current_user.id)
-
-    # Apply filters
-    query = apply_lead_filters(query, filters)
-
-    # Count total before pagination
-    total = query.count()
-
-    # Apply ordering
-    order_field = getattr(LeadModel, filters.order_by, LeadModel.created_at)
-    if filters.order_direction == "asc":
-        query = query.order_by(order_field.asc())
-    else:
-        query = query.order_by(order_field.desc())
-
-    # Apply pagination
-    offset = (filters.page - 1) * filters.page_size
-    leads = query.offset(offset).limit(filters.page_size).all()
-
-    # Build response with computed fields
-    lead_items = []
-    for lead in leads:
-        computed_fields = get_lead_computed_fields(lead, db)
-        lead_dict = lead.__dict__.copy()
-        lead_dict.update(computed_fields)
-        lead_items.append(Lead(**lead_dict))
-
-    total_pages = (total + filters.page_size - 1) // filters.page_size
+    def _load() -> LeadListResponse:
+        # Base query with tenant filtering
+        query = db.query(LeadModel).filter(LeadModel.tenant_id == current_user.current_tenant_id)
+
+        # Role-based filtering
+        if current_user.role in [UserRole.medico, UserRole.closer]:
+            # médicos and comerciales only see their assigned leads
+            query = query.filter(LeadModel.assigned_to_id == current_user.id)
+
+        # Apply filters
+        query = apply_lead_filters(query, filters)
+
+        # Count total before pagination (exact, planner estimate or none)
+        total = count_rows(query, filters.count_mode)
+
+        order_field = getattr(LeadModel, filters.order_by, LeadModel.created_at)
+        next_cursor = None
+        if filters.pagination == "cursor" or filters.cursor:
+            # Keyset pagination: cost does not grow with page depth
+            leads, next_cursor = paginate_keyset(
+                query,
+                order_field,
+                LeadModel.id,
+                cursor=filters.cursor,
+                limit=filters.page_size,
+                descending=filters.order_direction != "asc"
+            )
+        else:
+            # Apply ordering
+            if filters.order_direction == "asc":
+                query = query.order_by(order_field.asc())
+            else:
+                query = query.order_by(order_field.desc())
+
+            # Apply pagination
+            offset = (filters.page - 1) * filters.page_size
+            leads = query.offset(offset).limit(filters.page_size).all()
+
+        # Build response with computed fields (batched per page)
+        lead_items = build_lead_responses(leads, db)
+
+        total_pages = (total + filters.page_size - 1) // filters.page_size if total is not None else None
+
+        return LeadListResponse(
+            items=lead_items,
+            total=total,
+            page=filters.page,
+            page_size=filters.page_size,
+            total_pages=total_pages,
+            next_cursor=next_cursor
+        )
 
-    return LeadListResponse(
-        items=lead_items,
-        total=total,
-        page=filters.page,
-        page_size=filters.page_size,
-        total_pages=total_pages
-    )
+    # Query, count and computed fields run in the threadpool, off the event loop
+    return await run_blocking(_load)
 
 
 @router.post("/", response_model=Lead, status_code=status.HTTP_201_CREATED)
@@ -114,15 +129,12 @@ async def create_lead(
 
     db_lead = LeadModel(**lead_data)
     db.add(db_lead)
+    db.flush()
+    record_lead_change(db, None, db_lead)
     db.commit()
     db.refresh(db_lead)
 
-    # Get computed fields for response
-    computed_fields = get_lead_computed_fields(db_lead, db)
-    lead_dict = db_lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(db_lead, db)
 
 
 @router.get("/{lead_id}", response_model=Lead)
@@ -151,12 +163,7 @@ async def get_lead(
                 detail="No tienes acceso a este lead"
             )
 
-    # Get computed fields
-    computed_fields = get_lead_computed_fields(lead, db)
-    lead_dict = lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(lead, db)
 
 
 @router.put("/{lead_id}", response_model=Lead)
@@ -200,20 +207,17 @@ async def update_lead(
             )
 
     # Update lead
+    rollup_before = lead_rollup_state(lead)
     for field, value in update_data.items():
         if hasattr(lead, field):
             setattr(lead, field, value)
 
     lead.updated_at = datetime.utcnow()
+    record_lead_change(db, rollup_before, lead)
     db.commit()
     db.refresh(lead)
 
-    # Get computed fields
-    computed_fields = get_lead_computed_fields(lead, db)
-    lead_dict = lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(lead, db)
 
 
 @router.delete("/{lead_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -244,7 +248,9 @@ async def delete_lead(
         )
 
     # Soft delete - mark as inactive
+    rollup_before = lead_rollup_state(lead)
     lead.is_active = False
+    record_lead_change(db, rollup_before, lead)
     db.commit()
 
     return None
@@ -1,12 +1,24 @@
 """Lead helper functions for filtering and computed fields."""
 from datetime import datetime
+from typing import Dict, List
+from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
 
+from app.db.search import text_search_filter
 from app.models.user import User
 from app.models.lead import Lead as LeadModel, LeadStatus
 from app.models.service import Service
-from app.schemas.lead import LeadFilters
+from app.schemas.lead import Lead, LeadFilters
+
+
+LOST_STATUSES = [
+    LeadStatus.perdido,
+    LeadStatus.no_califica,
+    LeadStatus.no_contesta,
+    LeadStatus.no_show,
+    LeadStatus.rechazo_presupuesto,
+    LeadStatus.abandono,
+]
 
 
 def apply_lead_filters(query, filters: LeadFilters):
@@ -71,17 +83,10 @@ def apply_lead_filters(query, filters: LeadFilters):
         else:
             query = query.filter(LeadModel.conversion_date.is_(None))
 
-    # Text search
+    # Text search (trigram-indexed name/email text and normalized phone)
     if filters.search:
-        search_term = f"%{filters.search}%"
         query = query.filter(
-            or_(
-                LeadModel.first_name.ilike(search_term),
-                LeadModel.last_name.ilike(search_term),
-                LeadModel.email.ilike(search_term),
-                LeadModel.phone.ilike(search_term),
-                func.concat(LeadModel.first_name, ' ', LeadModel.last_name).ilike(search_term)
-            )
+            text_search_filter(LeadModel.search_text, LeadModel.phone_digits, filters.search)
         )
 
     # City filter
@@ -91,51 +96,76 @@ def apply_lead_filters(query, filters: LeadFilters):
     return query
 
 
-def get_lead_computed_fields(lead: LeadModel, db: Session) -> dict:
-    """Get computed fields for a lead"""
+def resolve_leads_computed_fields(leads: List[LeadModel], db: Session) -> Dict[UUID, dict]:
+    """
+    Get computed fields for a page of leads.
+
+    Service-interest names and assignee names are loaded with one IN-list
+    query each, instead of two lookups per lead.
+    """
     now = datetime.utcnow()
 
-    # Full name
-    full_name = f"{lead.first_name} {lead.last_name or ''}".strip()
-
-    # Status booleans
-    is_assigned = lead.assigned_to_id is not None
-    is_contacted = lead.first_contact_at is not None
-    is_converted = lead.conversion_date is not None
-    is_lost = lead.status in [LeadStatus.perdido, LeadStatus.no_califica, LeadStatus.no_contesta, LeadStatus.no_show, LeadStatus.rechazo_presupuesto, LeadStatus.abandono]
-
-    # Days calculations
-    days_since_created = (now - lead.created_at).days
-    days_since_last_contact = (
-        (now - lead.last_contact_at).days
-        if lead.last_contact_at else days_since_created
-    )
-
-    # Service interest info
-    service_interest_name = None
-    if lead.service_interest_id:
-        service = db.query(Service).filter(Service.id == lead.service_interest_id).first()
-        if service:
-            service_interest_name = service.name
-
-    # Assigned user info
-    assigned_to_name = None
-    assigned_to_email = None
-    if lead.assigned_to_id:
-        assigned_user = db.query(User).filter(User.id == lead.assigned_to_id).first()
+    service_ids = {lead.service_interest_id for lead in leads if lead.service_interest_id}
+    user_ids = {lead.assigned_to_id for lead in leads if lead.assigned_to_id}
+
+    service_names = {}
+    if service_ids:
+        service_names = dict(
+            db.query(Service.id, Service.name).filter(Service.id.in_(service_ids)).all()
+        )
+
+    assigned_users = {}
+    if user_ids:
+        assigned_users = {
+            user.id: user for user in db.query(
+                User.id, User.email, User.full_name, User.first_name, User.last_name
+            ).filter(User.id.in_(user_ids)).all()
+        }
+
+    computed = {}
+    for lead in leads:
+        # Days calculations
+        days_since_created = (now - lead.created_at).days
+        days_since_last_contact = (
+            (now - lead.last_contact_at).days
+            if lead.last_contact_at else days_since_created
+        )
+
+        # Assigned user info
+        assigned_to_name = None
+        assigned_to_email = None
+        assigned_user = assigned_users.get(lead.assigned_to_id)
         if assigned_user:
             assigned_to_name = assigned_user.full_name or f"{assigned_user.first_name} {assigned_user.last_name or ''}".strip()
             assigned_to_email = assigned_user.email
 
-    return {
-        'full_name': full_name,
-        'is_assigned': is_assigned,
-        'is_contacted': is_contacted,
-        'is_converted': is_converted,
-        'is_lost': is_lost,
-        'days_since_created': days_since_created,
-        'days_since_last_contact': days_since_last_contact,
-        'service_interest_name': service_interest_name,
-        'assigned_to_name': assigned_to_name,
-        'assigned_to_email': assigned_to_email
-    }
+        computed[lead.id] = {
+            'full_name': f"{lead.first_name} {lead.last_name or ''}".strip(),
+            'is_assigned': lead.assigned_to_id is not None,
+            'is_contacted': lead.first_contact_at is not None,
+            'is_converted': lead.conversion_date is not None,
+            'is_lost': lead.status in LOST_STATUSES,
+            'days_since_created': days_since_created,
+            'days_since_last_contact': days_since_last_contact,
+            'service_interest_name': service_names.get(lead.service_interest_id),
+            'assigned_to_name': assigned_to_name,
+            'assigned_to_email': assigned_to_email
+        }
+
+    return computed
+
+
+def build_lead_responses(leads: List[LeadModel], db: Session) -> List[Lead]:
+    """Build Lead responses with computed fields for a list of leads"""
+    computed = resolve_leads_computed_fields(leads, db)
+    items = []
+    for lead in leads:
+        lead_dict = lead.__dict__.copy()
+        lead_dict.update(computed[lead.id])
+        items.append(Lead(**lead_dict))
+    return items
+
+
+def build_lead_response(lead: LeadModel, db: Session) -> Lead:
+    """Build a Lead response with computed fields"""
+    return build_lead_responses([lead], db)[0]
@@ -13,6 +13,7 @@ from app.schemas.lead import (
     LeadInteraction as LeadInteractionSchema,
     LeadInteractionCreate,
 )
+from app.services.lead_rollups import lead_rollup_state, record_lead_change
 
 router = APIRouter()
 
@@ -102,6 +103,7 @@ async def create_lead_interaction(
     db.add(db_interaction)
 
     # Update lead's contact timestamps
+    rollup_before = lead_rollup_state(lead)
     now = datetime.utcnow()
     if not lead.first_contact_at:
         lead.first_contact_at = now
@@ -111,6 +113,7 @@ async def create_lead_interaction(
     if lead.status == LeadStatus.nuevo:
         lead.status = LeadStatus.contactado
 
+    record_lead_change(db, rollup_before, lead)
     db.commit()
     db.refresh(db_interaction)
 
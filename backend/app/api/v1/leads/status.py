@@ -9,7 +9,8 @@ from app.db.session import get_db
 from app.models.user import User, UserRole
 from app.models.lead import Lead as LeadModel, LeadStatus
 from app.schemas.lead import Lead, LeadStatusUpdate
-from .helpers import get_lead_computed_fields
+from app.services.lead_rollups import lead_rollup_state, record_lead_change
+from .helpers import build_lead_response
 
 router = APIRouter()
 
@@ -42,6 +43,7 @@ async def update_lead_status(
             )
 
     # Update status
+    rollup_before = lead_rollup_state(lead)
     old_status = lead.status
     lead.status = status_update.status
 
@@ -59,12 +61,8 @@ async def update_lead_status(
     else:
         lead.internal_notes = f"[{datetime.utcnow().strftime('%Y-%m-%d %H:%M')}] {status_note}"
 
+    record_lead_change(db, rollup_before, lead)
     db.commit()
     db.refresh(lead)
 
-    # Get computed fields
-    computed_fields = get_lead_computed_fields(lead, db)
-    lead_dict = lead.__dict__.copy()
-    lead_dict.update(computed_fields)
-
-    return Lead(**lead_dict)
+    return build_lead_response(lead, db)
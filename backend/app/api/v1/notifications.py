@@ -7,33 +7,60 @@ Las notificaciones informan a los usuarios sobre eventos importantes en el siste
 Endpoints disponibles:
 - GET /api/v1/notifications - Lista las notificaciones del usuario actual con paginación
 - GET /api/v1/notifications/count - Obtiene el contador de notificaciones no leídas (para el badge)
+- GET /api/v1/notifications/stream - Eventos en tiempo real (SSE): nuevas notificaciones y contador
 - PATCH /api/v1/notifications/{notification_id}/read - Marca una notificación como leída
 - POST /api/v1/notifications/mark-all-read - Marca todas las notificaciones como leídas
+- GET /api/v1/notifications/broadcasts - Avisos del tenant actual (con confirmación de lectura)
+- POST /api/v1/notifications/broadcasts - Publica un aviso para todo el tenant (admin del tenant)
+- PATCH /api/v1/notifications/broadcasts/{broadcast_id}/read - Marca un aviso como leído
 
 Todos los endpoints requieren autenticación y solo permiten acceso a las notificaciones
 del usuario autenticado (aislamiento de datos).
 """
 
-from typing import List
+import asyncio
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_current_active_user
-from app.db.session import get_db
+from app.core.pagination import (
+    COUNT_MODE_PATTERN,
+    PAGINATION_MODE_PATTERN,
+    count_rows,
+    paginate_keyset
+)
+from app.core.config import settings
+from app.core.security import (
+    get_current_active_user,
+    get_current_tenant_admin,
+    get_current_user_for_stream
+)
+from app.db.session import get_async_db, get_db
 from app.models.user import User
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationBroadcast
 from app.schemas.notification import (
     Notification as NotificationSchema,
+    NotificationBroadcast as NotificationBroadcastSchema,
+    NotificationBroadcastCreate,
+    NotificationBroadcastList,
     NotificationCount,
     NotificationList,
     NotificationUpdate
 )
 from app.core.notifications import (
+    create_tenant_broadcast,
+    get_tenant_broadcasts,
+    mark_broadcast_as_read,
     mark_notification_as_read,
     mark_all_as_read,
-    get_unread_count
+    get_unread_count,
+    get_unread_count_async,
+    publish_unread_count
 )
+from app.services.notification_stream import format_sse, notification_broker
 
 router = APIRouter()
 
@@ -43,7 +70,10 @@ async def get_notifications(
     skip: int = 0,
     limit: int = 20,
     unread_only: bool = False,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    pagination: str = Query("offset", pattern=PAGINATION_MODE_PATTERN),
+    count_mode: str = Query("exact", pattern=COUNT_MODE_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -56,7 +86,10 @@ async def get_notifications(
         skip: Número de notificaciones a omitir (para paginación). Default: 0
         limit: Número máximo de notificaciones a retornar. Default: 20, Max: 100
         unread_only: Si es True, solo retorna notificaciones no leídas. Default: False
-        db: Sesión de base de datos (inyectada)
+        cursor: next_cursor de la respuesta anterior (paginación por cursor)
+        pagination: "offset" (skip/limit) o "cursor". Default: "offset"
+        count_mode: "exact", "estimated" (estimación del planificador) o "none"
+        db: Sesión async de base de datos (inyectada)
         current_user: Usuario autenticado (inyectado)
 
     Returns:
@@ -78,6 +111,10 @@ async def get_notifications(
 
         // Paginación
         const page2 = await fetch('/api/v1/notifications?skip=20&limit=20');
+
+        // Scroll infinito: paginación por cursor, sin COUNT(*)
+        const first = await (await fetch('/api/v1/notifications?pagination=cursor&count_mode=none')).json();
+        const next = await fetch(`/api/v1/notifications?cursor=${first.next_cursor}`);
         ```
 
     Notas:
@@ -89,36 +126,51 @@ async def get_notifications(
     if limit > 100:
         limit = 100
 
-    # Query base: notificaciones del usuario actual
-    query = db.query(Notification).filter(
-        Notification.user_id == current_user.id
-    )
+    user_id = current_user.id
+    tenant_id = current_user.current_tenant_id
 
-    # Filtrar solo no leídas si se solicita
-    if unread_only:
-        query = query.filter(Notification.is_read == False)
-
-    # Obtener el total antes de aplicar paginación
-    total = query.count()
-
-    # Aplicar paginación y orden
-    notifications = query.order_by(
-        Notification.created_at.desc()
-    ).offset(skip).limit(limit).all()
+    def _load(sync_db: Session) -> NotificationList:
+        # Query base: notificaciones del usuario actual
+        query = sync_db.query(Notification).filter(
+            Notification.user_id == user_id
+        )
 
-    # Obtener contador de no leídas
-    unread_count = get_unread_count(db, current_user.id)
+        # Filtrar solo no leídas si se solicita
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+
+        # Obtener el total antes de aplicar paginación
+        total = count_rows(query, count_mode)
+
+        # Aplicar paginación y orden
+        next_cursor = None
+        if pagination == "cursor" or cursor:
+            notifications, next_cursor = paginate_keyset(
+                query, Notification.created_at, Notification.id, cursor=cursor, limit=limit
+            )
+        else:
+            notifications = query.order_by(
+                Notification.created_at.desc()
+            ).offset(skip).limit(limit).all()
+
+        # Obtener contador de no leídas
+        unread_count = get_unread_count(sync_db, user_id, tenant_id)
+
+        return NotificationList(
+            notifications=notifications,
+            total=total,
+            unread_count=unread_count,
+            next_cursor=next_cursor
+        )
 
-    return NotificationList(
-        notifications=notifications,
-        total=total,
-        unread_count=unread_count
-    )
+    # La paginación comparte helpers síncronos; run_sync los ejecuta sobre la
+    # conexión async sin bloquear el event loop
+    return await db.run_sync(_load)
 
 
 @router.get("/count", response_model=NotificationCount)
 async def get_notification_count(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -128,7 +180,7 @@ async def get_notification_count(
     Es ligero y rápido, ideal para polling frecuente.
 
     Args:
-        db: Sesión de base de datos (inyectada)
+        db: Sesión async de base de datos (inyectada)
         current_user: Usuario autenticado (inyectado)
 
     Returns:
@@ -139,24 +191,209 @@ async def get_notification_count(
 
     Ejemplo de uso desde frontend:
         ```javascript
-        // Polling cada 30 segundos para actualizar el badge
-        setInterval(async () => {
-            const response = await fetch('/api/v1/notifications/count');
-            const { unread_count } = await response.json();
-            updateBadge(unread_count); // Actualizar el UI
-        }, 30000);
+        // Carga inicial del badge; las actualizaciones llegan por /notifications/stream
+        const response = await fetch('/api/v1/notifications/count');
+        const { unread_count } = await response.json();
+        updateBadge(unread_count);
         ```
 
     Notas:
-        - Este endpoint es muy rápido gracias al índice en is_read
-        - Ideal para actualizar el badge en tiempo real mediante polling
+        - Lee el contador de notification_counters por clave primaria (no cuenta
+          filas) y le suma los avisos sin leer del tenant actual
+        - Para mantener el badge actualizado usar GET /notifications/stream en
+          lugar de polling
         - Solo cuenta las notificaciones del usuario autenticado
     """
-    unread_count = get_unread_count(db, current_user.id)
+    unread_count = await get_unread_count_async(db, current_user.id, current_user.current_tenant_id)
 
     return NotificationCount(unread_count=unread_count)
 
 
+@router.get("/stream")
+async def stream_notifications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """
+    Canal de eventos en tiempo real (Server-Sent Events) del usuario actual.
+
+    Sustituye al polling de /notifications/count: el servidor envía un evento
+    cuando se crea una notificación para el usuario o cambia su contador de no
+    leídas, también si el cambio ocurre en otro worker (PostgreSQL
+    LISTEN/NOTIFY, ver app.services.notification_stream).
+
+    Eventos:
+        - unread_count: {"unread_count": 5} (al conectar y tras marcar/eliminar)
+        - notification: {"notification": {...}, "unread_count": 6}
+        - Comentario ": keepalive" cada NOTIFICATION_STREAM_KEEPALIVE_SECONDS
+
+    Autenticación: cabecera Authorization o, para EventSource (que no admite
+    cabeceras), el parámetro ?access_token=<jwt>.
+
+    Ejemplo de uso desde frontend:
+        ```javascript
+        const source = new EventSource(`/api/v1/notifications/stream?access_token=${token}`);
+        source.addEventListener('unread_count', (e) => {
+            updateBadge(JSON.parse(e.data).unread_count);
+        });
+        source.addEventListener('notification', (e) => {
+            const { notification, unread_count } = JSON.parse(e.data);
+            showToast(notification.title);
+            updateBadge(unread_count);
+        });
+        // EventSource se reconecta solo si se corta la conexión
+        ```
+
+    Notas:
+        - La conexión no mantiene abierta ninguna sesión de base de datos
+        - Un cliente que no consume eventos a tiempo pierde los más antiguos;
+          el siguiente evento trae el contador correcto
+    """
+    user_id = current_user.id
+    # Suscribirse antes de leer el contador para no perder eventos intermedios
+    queue = notification_broker.subscribe(user_id)
+    try:
+        unread_count = await get_unread_count_async(db, user_id, current_user.current_tenant_id)
+    except Exception:
+        notification_broker.unsubscribe(user_id, queue)
+        raise
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield format_sse("unread_count", {"unread_count": unread_count})
+            while True:
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), timeout=settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                data = {key: value for key, value in payload.items() if key not in ("event", "user_id")}
+                yield format_sse(payload["event"], data)
+        finally:
+            notification_broker.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _broadcast_response(broadcast: NotificationBroadcast, read_at) -> NotificationBroadcastSchema:
+    response = NotificationBroadcastSchema.model_validate(broadcast)
+    response.is_read = read_at is not None
+    response.read_at = read_at
+    return response
+
+
+@router.get("/broadcasts", response_model=NotificationBroadcastList)
+async def get_broadcasts(
+    skip: int = 0,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtiene los avisos del tenant actual visibles para el usuario.
+
+    Los avisos (anuncios a todo el tenant) se guardan una sola vez y se
+    muestran a los miembros que ya pertenecían al tenant al publicarse.
+    Cuentan en unread_count mientras el usuario no los marque como leídos.
+
+    Args:
+        skip: Número de avisos a omitir. Default: 0
+        limit: Número máximo de avisos a retornar. Default: 20, Max: 100
+        db: Sesión de base de datos (inyectada)
+        current_user: Usuario autenticado (inyectado)
+
+    Returns:
+        NotificationBroadcastList: Avisos (más recientes primero) y total
+    """
+    limit = min(limit, 100)
+    query = get_tenant_broadcasts(db, current_user.id, current_user.current_tenant_id)
+    if query is None:
+        return NotificationBroadcastList(broadcasts=[], total=0)
+
+    total = query.count()
+    rows = query.order_by(
+        NotificationBroadcast.created_at.desc(),
+        NotificationBroadcast.id.desc()
+    ).offset(skip).limit(limit).all()
+
+    return NotificationBroadcastList(
+        broadcasts=[_broadcast_response(broadcast, read_at) for broadcast, read_at in rows],
+        total=total
+    )
+
+
+@router.post("/broadcasts", response_model=NotificationBroadcastSchema, status_code=status.HTTP_201_CREATED)
+async def create_broadcast(
+    broadcast_in: NotificationBroadcastCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_tenant_admin)
+):
+    """
+    Publica un aviso para todos los usuarios activos del tenant actual.
+
+    Guarda un único registro en lugar de una notificación por usuario; cada
+    miembro lo recibe como no leído (contador y /notifications/stream).
+
+    Args:
+        broadcast_in: Tipo, título, mensaje y URL opcional del aviso
+        db: Sesión de base de datos (inyectada)
+        current_user: Admin del tenant (inyectado)
+
+    Raises:
+        400: Si no hay un tenant seleccionado (superadmin sin contexto de tenant)
+    """
+    if current_user.current_tenant_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Selecciona un tenant para publicar el aviso"
+        )
+
+    broadcast = await create_tenant_broadcast(
+        db=db,
+        tenant_id=current_user.current_tenant_id,
+        type=broadcast_in.type,
+        title=broadcast_in.title,
+        message=broadcast_in.message,
+        action_url=broadcast_in.action_url,
+        created_by_id=current_user.id
+    )
+    return _broadcast_response(broadcast, None)
+
+
+@router.patch("/broadcasts/{broadcast_id}/read", response_model=NotificationBroadcastSchema)
+async def mark_broadcast_read(
+    broadcast_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Marca un aviso del tenant como leído por el usuario actual.
+
+    Raises:
+        404: Si el aviso no existe o no es visible para el usuario
+    """
+    query = get_tenant_broadcasts(db, current_user.id, current_user.current_tenant_id)
+    row = query.filter(NotificationBroadcast.id == broadcast_id).first() if query is not None else None
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aviso no encontrado"
+        )
+
+    broadcast, read_at = row
+    if read_at is None:
+        mark_broadcast_as_read(db, broadcast, current_user.id)
+        broadcast, read_at = query.filter(NotificationBroadcast.id == broadcast_id).first()
+    return _broadcast_response(broadcast, read_at)
+
+
 @router.patch("/{notification_id}/read", response_model=NotificationSchema)
 async def mark_as_read(
     notification_id: UUID,
@@ -261,12 +498,13 @@ async def mark_all_notifications_read(
         ```
 
     Notas:
-        - Solo afecta las notificaciones del usuario autenticado
+        - Solo afecta las notificaciones del usuario autenticado y los avisos
+          de su tenant actual
         - Es una operación atómica (todas se marcan en una sola transacción)
         - Si no hay notificaciones no leídas, retorna count=0
     """
     # Marcar todas como leídas usando la función helper
-    count = mark_all_as_read(db, current_user.id)
+    count = mark_all_as_read(db, current_user.id, current_user.current_tenant_id)
 
     return {
         "message": f"{count} notificaciones marcadas como leídas",
@@ -316,9 +554,10 @@ async def delete_notification(
         - Si intentas eliminar una notificación de otro usuario, retorna 404
     """
     # Buscar la notificación
+    # (bloqueada: un mark-read simultáneo no puede cambiar is_read antes del borrado)
     notification = db.query(Notification).filter(
         Notification.id == notification_id
-    ).first()
+    ).with_for_update().first()
 
     # Validar que existe
     if not notification:
@@ -334,8 +573,11 @@ async def delete_notification(
             detail="Notificación no encontrada"
         )
 
-    # Eliminar la notificación
+    # Eliminar la notificación (el flush descuenta el contador si no estaba leída)
+    was_unread = not notification.is_read
     db.delete(notification)
+    if was_unread:
+        publish_unread_count(db, current_user.id, current_user.current_tenant_id)
     db.commit()
 
     return {
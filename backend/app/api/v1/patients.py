@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
 from typing import List, Optional
 from uuid import UUID
 
+from app.db.search import text_search_filter
 from app.db.session import get_db
 from app.core.security import (
     get_current_tenant_member, 
@@ -43,15 +43,7 @@ async def get_patients(
     
     # Apply search if provided
     if search:
-        search_term = f"%{search.lower()}%"
-        query = query.filter(
-            or_(
-                func.lower(User.first_name).like(search_term),
-                func.lower(User.last_name).like(search_term),
-                func.lower(User.full_name).like(search_term),
-                func.lower(User.email).like(search_term)
-            )
-        )
+        query = query.filter(text_search_filter(User.search_text, term=search))
     
     # Pagination
     offset = (page - 1) * page_size
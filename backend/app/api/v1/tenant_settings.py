@@ -4,11 +4,8 @@ Solo accesible por tenant_admin de su propio tenant.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from cryptography.fernet import Fernet
-import base64
-import hashlib
 
-from app.core.config import settings
+from app.core.mail_config import decrypt_password, encrypt_password
 from app.core.security import get_current_tenant_admin
 from app.db.session import get_db
 from app.models.tenant import Tenant
@@ -22,24 +19,6 @@ from app.schemas.tenant import (
 router = APIRouter()
 
 
-def get_encryption_key() -> bytes:
-    """Genera una clave de encriptación basada en SECRET_KEY."""
-    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-    return base64.urlsafe_b64encode(key)
-
-
-def encrypt_password(password: str) -> str:
-    """Encripta una contraseña usando Fernet."""
-    fernet = Fernet(get_encryption_key())
-    return fernet.encrypt(password.encode()).decode()
-
-
-def decrypt_password(encrypted_password: str) -> str:
-    """Desencripta una contraseña usando Fernet."""
-    fernet = Fernet(get_encryption_key())
-    return fernet.decrypt(encrypted_password.encode()).decode()
-
-
 @router.get("/my-tenant/settings", response_model=TenantSettingsResponse)
 async def get_tenant_settings(
     db: Session = Depends(get_db),
@@ -3,7 +3,7 @@ from typing import List, Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from app.core.security import (
     get_password_hash,
@@ -25,6 +25,7 @@ from app.schemas.tenant import (
 )
 from app.core.email import send_welcome_email, send_tenant_assignment_email
 from app.api.v1.audit_logs import create_audit_log, get_client_ip
+from app.services.lead_rollups import unassign_lead_rollups
 
 router = APIRouter()
 
@@ -357,6 +358,7 @@ async def delete_tenant(
     tenant_name = tenant.name
     tenant_slug = tenant.slug
 
+    unassign_lead_rollups(db, select(User.id).where(User.tenant_id == tenant_id))
     db.query(User).filter(User.tenant_id == tenant_id).delete()
     db.delete(tenant)
     db.commit()
@@ -371,7 +373,8 @@ async def delete_tenant(
         entity_id=str(tenant_id),
         ip_address=get_client_ip(request),
         user_agent=request.headers.get("User-Agent", "")[:500],
-        details={"tenant_name": tenant_name, "tenant_slug": tenant_slug}
+        details={"tenant_name": tenant_name, "tenant_slug": tenant_slug},
+        sync=True  # the tenant is gone: persist the trail before responding
     )
 
     return None
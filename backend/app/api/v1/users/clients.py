@@ -13,6 +13,7 @@ from app.db.session import get_db
 from app.models.user import User, UserRole
 from app.schemas.user import UserUpdate, User as UserSchema, ClientCreate
 from app.core.email import send_welcome_email
+from app.services.lead_rollups import unassign_lead_rollups
 
 router = APIRouter()
 
@@ -243,6 +244,7 @@ async def delete_tenant_client(
             detail="No tienes acceso a este cliente"
         )
 
+    unassign_lead_rollups(db, [client.id])
     db.delete(client)
     db.commit()
 
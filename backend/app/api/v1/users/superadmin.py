@@ -20,6 +20,7 @@ from app.models.notification import NotificationType
 from app.schemas.user import UserCreate, UserUpdate, User as UserSchema, UserInvite, UserWithMemberships, UserMembershipInfo, AssignUserToTenant
 from app.core.email import send_welcome_email, send_invitation_email, send_tenant_assignment_email
 from app.core.notifications import create_notification
+from app.services.lead_rollups import unassign_lead_rollups
 
 router = APIRouter()
 
@@ -441,6 +442,7 @@ async def delete_user(
                 detail="No puedes eliminar a otros administradores"
             )
 
+    unassign_lead_rollups(db, [user.id])
     db.delete(user)
     db.commit()
 
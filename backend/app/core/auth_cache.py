@@ -0,0 +1,203 @@
+"""
+Caché en proceso de la autenticación.
+
+`get_current_user` necesita en cada request el usuario del token (`sub`) y,
+para tokens multi-tenant, la membresía (`membership_id`) que fija el tenant
+y el rol de la sesión. Ambas resoluciones se guardan aquí en una caché
+LRU con TTL, de modo que una request autenticada no hace ninguna consulta
+mientras la entrada siga viva.
+
+Los usuarios se guardan como instancias desacopladas (detached) y se
+incorporan a la sesión de cada request con `Session.merge(load=False)`, sin
+SQL; las relaciones perezosas y los commits siguen funcionando igual.
+
+Invalidación: cualquier flush que inserte, modifique o borre un User o una
+TenantMembership expulsa sus entradas, y los UPDATE/DELETE masivos sobre
+esas tablas vacían la caché correspondiente. Cada worker tiene su propia
+caché, así que el TTL acota cuánto tarda un cambio en verse en los demás
+procesos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.tenant_membership import TenantMembership
+from app.models.user import User, UserRole
+
+
+class TTLCache:
+    """LRU acotada con caducidad por entrada, segura entre hilos."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass(frozen=True)
+class MembershipContext:
+    """Contexto de sesión resuelto desde una TenantMembership."""
+    user_id: UUID
+    tenant_id: UUID
+    role: UserRole
+    is_active: bool
+
+
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+membership_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def _detached_copy(user: User) -> User:
+    """Copia desacoplada con las columnas ya cargadas del usuario."""
+    loaded = inspect(user).dict
+    copy = User(**{
+        attr.key: loaded[attr.key]
+        for attr in inspect(User).column_attrs
+        if attr.key in loaded
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[User]:
+    """Usuario por email, servido desde la caché cuando es posible."""
+    cached = user_cache.get(email)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        user_cache.set(email, _detached_copy(user))
+    return user
+
+
+def get_membership_context(db: Session, membership_id: UUID) -> Optional[MembershipContext]:
+    """Tenant y rol de una membresía, servidos desde la caché cuando es posible."""
+    cached = membership_cache.get(membership_id)
+    if cached is not None:
+        return cached
+
+    membership = db.query(
+        TenantMembership.user_id,
+        TenantMembership.tenant_id,
+        TenantMembership.role,
+        TenantMembership.is_active
+    ).filter(TenantMembership.id == membership_id).first()
+    if membership is None:
+        return None
+
+    context = MembershipContext(*membership)
+    membership_cache.set(membership_id, context)
+    return context
+
+
+def invalidate_user(email: Optional[str] = None):
+    """Expulsa un usuario de la caché (o todos si no se indica email)."""
+    if email is None:
+        user_cache.clear()
+    else:
+        user_cache.pop(email)
+
+
+def invalidate_membership(membership_id: Optional[UUID] = None):
+    """Expulsa una membresía de la caché (o todas si no se indica id)."""
+    if membership_id is None:
+        membership_cache.clear()
+    else:
+        membership_cache.pop(membership_id)
+
+
+def clear_auth_cache():
+    user_cache.clear()
+    membership_cache.clear()
+
+
+def _cache_keys(instance) -> tuple:
+    """(emails, membership_id) afectados por un cambio en User o TenantMembership."""
+    if isinstance(instance, User):
+        # Si cambió el email hay que expulsar también la clave anterior
+        history = inspect(instance).attrs.email.history
+        return tuple(email for email in (*history.deleted, *history.unchanged, *history.added) if email), None
+    return (), instance.id
+
+
+def _invalidate_keys(user_emails: tuple, membership_id: Optional[UUID]):
+    for email in user_emails:
+        invalidate_user(email)
+    if membership_id is not None:
+        invalidate_membership(membership_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (User, TenantMembership)):
+            keys = _cache_keys(instance)
+            _invalidate_keys(*keys)
+            session.info.setdefault("auth_cache_keys", []).append(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # Una request concurrente pudo recargar el valor antiguo entre el flush y el commit
+    for keys in session.info.pop("auth_cache_keys", []):
+        _invalidate_keys(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_keys(session):
+    session.info.pop("auth_cache_keys", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    if mapper.class_ is User:
+        invalidate_user()
+    elif mapper.class_ is TenantMembership:
+        invalidate_membership()
@@ -0,0 +1,61 @@
+"""
+Ejecución de trabajo bloqueante fuera del event loop.
+
+Casi todas las rutas son `async def`, pero buena parte del trabajo que
+hacen es síncrono: consultas con la Session de SQLAlchemy (psycopg2).
+Ejecutado directamente, ese trabajo congela el event loop del worker y
+todas las requests en vuelo esperan a que termine. Las rutas que no
+esperan nada, como el login con su bcrypt, se declaran `def` y FastAPI ya
+las ejecuta en el threadpool.
+
+`run_blocking` lo manda al threadpool de anyio (el mismo que usa FastAPI
+para las rutas y dependencias `def`), cuyo tamaño se fija con
+THREADPOOL_WORKERS al arrancar la aplicación:
+
+    @router.get("/")
+    async def list_things(db: Session = Depends(get_db)):
+        def _load():
+            return db.query(Thing).all()
+
+        return await run_blocking(_load)
+
+Cada hilo del pool puede tener una conexión de base de datos abierta, así
+que DB_POOL_SIZE + DB_MAX_OVERFLOW debería ser >= THREADPOOL_WORKERS.
+"""
+
+import functools
+from typing import Any, Callable, TypeVar
+
+from anyio import to_thread
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+def configure_threadpool():
+    """Ajusta el limitador por defecto de anyio a THREADPOOL_WORKERS (llamar dentro del loop)."""
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_WORKERS
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta fn(*args, **kwargs) en el threadpool y espera su resultado.
+
+    Las excepciones (incluidas HTTPException) se propagan al llamador. Con
+    THREADPOOL_OFFLOAD=false se ejecuta en línea, como antes de este cambio
+    (útil para depurar y para comparar en benchmarks/load_test.py).
+    """
+    call = functools.partial(fn, *args, **kwargs)
+    if not settings.THREADPOOL_OFFLOAD:
+        return call()
+    return await to_thread.run_sync(call)
+
+
+def offload(fn: Callable[..., T]) -> Callable[..., Any]:
+    """Decorador: convierte una función síncrona en una corrutina que usa run_blocking."""
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_blocking(fn, *args, **kwargs)
+
+    return wrapper
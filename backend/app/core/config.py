@@ -11,6 +11,18 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "postgresql://scraper_user:scraper_password@db:5432/scraper_db"
+    # Async engine (asyncpg); por defecto se deriva de DATABASE_URL
+    ASYNC_DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos; evita conexiones cortadas por proxies/PgBouncer
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 desactiva el límite; los scripts usan maintenance_session() sin él
+    DB_ECHO: bool = False  # log de SQL (antes ligado a DEBUG)
+
+    # Threadpool para trabajo bloqueante (ORM síncrono, bcrypt); ver app.core.concurrency
+    THREADPOOL_WORKERS: int = 40
+    THREADPOOL_OFFLOAD: bool = True
 
     # Environment
     ENVIRONMENT: str = "development"
@@ -40,6 +52,30 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days (10080 minutes)
     PASSWORD_RESET_TOKEN_EXPIRE_HOURS: int = 24
 
+    # Auth cache (usuario y membresía resueltos por token, ver app.core.auth_cache)
+    AUTH_CACHE_TTL_SECONDS: float = 30
+    AUTH_CACHE_MAX_SIZE: int = 4096
+
+    # Notificaciones en tiempo real (SSE + LISTEN/NOTIFY, ver app.services.notification_stream)
+    NOTIFICATION_STREAM_KEEPALIVE_SECONDS: float = 15
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100
+    NOTIFICATION_LISTEN_RETRY_SECONDS: float = 5
+    NOTIFICATION_LISTEN_ENABLED: bool = True  # LISTEN en PostgreSQL (false solo para tests)
+    # Compactación de notifications (ver app.services.notification_retention)
+    NOTIFICATION_ARCHIVE_AFTER_DAYS: int = 90  # Leídas más antiguas pasan a notifications_archive
+    NOTIFICATION_RETENTION_DAYS: int = 365  # Más antiguas se eliminan (también las no leídas)
+    NOTIFICATION_COMPACTION_BATCH_SIZE: int = 1000
+
+    # Audit log writer (cola en memoria con volcado por lotes, ver app.services.audit_writer)
+    AUDIT_ASYNC_WRITES: bool = True
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    # Particiones mensuales de audit_logs (ver app.services.audit_partitions)
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3
+    AUDIT_RETENTION_MONTHS: int = 12
+    AUDIT_ARCHIVE_DIR: str = "archive/audit_logs"
+
     # Email/SMTP Configuration
     MAIL_USERNAME: str = ""
     MAIL_PASSWORD: str = ""
@@ -51,6 +87,24 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    # Outbox de emails (tabla email_outbox + email_worker.py, ver app.services.email_outbox y email_worker)
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_WORKER_POLL_SECONDS: float = 2.0
+    EMAIL_WORKER_BATCH_SIZE: int = 100
+    EMAIL_MAX_ATTEMPTS: int = 6
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0
+    EMAIL_RETRY_MAX_SECONDS: float = 3600.0
+    EMAIL_SENDING_TIMEOUT_SECONDS: int = 300
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 30.0
+    EMAIL_SMTP_IDLE_SECONDS: float = 60.0
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 30
+    # SMTP descifrado por tenant (ver app.core.mail_config)
+    MAIL_CONFIG_CACHE_TTL_SECONDS: float = 300
+    MAIL_CONFIG_CACHE_MAX_SIZE: int = 1024
+    # Plantillas de email compiladas (ver app.core.template_cache)
+    EMAIL_TEMPLATE_CACHE_SIZE: int = 256
+    EMAIL_TEMPLATE_CACHE_TTL_SECONDS: float = 60
+    EMAIL_TEMPLATE_BYTECODE_DIR: str = ""  # Vacío = directorio temporal del sistema
 
     class Config:
         env_file = ".env"
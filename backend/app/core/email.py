@@ -1,15 +1,16 @@
+from functools import lru_cache
 from typing import Optional
 from uuid import UUID
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from fastapi_mail import FastMail, ConnectionConfig
 from pydantic import EmailStr
-from jinja2 import Template
 from sqlalchemy.orm import Session
-from cryptography.fernet import Fernet
-import base64
-import hashlib
 
+from app.core.concurrency import run_blocking
 from app.core.config import settings
+from app.core.mail_config import SmtpSettings, decrypt_password, get_encryption_key, get_tenant_smtp_settings
+from app.core.template_cache import CachedEmailTemplate, get_active_template, render_default, render_template
 from app.models.email_template import EmailTemplate, EmailTemplateType
+from app.services.email_outbox import enqueue_email, send_email_now
 
 
 # Configure default FastMail (global configuration)
@@ -34,54 +35,46 @@ fm = default_fm
 
 
 def _get_encryption_key() -> bytes:
-    """Genera una clave de encriptación basada en SECRET_KEY."""
-    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-    return base64.urlsafe_b64encode(key)
+    """Genera una clave de encriptación basada en SECRET_KEY (cacheada)."""
+    return get_encryption_key()
 
 
 def _decrypt_password(encrypted_password: str) -> str:
     """Desencripta una contraseña usando Fernet."""
-    fernet = Fernet(_get_encryption_key())
-    return fernet.decrypt(encrypted_password.encode()).decode()
+    return decrypt_password(encrypted_password)
+
+
+@lru_cache(maxsize=256)
+def _fastmail_for(smtp: SmtpSettings) -> FastMail:
+    # Una instancia por configuración: si el tenant cambia su SMTP, cambia la clave
+    return FastMail(ConnectionConfig(
+        MAIL_USERNAME=smtp.username,
+        MAIL_PASSWORD=smtp.password,
+        MAIL_FROM=smtp.from_email,
+        MAIL_PORT=smtp.port,
+        MAIL_SERVER=smtp.host,
+        MAIL_STARTTLS=smtp.use_tls,
+        MAIL_SSL_TLS=smtp.use_ssl,
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=smtp.validate_certs,
+        MAIL_FROM_NAME=smtp.from_name,
+    ))
 
 
 def get_tenant_fastmail(db: Session, tenant_id: UUID) -> Optional[FastMail]:
     """
     Obtiene una instancia de FastMail configurada para el tenant.
     Retorna None si el tenant no tiene SMTP configurado o habilitado.
+    La configuración sale de la caché de app.core.mail_config.
     """
-    from app.models.tenant import Tenant
-
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
-    if not tenant:
-        return None
-
-    # Verificar si SMTP está habilitado y configurado
-    if not tenant.smtp_enabled:
-        return None
-
-    if not tenant.smtp_host or not tenant.smtp_username or not tenant.smtp_password_encrypted:
+    smtp = get_tenant_smtp_settings(db, tenant_id)
+    if smtp is None:
         return None
 
     try:
-        smtp_password = _decrypt_password(tenant.smtp_password_encrypted)
-
-        tenant_conf = ConnectionConfig(
-            MAIL_USERNAME=tenant.smtp_username,
-            MAIL_PASSWORD=smtp_password,
-            MAIL_FROM=tenant.smtp_from_email or tenant.smtp_username,
-            MAIL_PORT=tenant.smtp_port or 587,
-            MAIL_SERVER=tenant.smtp_host,
-            MAIL_STARTTLS=tenant.smtp_use_tls,
-            MAIL_SSL_TLS=tenant.smtp_use_ssl,
-            USE_CREDENTIALS=True,
-            VALIDATE_CERTS=True,
-            MAIL_FROM_NAME=tenant.smtp_from_name or tenant.name,
-        )
-
-        return FastMail(tenant_conf)
+        return _fastmail_for(smtp)
     except Exception:
-        # Si hay error desencriptando o configurando, usar default
+        # Si hay error configurando, usar default
         return None
 
 
@@ -108,80 +101,68 @@ async def send_email(
     tenant_id: UUID = None
 ):
     """
-    Send an email using FastMail.
-    If tenant_id is provided and the tenant has SMTP configured, uses tenant's SMTP.
-    Otherwise, uses global SMTP configuration.
+    Queue an email in the outbox (email_outbox table).
+    The email worker (email_worker.py) delivers it in the background, using the
+    tenant's SMTP if tenant_id is provided and the tenant has SMTP configured,
+    otherwise the global SMTP configuration. Failed sends are retried with
+    exponential backoff (see app.services.email_outbox).
+
+    With EMAIL_OUTBOX_ENABLED=false the email is sent inline instead.
 
     Args:
         email_to: Recipient email address
         subject: Email subject
         html_content: HTML content of the email
         text_content: Plain text content (optional)
-        db: Database session (required if tenant_id is provided)
+        db: Database session (commits; a new session is opened if omitted)
         tenant_id: UUID of the tenant (optional)
     """
-    print(f"[EMAIL] Preparing to send email to: {email_to}")
-    print(f"[EMAIL] Subject: {subject}")
-
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email_to],
-        body=html_content,
-        subtype=MessageType.html
-    )
-
-    # Use tenant SMTP if available, otherwise use global
-    if db and tenant_id:
-        mail_instance = get_fastmail_for_tenant(db, tenant_id)
-        print(f"[EMAIL] Using tenant SMTP for tenant_id: {tenant_id}")
-    else:
-        mail_instance = default_fm
-        print(f"[EMAIL] Using default SMTP: {settings.MAIL_SERVER}:{settings.MAIL_PORT}")
-
-    try:
-        await mail_instance.send_message(message)
-        print(f"[EMAIL] Successfully sent email to: {email_to}")
-    except Exception as e:
-        print(f"[EMAIL] ERROR sending email to {email_to}: {type(e).__name__}: {e}")
-        raise
-
-
-async def get_email_template_from_db(db: Session, template_type: EmailTemplateType) -> Optional[EmailTemplate]:
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        print(f"[EMAIL] Sending email to: {email_to} (outbox disabled)")
+        await send_email_now(db, email_to, subject, html_content, text_content, tenant_id)
+        return
+
+    def _enqueue():
+        if db is not None:
+            return enqueue_email(db, email_to, subject, html_content, text_content, tenant_id)
+        from app.db.session import SessionLocal
+        own_db = SessionLocal()
+        try:
+            return enqueue_email(own_db, email_to, subject, html_content, text_content, tenant_id)
+        finally:
+            own_db.close()
+
+    email_id = await run_blocking(_enqueue)
+    print(f"[EMAIL] Queued email {email_id} to: {email_to} (subject: {subject})")
+
+
+async def get_email_template_from_db(db: Session, template_type: EmailTemplateType) -> Optional[CachedEmailTemplate]:
     """
-    Get email template from database.
+    Get the active email template of a type (cached, see app.core.template_cache).
 
     Args:
         db: Database session
         template_type: Type of template to retrieve
 
     Returns:
-        EmailTemplate object or None if not found
+        CachedEmailTemplate or None if not found
     """
-    return db.query(EmailTemplate).filter(
-        EmailTemplate.template_type == template_type,
-        EmailTemplate.is_active == True
-    ).first()
+    return get_active_template(db, template_type)
 
 
 async def render_email_template(template: EmailTemplate, context: dict) -> tuple[str, str]:
     """
     Render email template with given context.
+    Compiled templates are cached by (template id, updated_at).
 
     Args:
-        template: EmailTemplate object
+        template: EmailTemplate (or CachedEmailTemplate) object
         context: Dictionary with template variables
 
     Returns:
         Tuple of (subject, rendered_html_content)
     """
-    jinja_template = Template(template.html_content)
-    html_content = jinja_template.render(**context)
-
-    # Also render subject in case it has variables
-    subject_template = Template(template.subject)
-    subject = subject_template.render(**context)
-
-    return subject, html_content
+    return render_template(template, context)
 
 
 async def send_reset_password_email(
@@ -223,6 +204,7 @@ async def send_reset_password_email(
         html_content = get_default_password_reset_template(context)
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=subject,
         html_content=html_content
@@ -259,6 +241,7 @@ async def send_welcome_email(db: Session, email_to: EmailStr, user_name: str):
         html_content = get_default_welcome_template(context)
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=subject,
         html_content=html_content
@@ -306,6 +289,7 @@ async def send_notification_email(
         html_content = get_default_notification_template(context)
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=final_subject,
         html_content=html_content
@@ -373,6 +357,7 @@ async def send_invitation_email(
         """
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=subject,
         html_content=html_content
@@ -439,6 +424,7 @@ async def send_existing_user_invitation_email(
         html_content = get_default_existing_user_invitation_template(context)
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=subject,
         html_content=html_content
@@ -534,8 +520,7 @@ def get_default_password_reset_template(context: dict) -> str:
     </body>
     </html>
     """
-    template = Template(html)
-    return template.render(**context)
+    return render_default("password_reset", html, context)
 
 
 def get_default_welcome_template(context: dict) -> str:
@@ -593,8 +578,7 @@ def get_default_welcome_template(context: dict) -> str:
     </body>
     </html>
     """
-    template = Template(html)
-    return template.render(**context)
+    return render_default("welcome", html, context)
 
 
 def get_default_notification_template(context: dict) -> str:
@@ -660,8 +644,7 @@ def get_default_notification_template(context: dict) -> str:
     </body>
     </html>
     """
-    template = Template(html)
-    return template.render(**context)
+    return render_default("notification", html, context)
 
 
 async def send_tenant_assignment_email(
@@ -722,6 +705,7 @@ async def send_tenant_assignment_email(
         html_content = get_default_tenant_assignment_template(context)
 
     await send_email(
+        db=db,
         email_to=email_to,
         subject=subject,
         html_content=html_content
@@ -820,8 +804,7 @@ def get_default_tenant_assignment_template(context: dict) -> str:
     </body>
     </html>
     """
-    template = Template(html)
-    return template.render(**context)
+    return render_default("tenant_assignment", html, context)
 
 
 def get_default_existing_user_invitation_template(context: dict) -> str:
@@ -926,5 +909,4 @@ def get_default_existing_user_invitation_template(context: dict) -> str:
     </body>
     </html>
     """
-    template = Template(html)
-    return template.render(**context)
+    return render_default("existing_user_invitation", html, context)
@@ -0,0 +1,189 @@
+"""
+Configuración SMTP por tenant, con caché en proceso.
+
+Enviar un email con el SMTP de un tenant requiere leer el Tenant, descifrar
+la contraseña (Fernet) y montar la configuración de conexión. Aquí:
+
+- La clave Fernet se deriva de SECRET_KEY una sola vez por proceso
+  (`get_fernet`).
+- `get_tenant_smtp_settings` guarda por tenant el SmtpSettings ya
+  descifrado (o que el tenant no tiene SMTP propio) en una caché LRU con
+  TTL, así que los envíos masivos (p. ej. invitar a todo un equipo) no
+  repiten la consulta ni el descifrado.
+
+Invalidación: igual que app.core.auth_cache, cualquier flush que inserte,
+modifique o borre un Tenant expulsa su entrada (PUT
+/tenant-settings/my-tenant/settings, DELETE /my-tenant/smtp/password,
+edición de tenants del superadmin...) y los UPDATE/DELETE masivos sobre
+tenants vacían la caché. Otros procesos (email_worker.py) ven el cambio
+como tarde a los MAIL_CONFIG_CACHE_TTL_SECONDS.
+"""
+
+import base64
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from uuid import UUID
+
+from cryptography.fernet import Fernet
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import TTLCache
+from app.core.config import settings
+from app.models.tenant import Tenant
+
+
+@dataclass(frozen=True)
+class SmtpSettings:
+    host: str
+    port: int
+    username: Optional[str]
+    password: Optional[str]
+    from_email: str
+    from_name: Optional[str]
+    use_tls: bool  # STARTTLS
+    use_ssl: bool  # TLS implícito
+    validate_certs: bool = True
+
+    @property
+    def connection_key(self) -> tuple:
+        """Emails con la misma clave comparten conexión SMTP."""
+        return (self.host, self.port, self.username, self.password, self.use_tls, self.use_ssl)
+
+
+# Valor guardado para tenants sin SMTP propio (TTLCache.get devuelve None si falta)
+_NO_TENANT_SMTP = object()
+
+tenant_smtp_cache = TTLCache(settings.MAIL_CONFIG_CACHE_MAX_SIZE, settings.MAIL_CONFIG_CACHE_TTL_SECONDS)
+
+
+@lru_cache(maxsize=1)
+def get_encryption_key() -> bytes:
+    """Clave Fernet derivada de SECRET_KEY (calculada una vez por proceso)."""
+    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+    return base64.urlsafe_b64encode(key)
+
+
+@lru_cache(maxsize=1)
+def get_fernet() -> Fernet:
+    return Fernet(get_encryption_key())
+
+
+def encrypt_password(password: str) -> str:
+    """Encripta una contraseña usando Fernet."""
+    return get_fernet().encrypt(password.encode()).decode()
+
+
+def decrypt_password(encrypted_password: str) -> str:
+    """Desencripta una contraseña usando Fernet."""
+    return get_fernet().decrypt(encrypted_password.encode()).decode()
+
+
+def default_smtp_settings() -> SmtpSettings:
+    """Configuración SMTP global (MAIL_*)."""
+    use_credentials = settings.USE_CREDENTIALS and bool(settings.MAIL_USERNAME)
+    return SmtpSettings(
+        host=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+        username=settings.MAIL_USERNAME if use_credentials else None,
+        password=settings.MAIL_PASSWORD if use_credentials else None,
+        from_email=settings.MAIL_FROM,
+        from_name=settings.MAIL_FROM_NAME,
+        use_tls=settings.MAIL_STARTTLS,
+        use_ssl=settings.MAIL_SSL_TLS,
+        validate_certs=settings.VALIDATE_CERTS,
+    )
+
+
+def _load_tenant_smtp_settings(db: Session, tenant_id: UUID) -> Optional[SmtpSettings]:
+    tenant = db.query(
+        Tenant.name,
+        Tenant.smtp_enabled,
+        Tenant.smtp_host,
+        Tenant.smtp_port,
+        Tenant.smtp_username,
+        Tenant.smtp_password_encrypted,
+        Tenant.smtp_from_email,
+        Tenant.smtp_from_name,
+        Tenant.smtp_use_tls,
+        Tenant.smtp_use_ssl,
+    ).filter(Tenant.id == tenant_id).first()
+
+    # Verificar si SMTP está habilitado y configurado
+    if (not tenant or not tenant.smtp_enabled or not tenant.smtp_host
+            or not tenant.smtp_username or not tenant.smtp_password_encrypted):
+        return None
+
+    try:
+        password = decrypt_password(tenant.smtp_password_encrypted)
+    except Exception:
+        # Si hay error desencriptando, usar default
+        return None
+
+    return SmtpSettings(
+        host=tenant.smtp_host,
+        port=tenant.smtp_port or 587,
+        username=tenant.smtp_username,
+        password=password,
+        from_email=tenant.smtp_from_email or tenant.smtp_username,
+        from_name=tenant.smtp_from_name or tenant.name,
+        use_tls=tenant.smtp_use_tls,
+        use_ssl=tenant.smtp_use_ssl,
+    )
+
+
+def get_tenant_smtp_settings(db: Session, tenant_id: UUID) -> Optional[SmtpSettings]:
+    """
+    SMTP propio del tenant, servido desde la caché cuando es posible.
+    Retorna None si el tenant no tiene SMTP configurado y habilitado.
+    """
+    cached = tenant_smtp_cache.get(tenant_id)
+    if cached is not None:
+        return None if cached is _NO_TENANT_SMTP else cached
+
+    smtp = _load_tenant_smtp_settings(db, tenant_id)
+    tenant_smtp_cache.set(tenant_id, _NO_TENANT_SMTP if smtp is None else smtp)
+    return smtp
+
+
+def invalidate_tenant_smtp(tenant_id: Optional[UUID] = None):
+    """Expulsa un tenant de la caché (o todos si no se indica id)."""
+    if tenant_id is None:
+        tenant_smtp_cache.clear()
+    else:
+        tenant_smtp_cache.pop(tenant_id)
+
+
+def clear_mail_config_cache():
+    tenant_smtp_cache.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, Tenant) and instance.id is not None:
+            invalidate_tenant_smtp(instance.id)
+            session.info.setdefault("mail_config_tenant_ids", []).append(instance.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # Una request concurrente pudo recargar el valor antiguo entre el flush y el commit
+    for tenant_id in session.info.pop("mail_config_tenant_ids", []):
+        invalidate_tenant_smtp(tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_ids(session):
+    session.info.pop("mail_config_tenant_ids", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Tenant:
+        invalidate_tenant_smtp()
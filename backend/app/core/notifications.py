@@ -3,14 +3,59 @@ Notification Helper Functions
 
 Funciones auxiliares para crear y gestionar notificaciones en el sistema.
 Estas funciones simplifican la creación de notificaciones desde cualquier parte del código.
-"""
 
-from sqlalchemy.orm import Session
-from uuid import UUID
-from typing import Optional
+El contador de no leídas de cada usuario vive en notification_counters y se
+mantiene en la misma transacción que las notificaciones:
+
+- Los flush del ORM (Notification creada, borrada o con is_read cambiado,
+  incluidos los borrados en cascada) lo ajustan automáticamente.
+- Las escrituras masivas (UPDATE/DELETE sobre la tabla) deben llamar a
+  `adjust_unread_counts` con lo que han cambiado, como mark_all_as_read.
+
+Para muchos destinatarios:
+
+- `create_notifications_bulk`: una Notification por usuario, insertadas por
+  lotes en un único INSERT (lista de ids o consulta, p. ej. `tenant_user_ids`).
+- `create_tenant_broadcast`: un único NotificationBroadcast para todo el
+  tenant, con confirmaciones de lectura por usuario (NotificationBroadcastRead).
+
+Los avisos de tenant no pasan por notification_counters: el badge suma al
+contador los avisos del tenant actual sin confirmación de lectura, contados
+al leerlo con el índice (tenant_id, created_at). Así un usuario con varios
+tenants solo ve los del tenant en el que está y quien deja un tenant deja de
+contarlos. Quién es miembro (destinatarios, visibilidad, confirmaciones y
+conteo) lo define una sola consulta, `_tenant_members`.
+"""
 
-from app.models.notification import Notification, NotificationType
-from app.schemas.notification import NotificationCreate
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import and_, case, event, exists, func, inspect, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
+from uuid import UUID, uuid4
+from typing import Dict, Iterable, List, Optional, Union
+
+from app.models.notification import (
+    Notification,
+    NotificationBroadcast,
+    NotificationBroadcastRead,
+    NotificationCounter,
+    NotificationType
+)
+from app.models.tenant_membership import TenantMembership
+from app.models.user import User, UserRole
+from app.schemas.notification import (
+    Notification as NotificationSchema,
+    NotificationBroadcast as NotificationBroadcastSchema,
+    NotificationCreate
+)
+from app.services.notification_stream import publish_notification_event, publish_notification_events
+
+# Filas por sentencia en las escrituras por lotes (límite de parámetros de la base)
+BULK_CHUNK_SIZE = 1000
 
 
 async def create_notification(
@@ -80,6 +125,8 @@ async def create_notification(
         - La notificación se crea como no leída (is_read=False)
         - El tenant_id se puede omitir y se asignará automáticamente
         - Las notificaciones se eliminan en cascada si se elimina el usuario o tenant
+        - Al hacer commit se envía un evento "notification" (con el nuevo contador)
+          a GET /notifications/stream
     """
     # Crear la notificación
     notification = Notification(
@@ -93,12 +140,36 @@ async def create_notification(
     )
 
     db.add(notification)
+    db.flush()
+    publish_notification_event(
+        db,
+        user_id,
+        "notification",
+        notification=NotificationSchema.model_validate(notification).model_dump(mode="json"),
+        unread_count=get_unread_count(db, user_id, tenant_id)
+    )
     db.commit()
     db.refresh(notification)
 
     return notification
 
 
+def publish_unread_count(db: Session, user_id: UUID, tenant_id: Optional[UUID] = None):
+    """
+    Envía el contador de no leídas actualizado a GET /notifications/stream
+    (al hacer commit de `db`).
+
+    Args:
+        db: Sesión de base de datos (no hace commit)
+        user_id: UUID del usuario
+        tenant_id: Tenant cuyos avisos sin leer se suman (normalmente el actual)
+    """
+    db.flush()
+    publish_notification_event(
+        db, user_id, "unread_count", unread_count=get_unread_count(db, user_id, tenant_id)
+    )
+
+
 async def create_notification_for_multiple_users(
     db: Session,
     user_ids: list[UUID],
@@ -140,21 +211,310 @@ async def create_notification_for_multiple_users(
         )
         ```
     """
-    notifications = []
+    notification_ids = await create_notifications_bulk(
+        db=db,
+        recipients=user_ids,
+        type=type,
+        title=title,
+        message=message,
+        action_url=action_url,
+        tenant_id=tenant_id
+    )
+    return db.query(Notification).filter(Notification.id.in_(notification_ids)).all()
+
+
+def _tenant_members(tenant_id: UUID, roles: Optional[List[UserRole]] = None) -> Select:
+    """
+    Consulta (user_id, since) con los miembros activos de un tenant y desde
+    cuándo lo son: usuarios activos con membresía activa en el tenant, o que
+    lo tienen como tenant principal sin fila de membresía. Una membresía
+    desactivada excluye al usuario aunque sea su tenant principal.
+    """
+    has_membership = TenantMembership.id.isnot(None)
+    by_membership = and_(has_membership, TenantMembership.is_active == True)
+    direct = and_(~has_membership, User.tenant_id == tenant_id)
+    if roles is not None:
+        by_membership = and_(by_membership, TenantMembership.role.in_(roles))
+        direct = and_(direct, User.role.in_(roles))
+    return select(
+        User.id.label("user_id"),
+        func.coalesce(TenantMembership.joined_at, User.created_at).label("since")
+    ).outerjoin(
+        TenantMembership,
+        and_(TenantMembership.user_id == User.id, TenantMembership.tenant_id == tenant_id)
+    ).where(User.is_active == True, or_(by_membership, direct))
+
+
+def tenant_user_ids(tenant_id: UUID, roles: Optional[List[UserRole]] = None) -> Select:
+    """
+    Consulta con los ids de los usuarios activos de un tenant: los que tienen
+    membresía activa y los que lo tienen como tenant principal.
+
+    Args:
+        tenant_id: UUID del tenant
+        roles: Limitar a estos roles en el tenant (opcional)
+
+    Ejemplo:
+        ```python
+        # Todos los admins del tenant salvo el usuario actual
+        admins = tenant_user_ids(tenant.id, roles=[UserRole.tenant_admin]).where(User.id != user.id)
+        await create_notifications_bulk(db, admins, NotificationType.INFO, "...", "...")
+        ```
+    """
+    return _tenant_members(tenant_id, roles).with_only_columns(User.id)
+
+
+def _unread_broadcasts(tenant_id: UUID, user_id: Optional[UUID] = None):
+    """Subconsulta (user_id, broadcast_id) con los avisos sin leer de los miembros del tenant (o de uno)."""
+    members = _tenant_members(tenant_id)
+    if user_id is not None:
+        members = members.where(User.id == user_id)
+    members = members.subquery()
+    return select(members.c.user_id, NotificationBroadcast.id.label("broadcast_id")).join(
+        NotificationBroadcast,
+        and_(
+            NotificationBroadcast.tenant_id == tenant_id,
+            NotificationBroadcast.created_at >= members.c.since
+        )
+    ).where(
+        ~exists().where(
+            NotificationBroadcastRead.broadcast_id == NotificationBroadcast.id,
+            NotificationBroadcastRead.user_id == members.c.user_id
+        )
+    ).subquery()
+
+
+def unread_broadcast_counts(db: Session, tenant_id: UUID) -> Dict[UUID, int]:
+    """Avisos sin leer de cada miembro del tenant (solo los que tienen alguno)."""
+    unread = _unread_broadcasts(tenant_id)
+    return dict(db.execute(select(unread.c.user_id, func.count()).group_by(unread.c.user_id)).all())
+
+
+def _unread_count_query(user_id: UUID, tenant_id: Optional[UUID]) -> Select:
+    """Contador del usuario más sus avisos sin leer de `tenant_id`, en una sola consulta."""
+    unread = func.coalesce(
+        select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id).scalar_subquery(),
+        0
+    )
+    if tenant_id is not None:
+        unread = unread + select(func.count()).select_from(_unread_broadcasts(tenant_id, user_id)).scalar_subquery()
+    return select(unread)
 
-    for user_id in user_ids:
-        notification = await create_notification(
+
+async def create_notifications_bulk(
+    db: Session,
+    recipients: Union[Select, Iterable[UUID]],
+    type: NotificationType,
+    title: str,
+    message: str,
+    action_url: Optional[str] = None,
+    tenant_id: Optional[UUID] = None
+) -> List[UUID]:
+    """
+    Crea la misma notificación para muchos usuarios en una sola transacción.
+
+    Las filas se insertan con un INSERT de varias filas por cada
+    BULK_CHUNK_SIZE destinatarios, los contadores de no leídas se actualizan
+    con un upsert por lote y los eventos de /notifications/stream se agrupan
+    (ver publish_notification_events).
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        recipients: Lista de UUIDs o consulta que devuelve los ids (p. ej. tenant_user_ids)
+        type: Tipo de notificación
+        title: Título de la notificación
+        message: Mensaje de la notificación
+        action_url: URL opcional para redirección
+        tenant_id: UUID del tenant (opcional)
+
+    Returns:
+        list[UUID]: Ids de las notificaciones creadas (una por destinatario distinto)
+    """
+    if isinstance(recipients, Select):
+        recipients = db.execute(recipients).scalars()
+    # Sin duplicados, conservando el orden
+    user_ids = list(dict.fromkeys(recipients))
+    if not user_ids:
+        return []
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "tenant_id": tenant_id,
+            "type": type,
+            "title": title,
+            "message": message,
+            "action_url": action_url,
+            "is_read": False,
+            "created_at": now,
+        }
+        for user_id in user_ids
+    ]
+    table = Notification.__table__
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.execute(table.insert().values(rows[start:start + BULK_CHUNK_SIZE]))
+
+    unread_counts = adjust_unread_counts(db, {user_id: 1 for user_id in user_ids})
+    broadcasts = unread_broadcast_counts(db, tenant_id) if tenant_id else {}
+    common = NotificationSchema.model_validate(rows[0]).model_dump(mode="json", exclude={"id", "user_id"})
+    publish_notification_events(
+        db,
+        "notification",
+        {
+            row["user_id"]: {
+                "unread_count": unread_counts.get(row["user_id"], 1) + broadcasts.get(row["user_id"], 0),
+                "notification": {"id": str(row["id"]), "user_id": str(row["user_id"])}
+            }
+            for row in rows
+        },
+        notification=common
+    )
+    db.commit()
+    return [row["id"] for row in rows]
+
+
+async def create_tenant_broadcast(
+    db: Session,
+    tenant_id: UUID,
+    type: NotificationType,
+    title: str,
+    message: str,
+    action_url: Optional[str] = None,
+    created_by_id: Optional[UUID] = None
+) -> NotificationBroadcast:
+    """
+    Crea un aviso para todos los usuarios activos de un tenant.
+
+    Guarda una sola fila (NotificationBroadcast) en lugar de una por
+    usuario. Los miembros actuales lo ven como no leído (evento en
+    /notifications/stream con su contador en este tenant); quien se une
+    después no lo ve. No modifica notification_counters.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        tenant_id: UUID del tenant
+        type: Tipo de notificación
+        title: Título del aviso
+        message: Mensaje del aviso
+        action_url: URL opcional para redirección
+        created_by_id: Usuario que publica el aviso (opcional)
+
+    Returns:
+        NotificationBroadcast: El aviso creado
+
+    Ejemplo:
+        ```python
+        await create_tenant_broadcast(
             db=db,
-            user_id=user_id,
-            type=type,
-            title=title,
-            message=message,
-            action_url=action_url,
-            tenant_id=tenant_id
+            tenant_id=tenant.id,
+            type=NotificationType.WARNING,
+            title="Mantenimiento programado",
+            message="El sistema no estará disponible el domingo de 8:00 a 9:00",
+            created_by_id=current_user.id
         )
-        notifications.append(notification)
+        ```
+    """
+    broadcast = NotificationBroadcast(
+        tenant_id=tenant_id,
+        type=type,
+        title=title,
+        message=message,
+        action_url=action_url,
+        created_by_id=created_by_id
+    )
+    db.add(broadcast)
+    db.flush()
+
+    members = tenant_user_ids(tenant_id)
+    user_ids = list(db.execute(members).scalars())
+    counters = dict(db.query(NotificationCounter.user_id, NotificationCounter.unread_count).filter(
+        NotificationCounter.user_id.in_(members)
+    ).all())
+    broadcasts = unread_broadcast_counts(db, tenant_id)
+    publish_notification_events(
+        db,
+        "notification",
+        {
+            user_id: {"unread_count": counters.get(user_id, 0) + broadcasts.get(user_id, 0)}
+            for user_id in user_ids
+        },
+        notification=NotificationBroadcastSchema.model_validate(broadcast).model_dump(mode="json")
+    )
+    db.commit()
+    db.refresh(broadcast)
+    return broadcast
+
+
+def _member_since(db: Session, user_id: UUID, tenant_id: UUID) -> Optional[datetime]:
+    """Desde cuándo pertenece el usuario al tenant (None si no es miembro activo)."""
+    return db.execute(
+        _tenant_members(tenant_id).with_only_columns(
+            func.coalesce(TenantMembership.joined_at, User.created_at)
+        ).where(User.id == user_id)
+    ).scalar()
+
 
-    return notifications
+def get_tenant_broadcasts(db: Session, user_id: UUID, tenant_id: Optional[UUID]) -> Optional[Query]:
+    """
+    Avisos del tenant visibles para el usuario, con su fecha de lectura.
+
+    Returns:
+        Query de filas (NotificationBroadcast, read_at), o None si el usuario
+        no pertenece al tenant
+    """
+    since = _member_since(db, user_id, tenant_id) if tenant_id else None
+    if since is None:
+        return None
+    return db.query(NotificationBroadcast, NotificationBroadcastRead.read_at).outerjoin(
+        NotificationBroadcastRead,
+        and_(
+            NotificationBroadcastRead.broadcast_id == NotificationBroadcast.id,
+            NotificationBroadcastRead.user_id == user_id
+        )
+    ).filter(
+        NotificationBroadcast.tenant_id == tenant_id,
+        NotificationBroadcast.created_at >= since
+    )
+
+
+def _insert_receipts(db: Session, user_id: UUID, *criteria) -> int:
+    """Confirma la lectura de los avisos que cumplen `criteria` y no estaban leídos."""
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    unread = select(
+        NotificationBroadcast.id,
+        literal(user_id, NotificationBroadcastRead.user_id.type),
+        literal(datetime.utcnow(), NotificationBroadcastRead.read_at.type)
+    ).where(
+        *criteria,
+        ~exists().where(
+            NotificationBroadcastRead.broadcast_id == NotificationBroadcast.id,
+            NotificationBroadcastRead.user_id == user_id
+        )
+    )
+    statement = insert(NotificationBroadcastRead).from_select(["broadcast_id", "user_id", "read_at"], unread)
+    # Dos requests simultáneas: la segunda no inserta (ni descuenta) nada
+    return db.execute(statement.on_conflict_do_nothing()).rowcount
+
+
+def mark_broadcast_as_read(db: Session, broadcast: NotificationBroadcast, user_id: UUID) -> bool:
+    """
+    Registra que el usuario leyó un aviso del tenant.
+
+    Args:
+        db: Sesión de base de datos (hace commit)
+        broadcast: El aviso
+        user_id: UUID del usuario
+
+    Returns:
+        bool: False si ya estaba leído
+    """
+    inserted = _insert_receipts(db, user_id, NotificationBroadcast.id == broadcast.id)
+    if inserted:
+        publish_unread_count(db, user_id, broadcast.tenant_id)
+    db.commit()
+    return bool(inserted)
 
 
 def mark_notification_as_read(db: Session, notification: Notification) -> Notification:
@@ -175,19 +535,35 @@ def mark_notification_as_read(db: Session, notification: Notification) -> Notifi
             mark_notification_as_read(db, notification)
         ```
     """
-    notification.mark_as_read()
+    # UPDATE condicional: dos requests simultáneas no descuentan dos veces
+    updated = db.query(Notification).filter(
+        Notification.id == notification.id,
+        Notification.is_read == False
+    ).update({
+        "is_read": True,
+        "read_at": datetime.utcnow()
+    })
+
+    if updated:
+        adjust_unread_counts(db, {notification.user_id: -updated})
+        publish_unread_count(db, notification.user_id, notification.tenant_id)
     db.commit()
     db.refresh(notification)
     return notification
 
 
-def mark_all_as_read(db: Session, user_id: UUID) -> int:
+def mark_all_as_read(db: Session, user_id: UUID, tenant_id: Optional[UUID] = None) -> int:
     """
     Marca todas las notificaciones de un usuario como leídas.
 
+    Un único UPDATE sobre las no leídas del usuario (y, con tenant_id, un
+    único INSERT de confirmaciones para los avisos del tenant); el contador
+    se reduce en el número de notificaciones actualizadas.
+
     Args:
         db: Sesión de base de datos
         user_id: UUID del usuario
+        tenant_id: Tenant cuyos avisos (NotificationBroadcast) marcar también (opcional)
 
     Returns:
         int: Cantidad de notificaciones marcadas como leídas
@@ -195,31 +571,44 @@ def mark_all_as_read(db: Session, user_id: UUID) -> int:
     Ejemplo:
         ```python
         # Marcar todas como leídas al hacer click en "Marcar todas como leídas"
-        count = mark_all_as_read(db, current_user.id)
+        count = mark_all_as_read(db, current_user.id, current_user.current_tenant_id)
         print(f"{count} notificaciones marcadas como leídas")
         ```
     """
-    from datetime import datetime
-
-    updated_count = db.query(Notification).filter(
-        Notification.user_id == user_id,
-        Notification.is_read == False
-    ).update({
-        "is_read": True,
-        "read_at": datetime.utcnow()
-    })
+    updated_count = db.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+        .values(is_read=True, read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if updated_count:
+        adjust_unread_counts(db, {user_id: -updated_count})
+
+    receipts = 0
+    since = _member_since(db, user_id, tenant_id) if tenant_id else None
+    if since is not None:
+        receipts = _insert_receipts(
+            db,
+            user_id,
+            NotificationBroadcast.tenant_id == tenant_id,
+            NotificationBroadcast.created_at >= since
+        )
 
+    if updated_count or receipts:
+        publish_unread_count(db, user_id, tenant_id)
     db.commit()
-    return updated_count
+    return updated_count + receipts
 
 
-def get_unread_count(db: Session, user_id: UUID) -> int:
+def get_unread_count(db: Session, user_id: UUID, tenant_id: Optional[UUID] = None) -> int:
     """
     Obtiene el número de notificaciones no leídas de un usuario.
 
     Args:
         db: Sesión de base de datos
         user_id: UUID del usuario
+        tenant_id: Suma también los avisos sin leer de este tenant (el actual)
 
     Returns:
         int: Cantidad de notificaciones no leídas
@@ -227,11 +616,133 @@ def get_unread_count(db: Session, user_id: UUID) -> int:
     Ejemplo:
         ```python
         # Mostrar contador en el badge
-        unread = get_unread_count(db, current_user.id)
+        unread = get_unread_count(db, current_user.id, current_user.current_tenant_id)
         # Retorna: 5
         ```
     """
-    return db.query(Notification).filter(
-        Notification.user_id == user_id,
-        Notification.is_read == False
-    ).count()
+    return db.execute(_unread_count_query(user_id, tenant_id)).scalar() or 0
+
+
+async def get_unread_count_async(db: AsyncSession, user_id: UUID, tenant_id: Optional[UUID] = None) -> int:
+    """
+    Versión async de get_unread_count para las rutas que usan get_async_db.
+
+    Args:
+        db: Sesión async de base de datos
+        user_id: UUID del usuario
+        tenant_id: Suma también los avisos sin leer de este tenant (el actual)
+
+    Returns:
+        int: Cantidad de notificaciones no leídas
+    """
+    return await db.scalar(_unread_count_query(user_id, tenant_id)) or 0
+
+
+def adjust_unread_counts(db: Session, deltas: Dict[UUID, int]) -> Dict[UUID, int]:
+    """
+    Suma a los contadores de no leídas los cambios de una escritura masiva.
+
+    Args:
+        db: Sesión de base de datos (no hace commit)
+        deltas: {user_id: diferencia}, p. ej. {user_id: -5} tras marcar 5 como leídas
+
+    Returns:
+        dict: Nuevo contador de los usuarios con diferencia positiva
+    """
+    return _apply_unread_deltas(db.connection(), deltas)
+
+
+def recalculate_unread_counts(db: Session, user_ids: Optional[list] = None) -> int:
+    """
+    Recalcula los contadores desde notifications (backfill o reparación tras
+    escrituras hechas fuera de estas funciones). Los avisos de tenant no
+    forman parte del contador.
+
+    Args:
+        db: Sesión de base de datos (hace commit)
+        user_ids: Usuarios a recalcular (todos si no se indica)
+
+    Returns:
+        int: Número de contadores escritos
+    """
+    counters = db.query(NotificationCounter)
+    unread = db.query(Notification.user_id, func.count()).filter(Notification.is_read == False)
+    if user_ids is not None:
+        counters = counters.filter(NotificationCounter.user_id.in_(user_ids))
+        unread = unread.filter(Notification.user_id.in_(user_ids))
+    counters.delete(synchronize_session=False)
+
+    rows = [
+        {"user_id": user_id, "unread_count": count, "updated_at": datetime.utcnow()}
+        for user_id, count in unread.group_by(Notification.user_id).all()
+    ]
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        db.execute(NotificationCounter.__table__.insert(), rows[start:start + BULK_CHUNK_SIZE])
+    db.commit()
+    return len(rows)
+
+
+def _apply_unread_deltas(connection: Connection, deltas: Dict[UUID, int]) -> Dict[UUID, int]:
+    table = NotificationCounter.__table__
+    now = datetime.utcnow()
+    unread_counts = {}
+
+    # Orden fijo de user_id: dos transacciones no se bloquean en orden inverso
+    increments = sorted(((user_id, delta) for user_id, delta in deltas.items() if delta > 0), key=lambda item: str(item[0]))
+    insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    for start in range(0, len(increments), BULK_CHUNK_SIZE):
+        statement = insert(table).values([
+            {"user_id": user_id, "unread_count": delta, "updated_at": now}
+            for user_id, delta in increments[start:start + BULK_CHUNK_SIZE]
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"unread_count": table.c.unread_count + statement.excluded.unread_count, "updated_at": now}
+        ).returning(table.c.user_id, table.c.unread_count)
+        unread_counts.update(connection.execute(statement).all())
+
+    # Sin fila no hay nada que descontar (y el usuario puede estar borrándose)
+    decrements = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta < 0:
+            decrements[delta].append(user_id)
+    for delta, user_ids in decrements.items():
+        user_ids.sort(key=str)
+        for start in range(0, len(user_ids), BULK_CHUNK_SIZE):
+            connection.execute(
+                table.update()
+                .where(table.c.user_id.in_(user_ids[start:start + BULK_CHUNK_SIZE]))
+                .values(
+                    unread_count=case(
+                        (table.c.unread_count + delta > 0, table.c.unread_count + delta),
+                        else_=0
+                    ),
+                    updated_at=now
+                )
+            )
+    return unread_counts
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_notifications(session, flush_context):
+    """Ajusta los contadores según las Notification del flush (antes de finalizarlo)."""
+    deltas = defaultdict(int)
+    new = session.new
+    deleted = session.deleted
+    for instance in (*new, *session.dirty, *deleted):
+        if not isinstance(instance, Notification):
+            continue
+        state = inspect(instance)
+        values, committed = state.dict, state.committed_state
+        if instance not in new:
+            before_user = committed.get("user_id", values.get("user_id"))
+            if before_user is not None and committed.get("is_read", values.get("is_read")) is False:
+                deltas[before_user] -= 1
+        if instance not in deleted:
+            after_user = values.get("user_id")
+            is_read = values.get("is_read")
+            # Nueva sin is_read explícito: default False
+            if after_user is not None and (is_read is False or (is_read is None and instance in new)):
+                deltas[after_user] += 1
+    if any(deltas.values()):
+        _apply_unread_deltas(session.connection(), deltas)
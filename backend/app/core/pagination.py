@@ -0,0 +1,177 @@
+"""
+Paginación por cursor (keyset) y conteos estimados.
+
+Los listados usan por defecto OFFSET/LIMIT más un COUNT(*) exacto; ambos
+costes crecen con el tamaño de la tabla. En modo cursor el cliente envía el
+`next_cursor` de la respuesta anterior y la consulta continúa justo después
+de la última fila vista, filtrando por (clave_de_orden, id) en lugar de
+saltar filas:
+
+    items, next_cursor = paginate_keyset(
+        query, Lead.created_at, Lead.id, cursor=cursor, limit=20
+    )
+
+El cursor es opaco para el cliente (JSON en base64 url-safe).
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+COUNT_MODE_PATTERN = "^(exact|estimated|none)$"
+PAGINATION_MODE_PATTERN = "^(offset|cursor)$"
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid pagination cursor"
+    )
+
+
+def encode_cursor(sort_value: Any, row_id: UUID) -> str:
+    """Codifica la posición (clave de orden, id) de la última fila devuelta."""
+    if isinstance(sort_value, datetime):
+        value = ["dt", sort_value.isoformat()]
+    elif isinstance(sort_value, date):
+        value = ["d", sort_value.isoformat()]
+    else:
+        value = ["v", sort_value]
+    raw = json.dumps([value, str(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, UUID]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+
+    Raises:
+        HTTPException: 400 si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (kind, value), row_id = json.loads(raw)
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        elif kind == "d":
+            value = date.fromisoformat(value)
+        elif kind != "v":
+            raise ValueError(kind)
+        return value, UUID(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise _invalid_cursor()
+
+
+def _is_nullable(column) -> bool:
+    return getattr(getattr(column, "expression", column), "nullable", True)
+
+
+def _keyset_filter(column, id_column, value, last_id, descending: bool):
+    """Filas posteriores a (value, last_id) en el orden del listado (NULLs al final)."""
+    def after(left, right):
+        return left < right if descending else left > right
+
+    if not _is_nullable(column):
+        # Comparación de tuplas: aprovecha un índice compuesto (columna, id)
+        return after(tuple_(column, id_column), tuple_(value, last_id))
+    if value is None:
+        return and_(column.is_(None), after(id_column, last_id))
+    return or_(
+        after(column, value),
+        and_(column == value, after(id_column, last_id)),
+        column.is_(None)
+    )
+
+
+def order_for_keyset(query: Query, column, id_column, descending: bool = True) -> Query:
+    """Orden total y estable requerido por la paginación por cursor."""
+    direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+    sort = direction(column)
+    if _is_nullable(column):
+        sort = sort.nulls_last()
+    return query.order_by(sort, direction(id_column))
+
+
+def paginate_keyset(
+    query: Query,
+    column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Devuelve una página ordenada por (column, id_column) tras `cursor`.
+
+    Args:
+        query: Query ya filtrada y sin ORDER BY
+        column: Columna de ordenación (atributo del modelo)
+        id_column: Clave primaria, desempata filas con la misma clave
+        cursor: `next_cursor` de la página anterior (None para la primera)
+        limit: Tamaño de página
+        descending: Orden descendente (más recientes primero)
+
+    Returns:
+        Tuple[List, Optional[str]]: Filas de la página y cursor de la
+        siguiente (None si no hay más)
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        query = query.filter(_keyset_filter(column, id_column, value, last_id, descending))
+
+    rows = order_for_keyset(query, column, id_column, descending).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, column.key), getattr(last, id_column.key))
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de una sentencia, con sus parámetros enlazados."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJSON, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_count(query: Query) -> int:
+    """
+    Número aproximado de filas según el planificador de PostgreSQL.
+
+    No recorre la tabla, por lo que su coste no depende del tamaño del
+    histórico. En otros dialectos devuelve el conteo exacto.
+    """
+    session = query.session
+    if session.get_bind().dialect.name != "postgresql":
+        return query.order_by(None).count()
+
+    plan = session.execute(_ExplainJSON(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(query: Query, count_mode: str = "exact") -> Optional[int]:
+    """Total del listado según count_mode: exact, estimated o none (sin conteo)."""
+    if count_mode == "none":
+        return None
+    if count_mode == "estimated":
+        return estimate_count(query)
+    return query.order_by(None).count()
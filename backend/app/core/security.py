@@ -3,10 +3,11 @@ from typing import Optional
 from uuid import UUID
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import get_membership_context, get_user_by_email
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User, UserRole
@@ -25,6 +26,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# Streams (SSE): the browser EventSource API cannot send an Authorization header
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -121,16 +124,27 @@ async def get_current_user(
     if token_data is None or token_data.email is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == token_data.email).first()
+    # User and membership lookups are served from the in-process auth cache
+    user = get_user_by_email(db, token_data.email)
     if user is None:
         raise credentials_exception
 
+    tenant_id = token_data.tenant_id
+    role = UserRole(token_data.role) if token_data.role else None
+    if token_data.membership_id is not None:
+        # The membership is authoritative: a removed/deactivated membership
+        # or a role change takes effect without waiting for a new token
+        membership = get_membership_context(db, token_data.membership_id)
+        if membership is None or not membership.is_active or membership.user_id != user.id:
+            raise credentials_exception
+        tenant_id, role = membership.tenant_id, membership.role
+
     # Inject session context from JWT into user object
     # This allows current_user.tenant_id and current_user.role to work
     # based on the selected tenant context (for multi-tenant users)
     user.set_session_context(
-        tenant_id=token_data.tenant_id,
-        role=UserRole(token_data.role) if token_data.role else None,
+        tenant_id=tenant_id,
+        role=role,
         membership_id=token_data.membership_id
     )
 
@@ -146,6 +160,16 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_for_stream(
+    access_token: Optional[str] = Query(None, description="JWT, for clients that cannot send headers (EventSource)"),
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current active user from the Authorization header or the access_token query parameter."""
+    current_user = await get_current_user(token=token or access_token or "", db=db)
+    return await get_current_active_user(current_user)
+
+
 # ============================================
 # SUPERADMIN: Platform-level access
 # ============================================
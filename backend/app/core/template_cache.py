@@ -0,0 +1,161 @@
+"""
+Caché de plantillas de email compiladas.
+
+Renderizar un email requería compilar con Jinja el HTML y el asunto de la
+plantilla (y leer la EmailTemplate de la base) en cada envío. Aquí:
+
+- Un único `Environment` compartido, con caché de bytecode en disco
+  (EMAIL_TEMPLATE_BYTECODE_DIR; por defecto el directorio temporal), de
+  modo que otros procesos y reinicios no recompilan el mismo fuente.
+- Una LRU de plantillas compiladas por (id de plantilla, updated_at,
+  parte): editar una plantilla cambia updated_at y por tanto la clave, y
+  las versiones antiguas salen solas de la LRU.
+- `get_active_template` guarda por tipo la plantilla activa (o que no hay
+  ninguna) en una caché con TTL.
+
+Invalidación: igual que app.core.auth_cache, cualquier flush que inserte,
+modifique o borre una EmailTemplate (POST/PUT/DELETE /email-templates,
+seed_email_templates.py) vacía la caché por tipo. Otros procesos ven el
+cambio como tarde a los EMAIL_TEMPLATE_CACHE_TTL_SECONDS.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Hashable, Optional
+from uuid import UUID
+
+from jinja2 import Environment, FileSystemBytecodeCache, Template
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import TTLCache
+from app.core.config import settings
+from app.models.email_template import EmailTemplate, EmailTemplateType
+
+
+@dataclass(frozen=True)
+class CachedEmailTemplate:
+    """Copia inmutable de las columnas de EmailTemplate que usa el envío."""
+    id: UUID
+    template_type: EmailTemplateType
+    subject: str
+    html_content: str
+    updated_at: datetime
+
+
+# TTLCache.get devuelve None si falta: valor guardado para "no hay plantilla activa"
+_NO_TEMPLATE = object()
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    directory = settings.EMAIL_TEMPLATE_BYTECODE_DIR or None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory, pattern="clinik_email_%s.cache")
+
+
+jinja_env = Environment(bytecode_cache=_bytecode_cache())
+
+compiled_templates = TTLCache(settings.EMAIL_TEMPLATE_CACHE_SIZE, float("inf"))
+active_templates = TTLCache(len(EmailTemplateType) * 2, settings.EMAIL_TEMPLATE_CACHE_TTL_SECONDS)
+
+
+def _compile(name: str, source: str) -> Template:
+    # Igual que jinja2.BaseLoader.load: el bytecode se busca por nombre y checksum del fuente
+    bcc = jinja_env.bytecode_cache
+    bucket = bcc.get_bucket(jinja_env, name, None, source)
+    code = bucket.code
+    if code is None:
+        code = jinja_env.compile(source, name)
+        bucket.code = code
+        bcc.set_bucket(bucket)
+    return jinja_env.template_class.from_code(jinja_env, code, jinja_env.make_globals(None), lambda: True)
+
+
+def get_compiled(key: Hashable, source: str) -> Template:
+    """Plantilla compilada para `key`; `source` solo se compila si la clave no está en la LRU."""
+    template = compiled_templates.get(key)
+    if template is None:
+        template = _compile(":".join(str(part) for part in key), source)
+        compiled_templates.set(key, template)
+    return template
+
+
+def render_template(template, context: dict) -> tuple:
+    """
+    Renderiza asunto y HTML de una EmailTemplate (o CachedEmailTemplate).
+
+    Returns:
+        Tuple of (subject, rendered_html_content)
+    """
+    version = template.updated_at.isoformat() if template.updated_at else ""
+    html_template = get_compiled((template.id, version, "html"), template.html_content)
+    subject_template = get_compiled((template.id, version, "subject"), template.subject)
+    return subject_template.render(**context), html_template.render(**context)
+
+
+def render_default(name: str, source: str, context: dict) -> str:
+    """Renderiza una plantilla por defecto (fija en el código) identificada por `name`."""
+    return get_compiled(("default", name), source).render(**context)
+
+
+def get_active_template(db: Session, template_type: EmailTemplateType) -> Optional[CachedEmailTemplate]:
+    """Plantilla activa de un tipo, servida desde la caché cuando es posible."""
+    cached = active_templates.get(template_type)
+    if cached is not None:
+        return None if cached is _NO_TEMPLATE else cached
+
+    row = db.query(
+        EmailTemplate.id,
+        EmailTemplate.template_type,
+        EmailTemplate.subject,
+        EmailTemplate.html_content,
+        EmailTemplate.updated_at,
+    ).filter(
+        EmailTemplate.template_type == template_type,
+        EmailTemplate.is_active == True
+    ).first()
+
+    template = CachedEmailTemplate(*row) if row else None
+    active_templates.set(template_type, template or _NO_TEMPLATE)
+    return template
+
+
+def invalidate_email_templates():
+    active_templates.clear()
+
+
+def clear_template_cache():
+    active_templates.clear()
+    compiled_templates.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, EmailTemplate):
+            invalidate_email_templates()
+            session.info["email_templates_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    # Una request concurrente pudo recargar el valor antiguo entre el flush y el commit
+    if session.info.pop("email_templates_changed", False):
+        invalidate_email_templates()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("email_templates_changed", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is EmailTemplate:
+        invalidate_email_templates()
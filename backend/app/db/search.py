@@ -0,0 +1,79 @@
+"""
+Búsqueda de texto indexable.
+
+Las búsquedas `ILIKE '%term%'` sobre varias columnas no pueden usar índices
+B-tree y obligan a PostgreSQL a recorrer la tabla entera. En su lugar, las
+tablas buscables tienen columnas generadas (STORED):
+
+- search_text: nombre, email, etc. concatenados y en minúsculas
+- phone_digits: el teléfono sin espacios, guiones, paréntesis, puntos ni '+'
+
+ambas con índice GIN pg_trgm (ver la migración add_search_trigram_indexes),
+que sí resuelve `LIKE '%term%'`. `text_search_filter` construye el filtro
+sobre esas columnas:
+
+    query = query.filter(text_search_filter(Lead.search_text, Lead.phone_digits, term))
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import or_
+
+
+# Separadores eliminados de los teléfonos, tanto al indexar como al buscar
+PHONE_SEPARATORS = (" ", "-", "(", ")", ".", "+", "/")
+_PHONE_TERM = re.compile(r"[\d\s\-().+/]+")
+
+
+def search_text_sql(*columns: str) -> str:
+    """Expresión SQL (portable e inmutable) de la columna generada search_text."""
+    parts = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"lower({parts})"
+
+
+def phone_digits_sql(column: str) -> str:
+    """Expresión SQL de la columna generada phone_digits."""
+    expression = column
+    for separator in PHONE_SEPARATORS:
+        expression = f"replace({expression}, '{separator}', '')"
+    return expression
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Deja solo los dígitos de un teléfono o de un término de búsqueda."""
+    return re.sub(r"\D", "", value or "")
+
+
+def _contains_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def is_phone_term(term: str) -> bool:
+    """True si el término solo contiene dígitos y separadores de teléfono."""
+    return bool(_PHONE_TERM.fullmatch(term)) and any(char.isdigit() for char in term)
+
+
+def text_search_filter(search_column, phone_column=None, term: str = ""):
+    """
+    Filtro de búsqueda por subcadena sobre columnas indexadas con pg_trgm.
+
+    Los términos con forma de teléfono ("600 12", "+34-600") se comparan
+    además, normalizados, con phone_digits.
+
+    Args:
+        search_column: Columna generada search_text del modelo
+        phone_column: Columna generada phone_digits (opcional)
+        term: Texto introducido por el usuario
+
+    Returns:
+        Expresión booleana para query.filter()
+    """
+    term = term.strip()
+    conditions = [search_column.like(_contains_pattern(term.lower()), escape="\\")]
+
+    if phone_column is not None and is_phone_term(term):
+        conditions.append(phone_column.like(_contains_pattern(normalize_phone(term)), escape="\\"))
+
+    return or_(*conditions)
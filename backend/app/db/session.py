@@ -1,12 +1,40 @@
+from typing import AsyncIterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
+
+def _pool_options(url: str) -> dict:
+    """Opciones de pool configurables (SQLite usa su propio pool y no las admite)."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def _connect_args(url: str, timeout: Optional[int]) -> dict:
+    """statement_timeout por conexión (None: el del servidor), según el driver de PostgreSQL."""
+    if timeout is None or not url.startswith("postgresql"):
+        return {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        return {"server_settings": {"statement_timeout": str(timeout)}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
+    echo=settings.DB_ECHO,
+    connect_args=_connect_args(settings.DATABASE_URL, settings.DB_STATEMENT_TIMEOUT_MS or None),
+    **_pool_options(settings.DATABASE_URL)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -20,3 +48,79 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ============================================
+# Engine de mantenimiento (scripts)
+# ============================================
+# DB_STATEMENT_TIMEOUT_MS protege a las requests. Los scripts de backfill,
+# fotos diarias, compactación y archivado recorren tablas enteras y usan
+# maintenance_session(): su engine fija statement_timeout = 0 para que
+# PostgreSQL no cancele la pasada a medias.
+
+_MaintenanceSessionLocal: Optional[sessionmaker] = None
+
+
+def maintenance_session() -> Session:
+    """Nueva sesión sin statement_timeout para scripts (crea el engine la primera vez)."""
+    global _MaintenanceSessionLocal
+    if _MaintenanceSessionLocal is None:
+        maintenance_engine = create_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=True,
+            echo=settings.DB_ECHO,
+            connect_args=_connect_args(settings.DATABASE_URL, 0)
+        )
+        _MaintenanceSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=maintenance_engine)
+    return _MaintenanceSessionLocal()
+
+
+# ============================================
+# Engine async (asyncpg)
+# ============================================
+# Se crea bajo demanda para que los scripts y workers síncronos no necesiten
+# el driver async. Las rutas async de lectura intensiva usan get_async_db y,
+# para reutilizar servicios escritos con Session, `await db.run_sync(fn)`.
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_database_url() -> str:
+    """ASYNC_DATABASE_URL o, por defecto, DATABASE_URL con el driver asyncpg."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        url = get_async_database_url()
+        _async_engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            echo=settings.DB_ECHO,
+            connect_args=_connect_args(url, settings.DB_STATEMENT_TIMEOUT_MS or None),
+            **_pool_options(url)
+        )
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    global _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _AsyncSessionLocal = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,9 +1,14 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from app.core.concurrency import configure_threadpool, run_blocking
 from app.core.config import settings
 from app.api.v1 import api_router
+from app.services.audit_writer import audit_writer
+from app.services.notification_stream import notification_broker
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,10 +18,25 @@ logger.info(f"=== CORS Configuration ===")
 logger.info(f"ALLOWED_ORIGINS: {settings.ALLOWED_ORIGINS}")
 logger.info(f"FRONTEND_URL: {settings.FRONTEND_URL}")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tamaño del threadpool de rutas/dependencias síncronas y de run_blocking
+    configure_threadpool()
+    audit_writer.start()
+    # LISTEN de eventos de notificaciones para GET /notifications/stream
+    await notification_broker.start()
+    yield
+    await notification_broker.stop()
+    # Escribir las entradas de auditoría pendientes antes de salir
+    await run_blocking(audit_writer.stop)
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS middleware - log allowed origins for debugging
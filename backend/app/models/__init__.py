@@ -4,15 +4,19 @@ from app.models.tenant import Tenant
 from app.models.user import User, UserRole
 from app.models.tenant_membership import TenantMembership
 from app.models.email_template import EmailTemplate, EmailTemplateType
+from app.models.email_outbox import EmailOutbox, EmailStatus
 from app.models.plan import Plan
 from app.models.system_config import SystemConfig
-from app.models.audit_log import AuditLog, AuditAction, AuditCategory
-from app.models.notification import Notification, NotificationType
+from app.models.audit_log import AuditLog, AuditDailyCounter, AuditAction, AuditCategory
+from app.models.notification import (
+    Notification, NotificationArchive, NotificationCounter, NotificationType,
+    NotificationBroadcast, NotificationBroadcastRead
+)
 
 # Lead Management System Models
 from app.models.lead import (
     Lead, LeadSource, LeadStatus, LeadPriority,
-    LeadInteraction, LeadAssignment
+    LeadInteraction, LeadAssignment, LeadDailyRollup
 )
 from app.models.service import (
     ServiceCategory, Service, ServicePackage, ServiceProvider
@@ -33,7 +37,8 @@ from app.models.commercial_objectives import (
 )
 from app.models.inventory import (
     InventoryCategory, InventoryProduct, UnitType, InventoryMovement, 
-    MovementType, ServiceProduct, AppointmentInventoryUsage, InventoryAlert
+    MovementType, ServiceProduct, AppointmentInventoryUsage, InventoryAlert,
+    InventoryDailySnapshot
 )
 # from app.models.consent import (
 #     ConsentTemplate, ConsentStatus, ConsentAssignment, ConsentAssignmentStatus, ConsentAuditLog
@@ -50,12 +55,19 @@ __all__ = [
     "TenantMembership",
     "EmailTemplate",
     "EmailTemplateType",
+    "EmailOutbox",
+    "EmailStatus",
     "Plan",
     "SystemConfig",
     "AuditLog",
+    "AuditDailyCounter",
     "AuditAction",
     "AuditCategory",
     "Notification",
+    "NotificationArchive",
+    "NotificationCounter",
+    "NotificationBroadcast",
+    "NotificationBroadcastRead",
     "NotificationType",
     
     # Lead Management Models
@@ -65,6 +77,7 @@ __all__ = [
     "LeadPriority",
     "LeadInteraction",
     "LeadAssignment",
+    "LeadDailyRollup",
     
     # Service Models
     "ServiceCategory",
@@ -107,6 +120,7 @@ __all__ = [
     "ServiceProduct",
     "AppointmentInventoryUsage",
     "InventoryAlert",
+    "InventoryDailySnapshot",
     
     # Consent Models (disabled)
     # "ConsentTemplate",
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text, Integer, Float
+from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text, Integer, Float, Index, Computed
 from sqlalchemy.dialects.postgresql import UUID, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from datetime import datetime, timedelta
 import enum
 
+from app.db.search import phone_digits_sql, search_text_sql
 from app.db.session import Base
 
 
@@ -117,6 +118,10 @@ class Appointment(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Búsqueda indexada con pg_trgm (ver app.db.search)
+    search_text = deferred(Column(Text, Computed(search_text_sql("patient_name", "patient_email", "notes"), persisted=True)))
+    phone_digits = deferred(Column(String(50), Computed(phone_digits_sql("patient_phone"), persisted=True)))
+
     # Relationships
     tenant = relationship("Tenant")
     lead = relationship("Lead", back_populates="appointments")
@@ -127,6 +132,15 @@ class Appointment(Base):
     rescheduled_from = relationship("Appointment", remote_side=[id])
     treatment = relationship("Treatment", back_populates="appointment", uselist=False)
 
+    __table_args__ = (
+        # Paginación por cursor del listado (ver app.core.pagination)
+        Index("ix_appointments_tenant_scheduled_id", "tenant_id", "scheduled_at", "id"),
+        Index("ix_appointments_search_text_trgm", "search_text",
+              postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}),
+        Index("ix_appointments_phone_digits_trgm", "phone_digits",
+              postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+    )
+
     def __repr__(self):
         return f"<Appointment {self.patient_name} - {self.scheduled_at.strftime('%Y-%m-%d %H:%M')}>"
 
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Date, Integer, Text, ForeignKey, Index, func, literal_column
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -10,7 +10,8 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Part of the primary key because the table is range-partitioned by month on it
+    timestamp = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False, index=True)
 
     # Who performed the action
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
@@ -38,6 +39,51 @@ class AuditLog(Base):
     user = relationship("User", foreign_keys=[user_id])
     tenant = relationship("Tenant", foreign_keys=[tenant_id])
 
+    __table_args__ = (
+        # Cursor pagination of the log listings (see app.core.pagination)
+        Index("ix_audit_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_audit_logs_tenant_timestamp_id", "tenant_id", "timestamp", "id"),
+        # Monthly partitions are managed by app.services.audit_partitions
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+
+# Stands in for a NULL tenant_id in the audit_daily_counters unique key
+NO_TENANT_KEY = "00000000-0000-0000-0000-000000000000"
+
+
+class AuditDailyCounter(Base):
+    """
+    Number of audit log entries per tenant, day, category and action.
+
+    Maintained by the audit writer in the same transaction as the entries
+    (see app.services.audit_stats) so the stats endpoints never scan
+    audit_logs. Counters outlive archived partitions. There is exactly one
+    row per key (platform-wide counters use a NULL tenant_id, hence the
+    coalesce in the unique index); writers upsert into it. Deleting a
+    tenant deletes its counters rather than folding them into the
+    platform-wide rows.
+    """
+    __tablename__ = "audit_daily_counters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=True)
+    day = Column(Date, nullable=False)
+    category = Column(String(30), nullable=False)
+    action = Column(String(50), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "uq_audit_daily_counters_key",
+            func.coalesce(tenant_id, literal_column(f"'{NO_TENANT_KEY}'")), day, category, action,
+            unique=True
+        ),
+        Index("ix_audit_daily_counters_tenant_day", "tenant_id", "day"),
+        Index("ix_audit_daily_counters_day", "day"),
+    )
+
 
 # Action constants
 class AuditAction:
@@ -0,0 +1,48 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.session import Base
+
+
+class EmailStatus:
+    PENDING = "pending"    # Waiting for next_attempt_at
+    SENDING = "sending"    # Claimed by a worker
+    SENT = "sent"
+    FAILED = "failed"      # Permanent error or attempts exhausted
+
+
+class EmailOutbox(Base):
+    """
+    Outgoing email queued by app.core.email.send_email.
+
+    Request handlers only insert the row; email_worker.py claims due rows,
+    delivers them grouped by SMTP server and reschedules failures with
+    exponential backoff (see app.services.email_outbox).
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Tenant whose SMTP settings are used (null = global MAIL_* settings)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="SET NULL"), nullable=True)
+
+    email_to = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    html_content = Column(Text, nullable=False)
+    text_content = Column(Text, nullable=True)
+
+    # Delivery state
+    status = Column(String(20), nullable=False, default=EmailStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)  # When a worker claimed it
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Worker polling: due rows by status
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -2,7 +2,7 @@
 Modelos para el sistema de inventario médico
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Float, Boolean, Date, DateTime, Text, ForeignKey, Enum, Index, and_
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -92,6 +92,21 @@ class InventoryProduct(Base):
     service_products = relationship("ServiceProduct", back_populates="product")
     appointment_usages = relationship("AppointmentInventoryUsage", back_populates="product")
 
+    __table_args__ = (
+        # Solo los productos activos bajo mínimo (GET /inventory/low-stock-alerts/)
+        Index(
+            "ix_inventory_products_low_stock", "tenant_id", "current_stock",
+            postgresql_where=and_(current_stock <= minimum_stock, is_active == True),
+            sqlite_where=and_(current_stock <= minimum_stock, is_active == True)
+        ),
+        # Productos activos con vencimiento (barrido de caducidad y GET /inventory/expiring/)
+        Index(
+            "ix_inventory_products_expiration", "tenant_id", "expiration_date",
+            postgresql_where=and_(expiration_date.isnot(None), is_active == True),
+            sqlite_where=and_(expiration_date.isnot(None), is_active == True)
+        ),
+    )
+
     @property
     def is_low_stock(self) -> bool:
         """Verifica si el stock está bajo"""
@@ -153,6 +168,11 @@ class InventoryMovement(Base):
     appointment = relationship("Appointment")
     user = relationship("User")
 
+    __table_args__ = (
+        # Paginación por cursor del listado (ver app.core.pagination)
+        Index("ix_inventory_movements_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
+
 
 class ServiceProduct(Base):
     """Relación entre servicios médicos y productos de inventario"""
@@ -229,4 +249,31 @@ class InventoryAlert(Base):
     # Relationships
     tenant = relationship("Tenant")
     product = relationship("InventoryProduct")
-    acknowledged_by = relationship("User")
\ No newline at end of file
+    acknowledged_by = relationship("User")
+
+
+class InventoryDailySnapshot(Base):
+    """
+    Foto diaria de cada producto: stock y valor al cierre del día y unidades
+    consumidas en citas durante ese día. La escribe el job nocturno
+    snapshot_inventory.py (ver app.services.inventory_snapshots); el día en
+    curso se completa con los movimientos posteriores a la última foto.
+    """
+    __tablename__ = "inventory_daily_snapshots"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("inventory_products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
+
+    stock = Column(Integer, nullable=False)  # Stock al cierre del día
+    inventory_value = Column(Float, nullable=False, default=0)  # stock * cost_per_unit
+    usage_out = Column(Integer, nullable=False, default=0)  # Unidades usadas (MovementType.OUT_USAGE)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    product = relationship("InventoryProduct")
+
+    __table_args__ = (
+        Index("ix_inventory_daily_snapshots_tenant_day", "tenant_id", "day"),
+    )
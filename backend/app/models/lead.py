@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text, Integer, Float
+from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, Date, ForeignKey, Text, Integer, Float, Index, Computed, func, literal_column
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from datetime import datetime
 import enum
 
+from app.db.search import phone_digits_sql, search_text_sql
 from app.db.session import Base
 
 
@@ -156,6 +157,10 @@ class Lead(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Búsqueda indexada con pg_trgm (ver app.db.search)
+    search_text = deferred(Column(Text, Computed(search_text_sql("first_name", "last_name", "email"), persisted=True)))
+    phone_digits = deferred(Column(String(50), Computed(phone_digits_sql("phone"), persisted=True)))
+
     # Relationships
     tenant = relationship("Tenant", back_populates="leads")
     assigned_to = relationship("User", foreign_keys=[assigned_to_id])
@@ -168,6 +173,15 @@ class Lead(Base):
     patient_user = relationship("User", foreign_keys=[patient_user_id])
     converted_by = relationship("User", foreign_keys=[converted_by_id])
 
+    __table_args__ = (
+        # Paginación por cursor del listado (ver app.core.pagination)
+        Index("ix_leads_tenant_created_id", "tenant_id", "created_at", "id"),
+        Index("ix_leads_search_text_trgm", "search_text",
+              postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}),
+        Index("ix_leads_phone_digits_trgm", "phone_digits",
+              postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+    )
+
     def __repr__(self):
         return f"<Lead {self.first_name} {self.last_name} ({self.status.value})>"
 
@@ -296,4 +310,57 @@ class LeadAssignment(Base):
     assigned_by = relationship("User", foreign_keys=[assigned_by_id])
 
     def __repr__(self):
-        return f"<LeadAssignment {self.lead.full_name} -> {self.assigned_to.full_name}>"
\ No newline at end of file
+        return f"<LeadAssignment {self.lead.full_name} -> {self.assigned_to.full_name}>"
+
+
+# Sustituye al assigned_to_id NULL (sin asignar) en la clave única de lead_daily_rollups
+UNASSIGNED_KEY = "00000000-0000-0000-0000-000000000000"
+
+
+class LeadDailyRollup(Base):
+    """
+    Agregado diario materializado de leads.
+    Cada fila cuenta los leads activos creados en `day` que actualmente
+    tienen ese estado, fuente, prioridad y asignación. Se mantiene de forma
+    incremental desde los endpoints de leads (ver app.services.lead_rollups)
+    y alimenta los endpoints /leads/stats/* sin recorrer la tabla leads.
+    Hay una sola fila por bucket (índice único, con los leads sin asignar
+    agrupados mediante coalesce) y los endpoints la actualizan con upsert;
+    los buckets que se quedan sin leads se borran.
+    """
+    __tablename__ = "lead_daily_rollups"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    # Clave del agregado
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)  # Día de creación de los leads
+    status = Column(SQLEnum(LeadStatus), nullable=False)
+    source = Column(SQLEnum(LeadSource), nullable=False)
+    priority = Column(SQLEnum(LeadPriority), nullable=False)
+    # Al borrar un usuario sus buckets se funden antes con los de "sin asignar"
+    # (unassign_lead_rollups); SET NULL solo cubre borrados que no pasan por ahí
+    assigned_to_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Métricas acumuladas
+    lead_count = Column(Integer, default=0, nullable=False)
+    converted_count = Column(Integer, default=0, nullable=False)  # Leads con conversion_date
+    lead_score_sum = Column(Integer, default=0, nullable=False)
+    scored_count = Column(Integer, default=0, nullable=False)  # Leads con lead_score (divisor de la media)
+    conversion_days_sum = Column(Float, default=0, nullable=False)  # Días creación -> conversión
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "uq_lead_daily_rollups_bucket",
+            tenant_id, day, status, source, priority,
+            func.coalesce(assigned_to_id, literal_column(f"'{UNASSIGNED_KEY}'")),
+            unique=True
+        ),
+        Index("ix_lead_daily_rollups_tenant_day", "tenant_id", "day"),
+        Index("ix_lead_daily_rollups_tenant_assignee_day", "tenant_id", "assigned_to_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<LeadDailyRollup {self.day} {self.status.value} x{self.lead_count}>"
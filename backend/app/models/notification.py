@@ -12,7 +12,7 @@ Cada notificación pertenece a un usuario específico y a un tenant (si aplica).
 """
 
 import enum
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Text, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -57,8 +57,9 @@ class Notification(Base):
         tenant: Tenant al que pertenece (opcional)
 
     Índices:
-        - (user_id, is_read): Para consultas rápidas de notificaciones no leídas
-        - (user_id, created_at): Para listado ordenado cronológicamente
+        - (user_id, is_read, created_at): Listado y recuento de no leídas del usuario
+        - (user_id, created_at, id): Listado ordenado cronológicamente (paginación por cursor)
+        - (created_at): Para la compactación por antigüedad (ver app.services.notification_retention)
         - (tenant_id): Para filtrado por tenant
 
     Ejemplos de uso:
@@ -84,10 +85,10 @@ class Notification(Base):
     """
     __tablename__ = "notifications"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     # Usuario destinatario (requerido)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     # Tenant (puede ser NULL para notificaciones de superadmin)
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=True, index=True)
@@ -125,7 +126,6 @@ class Notification(Base):
         Boolean,
         default=False,
         nullable=False,
-        index=True,
         comment="Indica si la notificación fue leída por el usuario"
     )
 
@@ -148,6 +148,13 @@ class Notification(Base):
     user = relationship("User", back_populates="notifications")
     tenant = relationship("Tenant", back_populates="notifications")
 
+    __table_args__ = (
+        # Paginación por cursor de la bandeja del usuario (ver app.core.pagination)
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
+        # Filtro unread_only y recuentos sin leer la tabla
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
+
     def __repr__(self):
         """Representación en string del modelo."""
         read_status = "leída" if self.is_read else "no leída"
@@ -158,3 +165,97 @@ class Notification(Base):
         if not self.is_read:
             self.is_read = True
             self.read_at = datetime.utcnow()
+
+
+class NotificationArchive(Base):
+    """
+    Notificaciones leídas antiguas, movidas fuera de notifications por la
+    compactación (ver app.services.notification_retention) para que la
+    bandeja del usuario no recorra el histórico. Se eliminan al superar
+    NOTIFICATION_RETENTION_DAYS.
+    """
+    __tablename__ = "notifications_archive"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="SET NULL"), nullable=True)
+    type = Column(SQLEnum(NotificationType, name="notificationtype"), nullable=False)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    action_url = Column(String(500), nullable=True)
+    read_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notifications_archive_user_created", "user_id", "created_at"),
+        Index("ix_notifications_archive_created", "created_at"),
+    )
+
+
+class NotificationCounter(Base):
+    """
+    Contador de notificaciones no leídas por usuario.
+
+    El badge (/notifications/count, /notifications/stream) lo lee por clave
+    primaria en lugar de contar filas de notifications. Se actualiza en la
+    misma transacción que las notificaciones (ver app.core.notifications):
+    los flush del ORM que crean, borran o cambian is_read ajustan el
+    contador, y las operaciones masivas (mark_all_as_read) lo ajustan con
+    el número de filas afectadas.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<NotificationCounter user_id={self.user_id} unread={self.unread_count}>"
+
+
+class NotificationBroadcast(Base):
+    """
+    Aviso para todos los miembros de un tenant (anuncios generales).
+
+    Se guarda una sola fila por aviso en lugar de una Notification por
+    usuario; la lectura de cada usuario se registra en
+    NotificationBroadcastRead. Lo ven los miembros que ya pertenecían al
+    tenant cuando se creó (ver app.core.notifications.create_tenant_broadcast).
+    No se suma a notification_counters: los no leídos del tenant actual se
+    cuentan al leer el badge con ix_notification_broadcasts_tenant_created.
+    """
+    __tablename__ = "notification_broadcasts"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    type = Column(SQLEnum(NotificationType, name="notificationtype"), nullable=False, default=NotificationType.INFO)
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    action_url = Column(String(500), nullable=True)
+    created_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notification_broadcasts_tenant_created", "tenant_id", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<NotificationBroadcast {self.type.value}: '{self.title}' para tenant_id={self.tenant_id}>"
+
+
+class NotificationBroadcastRead(Base):
+    """Confirmación de lectura de un NotificationBroadcast por un usuario."""
+    __tablename__ = "notification_broadcast_reads"
+
+    broadcast_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("notification_broadcasts.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    read_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notification_broadcast_reads_user", "user_id"),
+    )
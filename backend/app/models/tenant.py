@@ -86,6 +86,7 @@ class Tenant(Base):
     medical_records = relationship("MedicalRecord", cascade="all, delete-orphan")
     medical_histories = relationship("MedicalHistory", back_populates="tenant", cascade="all, delete-orphan")
     medical_attachments = relationship("MedicalAttachment", back_populates="tenant", cascade="all, delete-orphan")
+    lead_daily_rollups = relationship("LeadDailyRollup", cascade="all, delete-orphan", passive_deletes=True)
     
     # Inventory System Relationships
     inventory_categories = relationship("InventoryCategory", back_populates="tenant", cascade="all, delete-orphan")
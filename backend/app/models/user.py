@@ -1,11 +1,12 @@
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Text, Index, Computed
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from datetime import datetime
 import enum
 from typing import Optional, ClassVar, Any, TYPE_CHECKING
 
+from app.db.search import search_text_sql
 from app.db.session import Base
 
 if TYPE_CHECKING:
@@ -90,6 +91,14 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    # Búsqueda indexada con pg_trgm (ver app.db.search)
+    search_text = deferred(Column(Text, Computed(search_text_sql("first_name", "last_name", "full_name", "email"), persisted=True)))
+
+    __table_args__ = (
+        Index("ix_users_search_text_trgm", "search_text",
+              postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}),
+    )
+
     # Relationships
     tenant = relationship("Tenant", back_populates="users")
     notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
@@ -35,10 +35,11 @@ class AuditLogResponse(AuditLogBase):
 
 class AuditLogListResponse(BaseModel):
     items: list[AuditLogResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class AuditLogFilter(BaseModel):
@@ -55,5 +56,6 @@ class AuditStats(BaseModel):
     total_logs: int
     logins_today: int
     failed_logins_today: int
+    logs_last_7_days: int = 0
     actions_by_category: dict[str, int]
     recent_critical_actions: list[AuditLogResponse]
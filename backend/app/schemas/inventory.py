@@ -145,6 +145,20 @@ class InventoryProductWithStats(InventoryProduct):
     days_until_expiry: Optional[int] = None
 
 
+class ExpiringProduct(BaseModel):
+    """Producto activo próximo a vencer o vencido (GET /inventory/expiring/)"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    name: str
+    sku: Optional[str] = None
+    current_stock: int
+    unit_type: UnitTypeEnum
+    expiration_date: datetime
+    days_until_expiry: int
+    is_expired: bool
+
+
 # InventoryMovement Schemas
 class InventoryMovementBase(BaseModel):
     product_id: UUID
@@ -268,6 +282,15 @@ class InventoryAlert(InventoryAlertBase):
 
 
 # Schemas para reportes y estadísticas
+class StockoutProjection(BaseModel):
+    """Días hasta agotar stock al consumo medio de los últimos 30 días"""
+    product_id: UUID
+    product_name: str
+    current_stock: int
+    avg_daily_usage: float
+    days_until_stockout: int
+
+
 class InventoryStats(BaseModel):
     """Estadísticas generales del inventario"""
     total_products: int
@@ -279,6 +302,7 @@ class InventoryStats(BaseModel):
     total_inventory_value: float
     most_used_products: List[dict]
     recent_movements: List[dict]
+    stockout_projection: List[StockoutProjection] = []
 
 
 class LowStockAlert(BaseModel):
@@ -149,10 +149,11 @@ class LeadWithTenant(Lead):
 # Schema for lead list response with pagination
 class LeadListResponse(BaseModel):
     items: List[Lead]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 # ============================================
@@ -274,6 +275,9 @@ class LeadFilters(BaseModel):
     # Paginación
     page: int = Field(1, ge=1, description="Número de página")
     page_size: int = Field(20, ge=1, le=100, description="Elementos por página")
+    pagination: str = Field("offset", pattern="^(offset|cursor)$", description="Paginación por página u opaca por cursor")
+    cursor: Optional[str] = Field(None, description="next_cursor de la página anterior (activa el modo cursor)")
+    count_mode: str = Field("exact", pattern="^(exact|estimated|none)$", description="Conteo exacto, estimado o sin total")
 
 
 # ============================================
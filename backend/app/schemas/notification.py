@@ -147,13 +147,70 @@ class NotificationList(BaseModel):
         ...,
         description="Lista de notificaciones"
     )
-    total: int = Field(
-        ...,
+    total: Optional[int] = Field(
+        None,
         ge=0,
-        description="Total de notificaciones del usuario"
+        description="Total de notificaciones del usuario (None con count_mode=none)"
     )
     unread_count: int = Field(
         ...,
         ge=0,
         description="Cantidad de notificaciones no leídas"
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Cursor de la siguiente página (solo en paginación por cursor)"
+    )
+
+
+class NotificationBroadcastCreate(NotificationBase):
+    """
+    Schema para publicar un aviso a todo el tenant.
+
+    Ejemplo:
+        {
+            "type": "warning",
+            "title": "Mantenimiento programado",
+            "message": "El sistema no estará disponible el domingo de 8:00 a 9:00"
+        }
+    """
+    pass
+
+
+class NotificationBroadcast(NotificationBase):
+    """
+    Schema para leer un aviso del tenant.
+
+    Un único registro por aviso; is_read/read_at corresponden al usuario
+    que consulta (confirmación de lectura).
+    """
+    id: UUID
+    tenant_id: UUID
+    broadcast: bool = True
+    is_read: bool = False
+    read_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class NotificationBroadcastList(BaseModel):
+    """
+    Schema para la lista paginada de avisos del tenant.
+
+    Ejemplo de respuesta:
+        {
+            "broadcasts": [...],
+            "total": 3
+        }
+    """
+    broadcasts: list[NotificationBroadcast] = Field(
+        ...,
+        description="Avisos del tenant, más recientes primero"
+    )
+    total: int = Field(
+        ...,
+        ge=0,
+        description="Total de avisos visibles para el usuario"
+    )
@@ -0,0 +1,245 @@
+"""
+Audit Log Partitions
+
+En PostgreSQL audit_logs está particionada por rango mensual de
+`timestamp` (ver la migración partition_audit_logs):
+
+- audit_logs_pYYYY_MM: una partición por mes, [día 1, día 1 del mes siguiente)
+- audit_logs_default: recoge lo que no cae en ningún mes creado; debería
+  estar vacía si el mantenimiento se ejecuta con regularidad
+
+`ensure_audit_partitions` crea las particiones del mes actual y de los
+AUDIT_PARTITION_MONTHS_AHEAD siguientes; `archive_audit_partitions` exporta
+a disco (JSONL comprimido o Parquet) las particiones más antiguas que
+AUDIT_RETENTION_MONTHS y después las separa y elimina. Ambas se ejecutan
+desde manage_audit_partitions.py (cron diario o mensual).
+
+Las consultas con filtro de fechas sobre `timestamp` solo leen las
+particiones del rango (partition pruning).
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_logs"
+DEFAULT_PARTITION = "audit_logs_default"
+_PARTITION_NAME = re.compile(r"^audit_logs_p(\d{4})_(\d{2})$")
+ARCHIVE_FORMATS = ("jsonl", "parquet")
+
+
+@dataclass
+class AuditPartition:
+    name: str
+    month: date  # primer día del mes
+
+    @property
+    def upper_bound(self) -> date:
+        return add_months(self.month, 1)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def _require_postgresql(db: Session):
+    if db.get_bind().dialect.name != "postgresql":
+        raise RuntimeError("audit_logs partitioning requires PostgreSQL")
+
+
+def list_audit_partitions(db: Session) -> List[AuditPartition]:
+    """Particiones mensuales adjuntas a audit_logs, de la más antigua a la más reciente."""
+    _require_postgresql(db)
+    names = db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars()
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append(AuditPartition(name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition.month)
+
+
+def create_month_partition(db: Session, month: date) -> str:
+    """
+    Crea la partición de un mes. Si la partición por defecto ya tiene filas
+    de ese mes, se mueven a la nueva antes de adjuntarla (PostgreSQL no
+    permite crear una partición que solape con filas de la default).
+    """
+    name = partition_name(month)
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+
+    db.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE timestamp >= :lower AND timestamp < :upper
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    db.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['lower']}') TO ('{bounds['upper']}')"
+    ))
+    return name
+
+
+def ensure_audit_partitions(db: Session, months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Crea las particiones que falten desde el mes actual hasta months_ahead
+    meses después. Devuelve los nombres creados.
+    """
+    _require_postgresql(db)
+    months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or datetime.utcnow().date())
+
+    existing = {partition.month for partition in list_audit_partitions(db)}
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(create_month_partition(db, month))
+    db.commit()
+    return created
+
+
+def _row_to_json(row) -> str:
+    return json.dumps(
+        {key: (value.isoformat() if isinstance(value, datetime) else value) for key, value in row.items()},
+        default=str,
+        ensure_ascii=False,
+    )
+
+
+def export_partition(db: Session, partition: AuditPartition, archive_dir: str, fmt: str = "jsonl") -> tuple:
+    """
+    Vuelca una partición a archive_dir en streaming (cursor de servidor).
+
+    Returns:
+        (ruta del fichero, filas exportadas)
+    """
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    os.makedirs(archive_dir, exist_ok=True)
+    suffix = "jsonl.gz" if fmt == "jsonl" else "parquet"
+    path = os.path.join(archive_dir, f"{partition.name}.{suffix}")
+    tmp_path = f"{path}.tmp"
+
+    result = db.execute(
+        text(f"SELECT * FROM {partition.name} ORDER BY timestamp, id").execution_options(
+            stream_results=True, yield_per=5000
+        )
+    )
+
+    rows = 0
+    if fmt == "jsonl":
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as archive:
+            for row in result.mappings():
+                archive.write(_row_to_json(row) + "\n")
+                rows += 1
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+        writer = None
+        try:
+            for chunk in result.mappings().partitions():
+                records = [{key: (str(value) if key in ("id", "user_id", "tenant_id") and value else value)
+                            for key, value in row.items()} for row in chunk]
+                table = pa.Table.from_pylist(records)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+                writer.write_table(table)
+                rows += len(records)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            # Partición vacía: fichero con el esquema mínimo para dejar constancia
+            pq.write_table(pa.table({"id": pa.array([], pa.string())}), tmp_path)
+
+    os.replace(tmp_path, path)
+    return path, rows
+
+
+def archive_audit_partitions(
+    db: Session,
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    fmt: str = "jsonl",
+    today: Optional[date] = None,
+    dry_run: bool = False,
+) -> List[dict]:
+    """
+    Exporta, separa (DETACH) y elimina las particiones anteriores a la
+    retención. Una partición solo se elimina si su exportación terminó y
+    contiene todas sus filas.
+
+    Args:
+        retention_months: Meses completos que se conservan además del actual
+        archive_dir: Directorio de los ficheros de archivo
+        fmt: "jsonl" (gzip) o "parquet"
+        dry_run: Solo informa de qué particiones se archivarían
+
+    Returns:
+        Lista de {"partition", "path", "rows"} por partición archivada
+    """
+    _require_postgresql(db)
+    retention_months = settings.AUDIT_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+
+    archived = []
+    for partition in list_audit_partitions(db):
+        if partition.upper_bound > cutoff:
+            continue
+        if dry_run:
+            archived.append({"partition": partition.name, "path": None, "rows": None})
+            continue
+
+        expected = db.execute(text(f"SELECT count(*) FROM {partition.name}")).scalar()
+        path, rows = export_partition(db, partition, archive_dir, fmt)
+        if rows != expected:
+            raise RuntimeError(
+                f"{partition.name}: exported {rows} rows but the partition has {expected}; not dropping it"
+            )
+
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}"))
+        db.execute(text(f"DROP TABLE {partition.name}"))
+        db.commit()
+        logger.info("Archived %s (%d rows) to %s", partition.name, rows, path)
+        archived.append({"partition": partition.name, "path": path, "rows": rows})
+    return archived
@@ -0,0 +1,208 @@
+"""
+Audit Statistics
+
+Contadores de auditoría por (tenant, día, categoría, acción) en la tabla
+audit_daily_counters y cálculo de /audit-logs/stats a partir de ellos.
+
+Toda escritura de audit_logs pasa por `record_audit_counts` en la misma
+transacción (audit writer y create_audit_log con sync=True), de modo que
+las estadísticas no recorren audit_logs:
+
+    db.execute(insert(AuditLog), rows)
+    record_audit_counts(db, rows)
+    db.commit()
+
+`rebuild_audit_counters` recalcula los contadores desde audit_logs
+(backfill o reparación). Los meses ya archivados no están en audit_logs,
+así que conviene limitar el recálculo con `since`.
+"""
+
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import desc, func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import NO_TENANT_KEY, AuditAction, AuditDailyCounter, AuditLog
+from app.schemas.audit_log import AuditLogResponse, AuditStats
+
+
+# Acciones destacadas en recent_critical_actions
+CRITICAL_ACTIONS = [
+    AuditAction.TENANT_CREATED,
+    AuditAction.TENANT_DELETED,
+    AuditAction.TENANT_SUSPENDED,
+    AuditAction.USER_DELETED,
+    AuditAction.SYSTEM_CONFIG_CHANGED,
+    AuditAction.PLAN_CHANGED,
+]
+
+# Para tenants se excluyen acciones solo visibles para el superadmin
+TENANT_IMPORTANT_ACTIONS = [
+    AuditAction.USER_CREATED,
+    AuditAction.USER_DELETED,
+    AuditAction.USER_ACTIVATED,
+    AuditAction.USER_DEACTIVATED,
+    AuditAction.PASSWORD_CHANGED,
+    AuditAction.LOGIN_FAILED,  # Security concern
+]
+
+
+def record_audit_counts(db: Session, rows: Iterable[dict]):
+    """
+    Suma a los contadores las entradas de audit_logs de `rows`.
+
+    Un único INSERT ... ON CONFLICT DO UPDATE por lote: el índice único de
+    (tenant, día, categoría, acción) garantiza una sola fila por contador
+    aunque dos transacciones creen el mismo a la vez.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (no hace commit)
+        rows: Valores de las filas insertadas (tenant_id, timestamp, category, action)
+    """
+    counts = Counter(
+        (row.get("tenant_id"), row["timestamp"].date(), row["category"], row["action"])
+        for row in rows
+    )
+    if not counts:
+        return
+
+    table = AuditDailyCounter.__table__
+    now = datetime.utcnow()
+    # Orden fijo de claves: dos transacciones no se bloquean en orden inverso
+    keys = sorted(counts, key=lambda key: tuple(str(part) for part in key))
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(table).values([
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant_id,
+            "day": day,
+            "category": category,
+            "action": action,
+            "count": counts[(tenant_id, day, category, action)],
+            "updated_at": now,
+        }
+        for tenant_id, day, category, action in keys
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            func.coalesce(table.c.tenant_id, literal_column(f"'{NO_TENANT_KEY}'")),
+            table.c.day,
+            table.c.category,
+            table.c.action,
+        ],
+        set_={"count": table.c.count + statement.excluded.count, "updated_at": now}
+    )
+    db.execute(statement)
+
+
+def rebuild_audit_counters(db: Session, tenant_id: Optional[UUID] = None, since: Optional[date] = None) -> int:
+    """
+    Recalcula audit_daily_counters desde audit_logs.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        tenant_id: Limita el recálculo a un tenant (opcional)
+        since: Solo recalcula desde ese día (conserva los contadores anteriores,
+            p. ej. de particiones ya archivadas)
+
+    Returns:
+        int: Número de contadores generados
+    """
+    delete_query = db.query(AuditDailyCounter)
+    logs_filter = []
+    if tenant_id is not None:
+        delete_query = delete_query.filter(AuditDailyCounter.tenant_id == tenant_id)
+        logs_filter.append(AuditLog.tenant_id == tenant_id)
+    if since is not None:
+        delete_query = delete_query.filter(AuditDailyCounter.day >= since)
+        logs_filter.append(AuditLog.timestamp >= datetime.combine(since, datetime.min.time()))
+    delete_query.delete(synchronize_session=False)
+
+    day = func.date(AuditLog.timestamp)
+    rows = db.query(
+        AuditLog.tenant_id, day, AuditLog.category, AuditLog.action, func.count()
+    ).filter(*logs_filter).group_by(
+        AuditLog.tenant_id, day, AuditLog.category, AuditLog.action
+    ).yield_per(5000)
+
+    counters = 0
+    for row in rows:
+        row_day = row[1] if isinstance(row[1], date) else date.fromisoformat(str(row[1]))
+        db.add(AuditDailyCounter(
+            tenant_id=row[0], day=row_day, category=row[2], action=row[3], count=row[4]
+        ))
+        counters += 1
+
+    db.commit()
+    return counters
+
+
+def compute_audit_stats(
+    db: Session,
+    tenant_id: Optional[UUID] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    recent_actions: Optional[List[str]] = None,
+) -> AuditStats:
+    """
+    Estadísticas de auditoría desde audit_daily_counters.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy
+        tenant_id: Tenant a consultar (None = toda la plataforma)
+        start_date, end_date: Rango de total_logs / actions_by_category
+            (granularidad de día)
+        recent_actions: Acciones listadas en recent_critical_actions
+
+    Returns:
+        AuditStats
+    """
+    scope = [AuditDailyCounter.tenant_id == tenant_id] if tenant_id is not None else []
+    range_filters = list(scope)
+    if start_date:
+        range_filters.append(AuditDailyCounter.day >= start_date.date())
+    if end_date:
+        range_filters.append(AuditDailyCounter.day <= end_date.date())
+
+    # Total y desglose por categoría en una sola consulta
+    category_counts = db.query(
+        AuditDailyCounter.category, func.sum(AuditDailyCounter.count)
+    ).filter(*range_filters).group_by(AuditDailyCounter.category).all()
+    actions_by_category = {category: int(count) for category, count in category_counts}
+
+    today = datetime.utcnow().date()
+    login_counts = dict(db.query(
+        AuditDailyCounter.action, func.sum(AuditDailyCounter.count)
+    ).filter(
+        *scope,
+        AuditDailyCounter.day == today,
+        AuditDailyCounter.action.in_([AuditAction.LOGIN_SUCCESS, AuditAction.LOGIN_FAILED])
+    ).group_by(AuditDailyCounter.action).all())
+
+    week_total = db.query(func.coalesce(func.sum(AuditDailyCounter.count), 0)).filter(
+        *scope, AuditDailyCounter.day > today - timedelta(days=7)
+    ).scalar()
+
+    # Últimas acciones relevantes: índice por timestamp, solo las particiones recientes
+    recent_query = db.query(AuditLog).filter(AuditLog.action.in_(recent_actions or CRITICAL_ACTIONS))
+    if tenant_id is not None:
+        recent_query = recent_query.filter(AuditLog.tenant_id == tenant_id)
+    if start_date:
+        recent_query = recent_query.filter(AuditLog.timestamp >= start_date)
+    if end_date:
+        recent_query = recent_query.filter(AuditLog.timestamp <= end_date)
+    recent = recent_query.order_by(desc(AuditLog.timestamp)).limit(10).all()
+
+    return AuditStats(
+        total_logs=sum(actions_by_category.values()),
+        logins_today=int(login_counts.get(AuditAction.LOGIN_SUCCESS, 0)),
+        failed_logins_today=int(login_counts.get(AuditAction.LOGIN_FAILED, 0)),
+        logs_last_7_days=int(week_total),
+        actions_by_category=actions_by_category,
+        recent_critical_actions=[AuditLogResponse.model_validate(log) for log in recent],
+    )
@@ -0,0 +1,150 @@
+"""
+Audit Log Writer
+
+Escritura en segundo plano de audit_logs.
+
+`create_audit_log` ya no hace commit en la sesión de la request: construye
+la fila (con id y timestamp del momento del evento) y la deja en una cola
+en memoria. Un hilo del proceso la vacía por lotes con un INSERT
+multi-fila (y actualiza audit_daily_counters en la misma transacción)
+cuando se acumulan AUDIT_BATCH_SIZE entradas o, como tarde, cada
+AUDIT_FLUSH_INTERVAL_SECONDS:
+
+    audit_writer.start()      # lifespan de la app
+    audit_writer.submit(row)  # True si quedó encolada
+    audit_writer.stop()       # al apagar: vacía la cola antes de salir
+
+Si el writer no está arrancado (scripts, workers) o la cola está llena,
+`submit` devuelve False y el llamador escribe en síncrono, así que ninguna
+entrada se descarta. Las acciones que necesitan la escritura garantizada
+antes de responder usan `create_audit_log(..., sync=True)`.
+"""
+
+import logging
+import queue
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+from app.services.audit_stats import record_audit_counts
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Cola de entradas de auditoría con volcado por lotes en un hilo propio."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = settings.AUDIT_QUEUE_MAX_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Detiene el hilo y escribe lo que quede en la cola."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def submit(self, row: dict) -> bool:
+        """Encola una fila de audit_logs; False si hay que escribirla en síncrono."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Audit queue full (%d entries); writing synchronously", self._queue.qsize())
+            return False
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Escribe ya todas las entradas pendientes. Devuelve cuántas se escribieron."""
+        written = 0
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return written
+            self._write(batch)
+            written += len(batch)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _drain(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Despierta al llenarse un lote (submit) o al cumplirse el intervalo
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _write(self, rows: List[dict]):
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                # executemany: psycopg2 lo envía como un único INSERT ... VALUES multi-fila
+                db.execute(insert(AuditLog), rows)
+                record_audit_counts(db, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Failed to write batch of %d audit log entries; retrying one by one", len(rows))
+                self._write_one_by_one(db, rows)
+            finally:
+                db.close()
+
+    def _write_one_by_one(self, db: Session, rows: List[dict]):
+        # Una fila inválida no debe arrastrar al resto del lote
+        for row in rows:
+            try:
+                db.execute(insert(AuditLog), [row])
+                record_audit_counts(db, [row])
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Dropped audit log entry %s (%s)", row.get("id"), row.get("action"))
+
+
+audit_writer = AuditWriter()
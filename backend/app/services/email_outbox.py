@@ -0,0 +1,219 @@
+"""
+Email Outbox
+
+Envío de emails en segundo plano a través de la tabla email_outbox.
+
+`send_email` (app.core.email) solo inserta la fila y hace commit, así que
+la request responde en cuanto el email queda encolado. El worker
+(app.services.email_worker, lanzado por email_worker.py) reclama los
+emails pendientes por lotes con `claim_due_emails`, los entrega y guarda
+el resultado con `record_results`:
+
+- Un fallo temporal reprograma el email con backoff exponencial
+  (EMAIL_RETRY_BASE_SECONDS * 2^(intento-1), hasta EMAIL_RETRY_MAX_SECONDS);
+  un rechazo permanente (5xx del destinatario) o agotar EMAIL_MAX_ATTEMPTS
+  lo deja en estado failed con el último error.
+
+En PostgreSQL los lotes se reclaman con FOR UPDATE SKIP LOCKED, de modo que
+pueden correr varios workers a la vez. Un email reclamado por un worker que
+murió se vuelve a enviar pasados EMAIL_SENDING_TIMEOUT_SECONDS.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+import aiosmtplib
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.mail_config import SmtpSettings, default_smtp_settings, get_tenant_smtp_settings
+from app.models.email_outbox import EmailOutbox, EmailStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingEmail:
+    id: UUID
+    tenant_id: Optional[UUID]
+    email_to: str
+    subject: str
+    html_content: str
+    text_content: Optional[str]
+    attempts: int
+
+
+def resolve_smtp_settings(db: Session, tenant_id: Optional[UUID]) -> SmtpSettings:
+    """SMTP del tenant si lo tiene configurado y habilitado; si no, el global."""
+    if tenant_id is not None:
+        smtp = get_tenant_smtp_settings(db, tenant_id)
+        if smtp is not None:
+            return smtp
+    return default_smtp_settings()
+
+
+def build_message(email: OutgoingEmail, smtp: SmtpSettings) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((smtp.from_name or "", smtp.from_email))
+    message["To"] = email.email_to
+    message["Subject"] = email.subject
+    message["Message-ID"] = make_msgid(idstring=str(email.id) if email.id else None)
+    if email.text_content:
+        message.set_content(email.text_content)
+        message.add_alternative(email.html_content, subtype="html")
+    else:
+        message.set_content(email.html_content, subtype="html")
+    return message
+
+
+def enqueue_email(
+    db: Session,
+    email_to: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None,
+    tenant_id: Optional[UUID] = None,
+) -> UUID:
+    """
+    Guarda un email en email_outbox para que lo envíe el worker.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        tenant_id: Tenant cuyo SMTP se usará (None = SMTP global)
+
+    Returns:
+        UUID: id del email encolado
+    """
+    email_id = uuid4()
+    db.add(EmailOutbox(
+        id=email_id,
+        tenant_id=tenant_id,
+        email_to=str(email_to),
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        status=EmailStatus.PENDING,
+        next_attempt_at=datetime.utcnow(),
+    ))
+    db.commit()
+    return email_id
+
+
+def claim_due_emails(db: Session, limit: int) -> List[OutgoingEmail]:
+    """
+    Marca como `sending` hasta `limit` emails pendientes cuyo reintento ya
+    venció (o reclamados por un worker que no terminó) y los devuelve.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.EMAIL_SENDING_TIMEOUT_SECONDS)
+    query = db.query(EmailOutbox).filter(or_(
+        and_(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == EmailStatus.SENDING, EmailOutbox.locked_at < stale),
+    )).order_by(EmailOutbox.next_attempt_at).limit(limit)
+    if db.get_bind().dialect.name == "postgresql":
+        # Varios workers: cada uno se queda con filas distintas sin esperar
+        query = query.with_for_update(skip_locked=True)
+
+    claimed = []
+    for row in query.all():
+        row.status = EmailStatus.SENDING
+        row.locked_at = now
+        row.attempts += 1
+        claimed.append(OutgoingEmail(
+            id=row.id,
+            tenant_id=row.tenant_id,
+            email_to=row.email_to,
+            subject=row.subject,
+            html_content=row.html_content,
+            text_content=row.text_content,
+            attempts=row.attempts,
+        ))
+    db.commit()
+    return claimed
+
+
+def retry_delay(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.EMAIL_RETRY_MAX_SECONDS))
+
+
+def record_results(db: Session, emails: List[OutgoingEmail], results: Dict[UUID, Tuple[Optional[str], bool]]) -> dict:
+    """
+    Guarda el resultado de cada envío.
+
+    Args:
+        results: id -> (error o None si se envió, error permanente)
+
+    Returns:
+        dict: {"sent", "retried", "failed"}
+    """
+    now = datetime.utcnow()
+    summary = {"sent": 0, "retried": 0, "failed": 0}
+    rows = {row.id: row for row in db.query(EmailOutbox).filter(
+        EmailOutbox.id.in_([email.id for email in emails])
+    )}
+    for email in emails:
+        row = rows.get(email.id)
+        if row is None:
+            continue
+        error, permanent = results.get(email.id, ("Not attempted", False))
+        row.locked_at = None
+        row.last_error = error
+        if error is None:
+            row.status = EmailStatus.SENT
+            row.sent_at = now
+            summary["sent"] += 1
+        elif permanent or email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            row.status = EmailStatus.FAILED
+            summary["failed"] += 1
+            logger.error("Email %s to %s failed after %d attempts: %s", email.id, email.email_to, email.attempts, error)
+        else:
+            row.status = EmailStatus.PENDING
+            row.next_attempt_at = now + retry_delay(email.attempts)
+            summary["retried"] += 1
+    db.commit()
+    return summary
+
+
+def purge_sent_emails(db: Session, older_than_days: Optional[int] = None) -> int:
+    """Elimina los emails enviados hace más de older_than_days días."""
+    days = settings.EMAIL_OUTBOX_RETENTION_DAYS if older_than_days is None else older_than_days
+    deleted = db.query(EmailOutbox).filter(
+        EmailOutbox.status == EmailStatus.SENT,
+        EmailOutbox.sent_at < datetime.utcnow() - timedelta(days=days)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+async def send_email_now(
+    db: Session,
+    email_to: str,
+    subject: str,
+    html_content: str,
+    text_content: Optional[str] = None,
+    tenant_id: Optional[UUID] = None,
+):
+    """Envío directo sin outbox (EMAIL_OUTBOX_ENABLED=false)."""
+    smtp = resolve_smtp_settings(db, tenant_id) if db is not None else default_smtp_settings()
+    email = OutgoingEmail(
+        id=None, tenant_id=tenant_id, email_to=str(email_to), subject=subject,
+        html_content=html_content, text_content=text_content, attempts=1,
+    )
+    await aiosmtplib.send(
+        build_message(email, smtp),
+        hostname=smtp.host,
+        port=smtp.port,
+        username=smtp.username,
+        password=smtp.password,
+        use_tls=smtp.use_ssl,
+        start_tls=smtp.use_tls and not smtp.use_ssl,
+        validate_certs=smtp.validate_certs,
+        timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,216 @@
+"""
+Email Worker
+
+Entrega de los emails de email_outbox (ver app.services.email_outbox):
+
+    worker = EmailOutboxWorker()
+    await worker.run_once()     # un lote; devuelve {"sent", "retried", "failed"}
+    await worker.run_forever()  # bucle con EMAIL_WORKER_POLL_SECONDS
+
+- Los emails de un lote se agrupan por servidor SMTP (el del tenant o el
+  global MAIL_*); la configuración de cada tenant sale de la caché de
+  app.core.mail_config, así que no se lee ni se descifra por email.
+- Cada servidor tiene una conexión SMTP que se reutiliza entre emails y
+  entre lotes (SmtpConnectionPool) y se cierra tras EMAIL_SMTP_IDLE_SECONDS
+  sin uso.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiosmtplib
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.mail_config import SmtpSettings
+from app.services.email_outbox import (
+    OutgoingEmail, build_message, claim_due_emails, purge_sent_emails, record_results, resolve_smtp_settings
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _is_permanent(error: Exception) -> bool:
+    # Rechazo del destinatario o del contenido: reintentar no sirve
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, aiosmtplib.SMTPDataError):
+        return 500 <= error.code < 600
+    return False
+
+
+class SmtpConnectionPool:
+    """Una conexión SMTP abierta por servidor, reutilizada mientras siga viva."""
+
+    def __init__(
+        self,
+        timeout: float = settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+        idle_timeout: float = settings.EMAIL_SMTP_IDLE_SECONDS,
+    ):
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._connections: Dict[tuple, Tuple[aiosmtplib.SMTP, float]] = {}
+        self.opened = 0  # Conexiones abiertas desde el arranque
+
+    async def acquire(self, smtp: SmtpSettings) -> aiosmtplib.SMTP:
+        key = smtp.connection_key
+        entry = self._connections.get(key)
+        if entry is not None:
+            client, last_used = entry
+            if client.is_connected and time.monotonic() - last_used < self.idle_timeout:
+                try:
+                    await client.noop()
+                    return client
+                except aiosmtplib.SMTPException:
+                    pass
+            await self.discard(smtp)
+
+        client = aiosmtplib.SMTP(
+            hostname=smtp.host,
+            port=smtp.port,
+            username=smtp.username,
+            password=smtp.password,
+            use_tls=smtp.use_ssl,
+            start_tls=smtp.use_tls and not smtp.use_ssl,
+            validate_certs=smtp.validate_certs,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.opened += 1
+        self._connections[key] = (client, time.monotonic())
+        return client
+
+    def release(self, smtp: SmtpSettings):
+        entry = self._connections.get(smtp.connection_key)
+        if entry is not None:
+            self._connections[smtp.connection_key] = (entry[0], time.monotonic())
+
+    async def discard(self, smtp: SmtpSettings):
+        entry = self._connections.pop(smtp.connection_key, None)
+        if entry is not None:
+            await self._close(entry[0])
+
+    async def close_idle(self):
+        now = time.monotonic()
+        for key, (client, last_used) in list(self._connections.items()):
+            if now - last_used >= self.idle_timeout:
+                del self._connections[key]
+                await self._close(client)
+
+    async def close(self):
+        connections, self._connections = self._connections, {}
+        for client, _ in connections.values():
+            await self._close(client)
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP):
+        try:
+            if client.is_connected:
+                await client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            client.close()
+
+
+class EmailOutboxWorker:
+    """Entrega los emails de email_outbox por lotes, agrupados por servidor SMTP."""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        batch_size: int = settings.EMAIL_WORKER_BATCH_SIZE,
+        poll_interval: float = settings.EMAIL_WORKER_POLL_SECONDS,
+        pool: Optional[SmtpConnectionPool] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.pool = pool or SmtpConnectionPool()
+        self._stop = asyncio.Event()
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    async def run_once(self) -> dict:
+        """Envía un lote de emails pendientes."""
+        db = self._session()
+        try:
+            emails = claim_due_emails(db, self.batch_size)
+            if not emails:
+                return {"sent": 0, "retried": 0, "failed": 0}
+
+            # Configuración SMTP una vez por tenant del lote
+            smtp_by_tenant = {tenant_id: resolve_smtp_settings(db, tenant_id)
+                              for tenant_id in {email.tenant_id for email in emails}}
+            db.commit()  # No mantener la transacción abierta durante el envío
+
+            groups = defaultdict(list)
+            for email in emails:
+                smtp = smtp_by_tenant[email.tenant_id]
+                groups[smtp.connection_key].append((smtp, email))
+
+            results = {}
+            for group_results in await asyncio.gather(*(self._send_group(group) for group in groups.values())):
+                results.update(group_results)
+            return record_results(db, emails, results)
+        finally:
+            db.close()
+
+    async def _send_group(self, group: List[Tuple[SmtpSettings, OutgoingEmail]]) -> dict:
+        smtp = group[0][0]
+        results = {}
+        try:
+            client = await self.pool.acquire(smtp)
+        except Exception as exc:
+            logger.warning("Could not connect to SMTP %s:%s: %s", smtp.host, smtp.port, exc)
+            return {email.id: (f"{type(exc).__name__}: {exc}", False) for _, email in group}
+
+        for index, (email_smtp, email) in enumerate(group):
+            try:
+                await client.send_message(build_message(email, email_smtp))
+                results[email.id] = (None, False)
+            except Exception as exc:
+                results[email.id] = (f"{type(exc).__name__}: {exc}", _is_permanent(exc))
+                if not client.is_connected:
+                    # Conexión perdida: el resto del grupo se reintenta en otro lote
+                    await self.pool.discard(smtp)
+                    for _, pending in group[index + 1:]:
+                        results[pending.id] = (f"{type(exc).__name__}: {exc}", False)
+                    return results
+        self.pool.release(smtp)
+        return results
+
+    async def run_forever(self):
+        """Procesa lotes hasta `stop()`; duerme poll_interval cuando no hay trabajo."""
+        last_purge = 0.0
+        try:
+            while not self._stop.is_set():
+                try:
+                    summary = await self.run_once()
+                    if time.monotonic() - last_purge > 3600:
+                        db = self._session()
+                        try:
+                            purge_sent_emails(db)
+                        finally:
+                            db.close()
+                        last_purge = time.monotonic()
+                except Exception:
+                    logger.exception("Email outbox batch failed")
+                    summary = {"sent": 0, "retried": 0, "failed": 0}
+
+                if sum(summary.values()) < self.batch_size:
+                    await self.pool.close_idle()
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.pool.close()
+
+    def stop(self):
+        self._stop.set()
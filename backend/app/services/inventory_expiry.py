@@ -0,0 +1,161 @@
+"""
+Inventory Expiry Sweep
+
+Alertas de vencimiento ("expired", "expiring_soon") de los productos
+activos. Antes se revisaban producto a producto tras cada movimiento, con
+una consulta por producto para no duplicar la alerta, y un producto que
+nadie movía nunca llegaba a alertarse. El job nocturno
+(sweep_inventory_expiry.py) las genera para todos los tenants en una
+pasada:
+
+    sweep_expiry_alerts(db)                          # todos los tenants
+    sweep_expiry_alerts(db, product_ids=[...])       # tras un movimiento
+
+1. Una consulta trae los productos activos que vencen antes del horizonte,
+   leyendo el índice parcial ix_inventory_products_expiration
+   (tenant_id, expiration_date) en lugar de recorrer el catálogo.
+2. Otra trae las alertas de vencimiento activas de esos productos.
+3. Las alertas nuevas se insertan en un único INSERT de varias filas y las
+   que ya no aplican (el producto venció, se repuso con otro lote o se
+   desactivó) se desactivan en un único UPDATE.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+
+from app.models.inventory import InventoryAlert, InventoryProduct
+
+EXPIRED = "expired"
+EXPIRING_SOON = "expiring_soon"
+
+# Días de antelación con los que se avisa de un vencimiento
+EXPIRING_SOON_DAYS = 7
+
+
+def expiring_products_filter(horizon: datetime):
+    """Condición de los productos activos que vencen antes de `horizon` (cubierta por el índice parcial)."""
+    return and_(
+        InventoryProduct.is_active == True,
+        InventoryProduct.expiration_date.isnot(None),
+        InventoryProduct.expiration_date <= horizon
+    )
+
+
+def _utc(value: datetime) -> datetime:
+    # PostgreSQL devuelve fechas con zona horaria; SQLite, sin ella (UTC)
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def is_expired(expiration_date: datetime, now: datetime) -> bool:
+    return _utc(expiration_date) <= _utc(now)
+
+
+def days_until_expiry(expiration_date: datetime, now: datetime) -> int:
+    """Días naturales hasta el vencimiento (negativo si ya venció)."""
+    return (_utc(expiration_date).date() - _utc(now).date()).days
+
+
+def sweep_expiry_alerts(
+    db: Session,
+    now: Optional[datetime] = None,
+    days: int = EXPIRING_SOON_DAYS,
+    tenant_id: Optional[UUID] = None,
+    product_ids: Optional[Sequence[UUID]] = None
+) -> Dict[str, int]:
+    """
+    Crea las alertas de vencimiento que falten y desactiva las obsoletas.
+
+    Un producto con una alerta activa del mismo tipo no recibe otra, aunque
+    ya esté reconocida, así que el job puede ejecutarse tantas veces como
+    se quiera.
+
+    Args:
+        db: Sesión de base de datos (no hace commit)
+        now: Momento de referencia (por defecto ahora, en UTC)
+        days: Días de antelación para "expiring_soon"
+        tenant_id: Limita la pasada a un tenant (opcional)
+        product_ids: Limita la pasada a estos productos (opcional)
+
+    Returns:
+        Dict[str, int]: Alertas creadas por tipo y alertas desactivadas
+            ("resolved")
+    """
+    now = _utc(now or datetime.utcnow())
+    horizon = now + timedelta(days=days)
+
+    filters = [expiring_products_filter(horizon)]
+    alert_filters = [
+        InventoryAlert.is_active == True,
+        InventoryAlert.alert_type.in_([EXPIRED, EXPIRING_SOON])
+    ]
+    if tenant_id is not None:
+        filters.append(InventoryProduct.tenant_id == tenant_id)
+        alert_filters.append(InventoryAlert.tenant_id == tenant_id)
+    if product_ids is not None:
+        if not product_ids:
+            return {EXPIRED: 0, EXPIRING_SOON: 0, "resolved": 0}
+        filters.append(InventoryProduct.id.in_(product_ids))
+        alert_filters.append(InventoryAlert.product_id.in_(product_ids))
+
+    products = db.query(
+        InventoryProduct.id,
+        InventoryProduct.tenant_id,
+        InventoryProduct.name,
+        InventoryProduct.expiration_date
+    ).filter(*filters).all()
+    expected = {
+        (product.id, EXPIRED if is_expired(product.expiration_date, now) else EXPIRING_SOON): product
+        for product in products
+    }
+
+    active = db.query(
+        InventoryAlert.id, InventoryAlert.product_id, InventoryAlert.alert_type
+    ).filter(*alert_filters).all()
+    existing = {(alert.product_id, alert.alert_type) for alert in active}
+    stale = [alert.id for alert in active if (alert.product_id, alert.alert_type) not in expected]
+
+    raised = [
+        _expiry_alert(product, alert_type, now)
+        for (product_id, alert_type), product in expected.items()
+        if (product_id, alert_type) not in existing
+    ]
+    if raised:
+        db.execute(InventoryAlert.__table__.insert(), raised)
+    if stale:
+        db.execute(
+            update(InventoryAlert).where(InventoryAlert.id.in_(stale)).values(
+                is_active=False
+            ).execution_options(synchronize_session=False)
+        )
+
+    return {
+        EXPIRED: sum(1 for alert in raised if alert["alert_type"] == EXPIRED),
+        EXPIRING_SOON: sum(1 for alert in raised if alert["alert_type"] == EXPIRING_SOON),
+        "resolved": len(stale),
+    }
+
+
+def _expiry_alert(product, alert_type: str, now: datetime) -> dict:
+    expiration = product.expiration_date.strftime('%Y-%m-%d')
+    if alert_type == EXPIRING_SOON:
+        title = f"Próximo a vencer: {product.name}"
+        message = (
+            f"El producto '{product.name}' vence en {days_until_expiry(product.expiration_date, now)} días "
+            f"({expiration})."
+        )
+    else:
+        title = f"Vencido: {product.name}"
+        message = f"El producto '{product.name}' está vencido desde el {expiration}."
+    return {
+        "tenant_id": product.tenant_id,
+        "product_id": product.id,
+        "alert_type": alert_type,
+        "title": title,
+        "message": message,
+        "is_active": True,
+        "is_acknowledged": False,
+    }
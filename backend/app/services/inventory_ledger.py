@@ -0,0 +1,237 @@
+"""
+Inventory Stock Ledger
+
+Único camino para modificar InventoryProduct.current_stock. Los endpoints
+de stock, uso en citas y consumo automático leían el stock, lo cambiaban en
+Python y lo escribían de vuelta, de modo que dos requests simultáneas
+perdían una de las actualizaciones. Aquí el stock se modifica en la propia
+sentencia:
+
+    UPDATE inventory_products
+    SET current_stock = current_stock + :delta
+    WHERE id IN (...) AND current_stock + :delta >= 0
+    RETURNING id, current_stock
+
+y con el stock resultante se insertan los InventoryMovement (stock_after
+incluido) en un único INSERT de varias filas:
+
+    apply_movements(db, tenant_id, user_id, [
+        StockMovement(product_id, -2, MovementType.OUT_USAGE, appointment_id=appointment.id),
+    ])
+    db.commit()
+
+Con varios productos se bloquean antes en orden de id, para que dos lotes
+que comparten productos no se bloqueen mutuamente (deadlock) en PostgreSQL.
+
+Alertas de stock: con el stock anterior y el nuevo de cada producto se
+detecta si el movimiento cruza su mínimo o lo deja sin stock. Solo en
+ese caso se crea la InventoryAlert ("low_stock", "out_of_stock"), y al
+volver a subir del umbral se desactivan las alertas activas de ese tipo.
+Los productos que siguen por debajo no generan consultas ni alertas
+duplicadas. Crear un producto, cambiar su mínimo o (des)activarlo pasa por
+el mismo record_threshold_crossings con el mínimo anterior, y los
+productos inactivos nunca tienen alertas de stock activas.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import and_, case, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.inventory import InventoryAlert, InventoryMovement, InventoryProduct, MovementType
+
+LOW_STOCK = "low_stock"
+OUT_OF_STOCK = "out_of_stock"
+
+
+@dataclass
+class StockMovement:
+    """Cambio de stock de un producto: `quantity` positiva para entradas y negativa para salidas."""
+    product_id: UUID
+    quantity: int
+    movement_type: MovementType
+    appointment_id: Optional[UUID] = None
+    notes: Optional[str] = None
+    unit_cost: Optional[float] = None
+    reference_number: Optional[str] = None
+    supplier: Optional[str] = None
+
+
+class InsufficientStockError(ValueError):
+    """Una salida dejaría el stock de un producto por debajo de cero."""
+
+    def __init__(self, product_id: UUID, available: int, requested: int):
+        self.product_id = product_id
+        self.available = available
+        self.requested = requested
+        super().__init__(f"Stock insuficiente para {product_id}: disponible {available}, solicitado {requested}")
+
+
+def apply_movements(
+    db: Session,
+    tenant_id: UUID,
+    user_id: UUID,
+    movements: Sequence[StockMovement],
+    allow_negative: bool = False
+) -> Dict[UUID, int]:
+    """
+    Aplica los movimientos al stock y los registra en inventory_movements.
+
+    Si un producto no tiene stock suficiente lanza InsufficientStockError
+    (LookupError si no existe en el tenant) sin registrar ningún movimiento;
+    el stock de los demás productos ya puede estar modificado, así que el
+    llamador debe hacer rollback.
+
+    Args:
+        db: Sesión de base de datos (no hace commit)
+        tenant_id: Tenant de los productos
+        user_id: Usuario que registra los movimientos
+        movements: Movimientos a aplicar; puede haber varios del mismo producto
+        allow_negative: Permitir que el stock quede por debajo de cero
+
+    Returns:
+        Dict[UUID, int]: Stock resultante por producto
+    """
+    if not movements:
+        return {}
+
+    deltas: Dict[UUID, int] = {}
+    for movement in movements:
+        deltas[movement.product_id] = deltas.get(movement.product_id, 0) + movement.quantity
+
+    if len(deltas) > 1:
+        db.execute(
+            select(InventoryProduct.id).where(
+                InventoryProduct.id.in_(deltas),
+                InventoryProduct.tenant_id == tenant_id
+            ).order_by(InventoryProduct.id).with_for_update()
+        )
+        delta = case(deltas, value=InventoryProduct.id)
+    else:
+        delta = literal(next(iter(deltas.values())))
+
+    # UPDATE de Core: la variante ORM sincronizaría la sesión con otra consulta
+    statement = update(InventoryProduct.__table__).where(
+        InventoryProduct.id.in_(deltas),
+        InventoryProduct.tenant_id == tenant_id
+    )
+    if not allow_negative:
+        statement = statement.where(InventoryProduct.current_stock + delta >= 0)
+    products = db.execute(
+        statement.values(current_stock=InventoryProduct.current_stock + delta).returning(
+            InventoryProduct.id,
+            InventoryProduct.current_stock,
+            InventoryProduct.minimum_stock,
+            InventoryProduct.name,
+            InventoryProduct.unit_type,
+            InventoryProduct.is_active
+        )
+    ).all()
+    stock = {product.id: product.current_stock for product in products}
+
+    if len(stock) < len(deltas):
+        _raise_rejected(db, tenant_id, {product_id: deltas[product_id] for product_id in deltas if product_id not in stock})
+
+    # stock_after de cada movimiento, en el orden recibido
+    running = {product_id: stock[product_id] - deltas[product_id] for product_id in deltas}
+    rows = []
+    for movement in movements:
+        running[movement.product_id] += movement.quantity
+        rows.append({
+            "tenant_id": tenant_id,
+            "product_id": movement.product_id,
+            "movement_type": movement.movement_type,
+            "quantity": movement.quantity,
+            "unit_cost": movement.unit_cost,
+            "total_cost": movement.unit_cost * abs(movement.quantity) if movement.unit_cost else None,
+            "appointment_id": movement.appointment_id,
+            "user_id": user_id,
+            "notes": movement.notes,
+            "reference_number": movement.reference_number,
+            "supplier": movement.supplier,
+            "stock_after": running[movement.product_id],
+        })
+    # Tabla directamente: con la inserción ORM las filas con columnas a None irían en otro lote
+    db.execute(InventoryMovement.__table__.insert(), rows)
+
+    record_threshold_crossings(db, tenant_id, [
+        (product, product.current_stock - deltas[product.id], product.minimum_stock if product.is_active else None)
+        for product in products
+    ])
+    return stock
+
+
+def apply_movement(db: Session, tenant_id: UUID, user_id: UUID, movement: StockMovement) -> int:
+    """apply_movements para un solo movimiento; devuelve el stock resultante."""
+    return apply_movements(db, tenant_id, user_id, [movement])[movement.product_id]
+
+
+def record_threshold_crossings(db: Session, tenant_id: UUID, products: Sequence[tuple]):
+    """
+    Crea o desactiva las alertas de stock de los productos que cruzan un umbral.
+
+    Args:
+        db: Sesión de base de datos (no hace commit)
+        tenant_id: Tenant de los productos
+        products: Ternas (fila con id, current_stock, minimum_stock, name,
+            unit_type, is_active; stock anterior; mínimo anterior, o None si
+            el producto no podía tener alertas: recién creado o inactivo)
+    """
+    raised, resolved = [], []
+    for product, stock_before, minimum_before in products:
+        for alert_type, threshold, threshold_before in (
+            (LOW_STOCK, product.minimum_stock, minimum_before),
+            (OUT_OF_STOCK, 0, 0)
+        ):
+            was_below = minimum_before is not None and stock_before <= threshold_before
+            is_below = product.is_active and product.current_stock <= threshold
+            if is_below and not was_below:
+                raised.append(_stock_alert(tenant_id, product, alert_type))
+            elif was_below and not is_below:
+                resolved.append(and_(InventoryAlert.product_id == product.id, InventoryAlert.alert_type == alert_type))
+
+    if resolved:
+        db.execute(
+            update(InventoryAlert).where(
+                InventoryAlert.tenant_id == tenant_id,
+                InventoryAlert.is_active == True,
+                or_(*resolved)
+            ).values(is_active=False).execution_options(synchronize_session=False)
+        )
+    if raised:
+        db.execute(InventoryAlert.__table__.insert(), raised)
+
+
+def _stock_alert(tenant_id: UUID, product, alert_type: str) -> dict:
+    if alert_type == LOW_STOCK:
+        title = f"Stock bajo: {product.name}"
+        message = (
+            f"El producto '{product.name}' tiene stock bajo ({product.current_stock} {product.unit_type.value}). "
+            f"Stock mínimo: {product.minimum_stock} {product.unit_type.value}."
+        )
+    else:
+        title = f"Sin stock: {product.name}"
+        message = f"El producto '{product.name}' se ha agotado completamente."
+    return {
+        "tenant_id": tenant_id,
+        "product_id": product.id,
+        "alert_type": alert_type,
+        "title": title,
+        "message": message,
+        "is_active": True,
+        "is_acknowledged": False,
+    }
+
+
+def _raise_rejected(db: Session, tenant_id: UUID, rejected: Dict[UUID, int]):
+    available = dict(db.query(InventoryProduct.id, InventoryProduct.current_stock).filter(
+        InventoryProduct.id.in_(rejected),
+        InventoryProduct.tenant_id == tenant_id
+    ).all())
+    missing = [product_id for product_id in rejected if product_id not in available]
+    if missing:
+        raise LookupError(f"Producto no encontrado: {missing[0]}")
+    product_id, delta = next(iter(rejected.items()))
+    raise InsufficientStockError(product_id, available[product_id], -delta)
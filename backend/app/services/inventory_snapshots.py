@@ -0,0 +1,199 @@
+"""
+Inventory Daily Snapshots
+
+Tabla inventory_daily_snapshots: una fila por producto activo y día con el
+stock y el valor al cierre y las unidades usadas en citas. La escribe el
+job nocturno (snapshot_inventory.py) con un único INSERT ... SELECT por
+día, reescribiendo la fila si el día ya tenía foto:
+
+    take_inventory_snapshot(db)                    # ayer
+    take_inventory_snapshot(db, date(2026, 10, 1))  # backfill
+
+El dashboard (GET /inventory/stats/) lee las fotos de los últimos días y
+les suma el delta intradía: los movimientos posteriores a la última foto
+del tenant. Con las mismas fotos `project_stockouts` calcula, con
+funciones de ventana, el consumo medio diario y los días hasta agotar el
+stock de todos los productos en una consulta.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, and_, func, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.inventory import InventoryDailySnapshot, InventoryMovement, InventoryProduct, MovementType
+
+# Días de consumo que se promedian para la proyección y el ranking de más usados
+USAGE_WINDOW_DAYS = 30
+
+
+def _day_bounds(day: date) -> tuple:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def take_inventory_snapshot(db: Session, day: Optional[date] = None, tenant_id: Optional[UUID] = None) -> int:
+    """
+    Escribe la foto de `day` para los productos activos.
+
+    El stock al cierre se obtiene del stock actual menos los movimientos
+    posteriores al día, así que la foto es exacta aunque el job se retrase
+    o se lance para días pasados.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        day: Día de la foto (por defecto ayer, en UTC)
+        tenant_id: Limita la foto a un tenant (opcional)
+
+    Returns:
+        int: Número de productos en la foto
+    """
+    day = day or datetime.utcnow().date() - timedelta(days=1)
+    day_start, day_end = _day_bounds(day)
+
+    later = select(
+        InventoryMovement.product_id,
+        func.sum(InventoryMovement.quantity).label("quantity")
+    ).where(InventoryMovement.created_at >= day_end).group_by(InventoryMovement.product_id).subquery()
+    used = select(
+        InventoryMovement.product_id,
+        func.sum(-InventoryMovement.quantity).label("quantity")
+    ).where(
+        InventoryMovement.movement_type == MovementType.OUT_USAGE,
+        InventoryMovement.created_at >= day_start,
+        InventoryMovement.created_at < day_end
+    ).group_by(InventoryMovement.product_id).subquery()
+
+    stock = InventoryProduct.current_stock - func.coalesce(later.c.quantity, 0)
+    filters = [InventoryProduct.is_active == True, InventoryProduct.created_at < day_end]
+    if tenant_id is not None:
+        filters.append(InventoryProduct.tenant_id == tenant_id)
+    rows = select(
+        InventoryProduct.id,
+        literal(day, Date),
+        InventoryProduct.tenant_id,
+        stock,
+        stock * func.coalesce(InventoryProduct.cost_per_unit, 0),
+        func.coalesce(used.c.quantity, 0),
+    ).outerjoin(later, later.c.product_id == InventoryProduct.id).outerjoin(
+        used, used.c.product_id == InventoryProduct.id
+    ).where(*filters)
+
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(InventoryDailySnapshot).from_select(
+        ["product_id", "day", "tenant_id", "stock", "inventory_value", "usage_out"], rows
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[InventoryDailySnapshot.product_id, InventoryDailySnapshot.day],
+        set_={
+            "stock": statement.excluded.stock,
+            "inventory_value": statement.excluded.inventory_value,
+            "usage_out": statement.excluded.usage_out,
+        }
+    )
+    count = db.execute(statement).rowcount
+    db.commit()
+    return count
+
+
+def latest_snapshot_day(db: Session, tenant_id: UUID) -> Optional[date]:
+    return db.query(func.max(InventoryDailySnapshot.day)).filter(
+        InventoryDailySnapshot.tenant_id == tenant_id
+    ).scalar()
+
+
+def usage_since(db: Session, tenant_id: UUID, start_day: date, through_day: Optional[date]):
+    """
+    Subconsulta (product_id, used) con el uso por producto desde `start_day`:
+    las fotos hasta `through_day` más los movimientos de uso posteriores.
+    Sin fotos (`through_day` None) solo cuenta movimientos.
+    """
+    since = datetime.combine(start_day, time.min)
+    parts = []
+    if through_day is not None:
+        since = max(since, _day_bounds(through_day)[1])
+        parts.append(select(
+            InventoryDailySnapshot.product_id,
+            InventoryDailySnapshot.usage_out.label("used")
+        ).where(
+            InventoryDailySnapshot.tenant_id == tenant_id,
+            InventoryDailySnapshot.day >= start_day,
+            InventoryDailySnapshot.day <= through_day
+        ))
+    parts.append(select(
+        InventoryMovement.product_id,
+        (-InventoryMovement.quantity).label("used")
+    ).where(
+        InventoryMovement.tenant_id == tenant_id,
+        InventoryMovement.movement_type == MovementType.OUT_USAGE,
+        InventoryMovement.created_at >= since
+    ))
+    return union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+
+
+def project_stockouts(
+    db: Session,
+    tenant_id: UUID,
+    window_days: int = USAGE_WINDOW_DAYS,
+    limit: Optional[int] = 10,
+    today: Optional[date] = None
+) -> List[dict]:
+    """
+    Días hasta agotar el stock de cada producto activo con consumo.
+
+    Para cada producto y día, avg(usage_out) sobre la ventana de
+    `window_days` días (función de ventana) da el consumo medio diario; se
+    toma el del último día con foto (row_number) y se divide el stock
+    actual entre él.
+
+    Returns:
+        List[dict]: Productos ordenados por días hasta agotarse (los más
+            urgentes primero)
+    """
+    today = today or datetime.utcnow().date()
+    daily = select(
+        InventoryDailySnapshot.product_id,
+        func.avg(InventoryDailySnapshot.usage_out).over(
+            partition_by=InventoryDailySnapshot.product_id,
+            order_by=InventoryDailySnapshot.day,
+            rows=(-(window_days - 1), 0)
+        ).label("avg_daily_usage"),
+        func.row_number().over(
+            partition_by=InventoryDailySnapshot.product_id,
+            order_by=InventoryDailySnapshot.day.desc()
+        ).label("position")
+    ).where(
+        InventoryDailySnapshot.tenant_id == tenant_id,
+        InventoryDailySnapshot.day >= today - timedelta(days=window_days)
+    ).subquery()
+
+    days_left = InventoryProduct.current_stock / daily.c.avg_daily_usage
+    query = db.query(
+        InventoryProduct.id,
+        InventoryProduct.name,
+        InventoryProduct.current_stock,
+        daily.c.avg_daily_usage,
+        days_left.label("days_until_stockout")
+    ).join(daily, daily.c.product_id == InventoryProduct.id).filter(
+        and_(
+            daily.c.position == 1,
+            daily.c.avg_daily_usage > 0,
+            InventoryProduct.is_active == True
+        )
+    ).order_by(days_left, InventoryProduct.name)
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {
+            "product_id": row.id,
+            "product_name": row.name,
+            "current_stock": row.current_stock,
+            "avg_daily_usage": round(float(row.avg_daily_usage), 2),
+            "days_until_stockout": int(row.days_until_stockout),
+        }
+        for row in query
+    ]
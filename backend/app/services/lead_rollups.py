@@ -0,0 +1,206 @@
+"""
+Lead Daily Rollups
+
+Mantenimiento incremental de la tabla lead_daily_rollups.
+
+Los endpoints que crean o modifican leads capturan el estado del lead antes
+del cambio con `lead_rollup_state` y, antes del commit, llaman a
+`record_lead_change` para mover el lead entre buckets del agregado:
+
+    before = lead_rollup_state(lead)
+    lead.status = LeadStatus.contactado
+    record_lead_change(db, before, lead)
+    db.commit()
+
+Antes de borrar usuarios, `unassign_lead_rollups` funde sus buckets con los
+de "sin asignar", para que la clave foránea no bloquee el borrado.
+
+`rebuild_lead_rollups` recalcula la tabla desde cero (backfill o reparación).
+"""
+
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.lead import UNASSIGNED_KEY, Lead, LeadDailyRollup, LeadStatus, LeadSource, LeadPriority
+
+
+KEY_FIELDS = ("tenant_id", "day", "status", "source", "priority", "assigned_to_id")
+MEASURE_FIELDS = ("lead_count", "converted_count", "lead_score_sum", "scored_count", "conversion_days_sum")
+
+
+def lead_rollup_state(lead: Lead) -> Optional[dict]:
+    """
+    Contribución de un lead al agregado: clave del bucket y métricas.
+    Los leads inactivos (soft delete) no cuentan y devuelven None.
+    """
+    if not lead.is_active:
+        return None
+
+    created_at = lead.created_at or datetime.utcnow()
+    conversion_days = 0.0
+    if lead.conversion_date:
+        conversion_days = (lead.conversion_date - created_at).total_seconds() / 86400
+
+    return {
+        "tenant_id": lead.tenant_id,
+        "day": created_at.date(),
+        "status": LeadStatus(lead.status),
+        "source": LeadSource(lead.source),
+        "priority": LeadPriority(lead.priority),
+        "assigned_to_id": lead.assigned_to_id,
+        "lead_count": 1,
+        "converted_count": 1 if lead.conversion_date else 0,
+        "lead_score_sum": lead.lead_score or 0,
+        "scored_count": 1 if lead.lead_score is not None else 0,
+        "conversion_days_sum": conversion_days,
+    }
+
+
+def _apply_deltas(db: Session, changes: List[Tuple[dict, int]]):
+    """
+    Suma (sign=1) o resta (sign=-1) la contribución de cada lead a su bucket
+    con un único INSERT ... ON CONFLICT DO UPDATE: el índice único del
+    bucket evita que dos transacciones creen la misma fila a la vez. Los
+    buckets que se quedan sin leads se borran.
+    """
+    buckets: Dict[tuple, dict] = {}
+    for state, sign in changes:
+        key = tuple(state[field] for field in KEY_FIELDS)
+        deltas = buckets.setdefault(key, dict.fromkeys(MEASURE_FIELDS, 0))
+        for field in MEASURE_FIELDS:
+            deltas[field] += state[field] * sign
+
+    table = LeadDailyRollup.__table__
+    now = datetime.utcnow()
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(table).values([
+        {"id": uuid.uuid4(), **dict(zip(KEY_FIELDS, key)), **deltas, "updated_at": now}
+        for key, deltas in buckets.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            table.c.tenant_id,
+            table.c.day,
+            table.c.status,
+            table.c.source,
+            table.c.priority,
+            func.coalesce(table.c.assigned_to_id, literal_column(f"'{UNASSIGNED_KEY}'")),
+        ],
+        set_={
+            field: table.c[field] + getattr(statement.excluded, field)
+            for field in MEASURE_FIELDS
+        } | {"updated_at": now}
+    )
+    if not any(deltas["lead_count"] < 0 for deltas in buckets.values()):
+        db.execute(statement)
+        return
+
+    emptied = [
+        row.id for row in db.execute(statement.returning(table.c.id, table.c.lead_count))
+        if row.lead_count <= 0
+    ]
+    if emptied:
+        db.execute(delete(table).where(table.c.id.in_(emptied)))
+
+
+def record_lead_change(db: Session, before: Optional[dict], lead: Lead):
+    """
+    Refleja en el agregado el cambio de un lead.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (no hace commit)
+        before: Estado previo de `lead_rollup_state` (None si el lead es nuevo)
+        lead: Lead ya modificado
+    """
+    after = lead_rollup_state(lead)
+    if before == after:
+        return
+    changes = []
+    if before is not None:
+        changes.append((before, -1))
+    if after is not None:
+        changes.append((after, 1))
+    _apply_deltas(db, changes)
+
+
+def unassign_lead_rollups(db: Session, user_ids: Sequence[UUID]):
+    """
+    Pasa los buckets de los usuarios a los de "sin asignar" antes de borrarlos.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (no hace commit)
+        user_ids: Usuarios que se van a borrar
+    """
+    table = LeadDailyRollup.__table__
+    rows = db.execute(
+        delete(table).where(table.c.assigned_to_id.in_(user_ids)).returning(
+            *(table.c[field] for field in KEY_FIELDS + MEASURE_FIELDS)
+        )
+    ).all()
+    if rows:
+        _apply_deltas(db, [({**row._asdict(), "assigned_to_id": None}, 1) for row in rows])
+
+
+def _conversion_days_expr(db: Session):
+    """Días entre creación y conversión, según el dialecto de la base de datos."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.julianday(Lead.conversion_date) - func.julianday(Lead.created_at)
+    return func.extract("epoch", Lead.conversion_date - Lead.created_at) / 86400
+
+
+def rebuild_lead_rollups(db: Session, tenant_id: Optional[UUID] = None) -> int:
+    """
+    Recalcula lead_daily_rollups desde la tabla leads.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (hace commit)
+        tenant_id: Limita el recálculo a un tenant (opcional)
+
+    Returns:
+        int: Número de buckets generados
+    """
+    delete_query = db.query(LeadDailyRollup)
+    leads_filter = [Lead.is_active == True]
+    if tenant_id is not None:
+        delete_query = delete_query.filter(LeadDailyRollup.tenant_id == tenant_id)
+        leads_filter.append(Lead.tenant_id == tenant_id)
+    delete_query.delete(synchronize_session=False)
+
+    day = func.date(Lead.created_at)
+    rows = db.query(
+        Lead.tenant_id, day, Lead.status, Lead.source, Lead.priority, Lead.assigned_to_id,
+        func.count(Lead.id),
+        func.count(Lead.conversion_date),
+        func.coalesce(func.sum(Lead.lead_score), 0),
+        func.count(Lead.lead_score),
+        func.coalesce(func.sum(_conversion_days_expr(db)), 0),
+    ).filter(*leads_filter).group_by(
+        Lead.tenant_id, day, Lead.status, Lead.source, Lead.priority, Lead.assigned_to_id
+    ).yield_per(5000)
+
+    buckets = 0
+    for row in rows:
+        row_day = row[1] if isinstance(row[1], date) else date.fromisoformat(str(row[1]))
+        db.add(LeadDailyRollup(
+            tenant_id=row[0],
+            day=row_day,
+            status=row[2],
+            source=row[3],
+            priority=row[4],
+            assigned_to_id=row[5],
+            lead_count=row[6],
+            converted_count=row[7],
+            lead_score_sum=int(row[8]),
+            scored_count=row[9],
+            conversion_days_sum=float(row[10]),
+        ))
+        buckets += 1
+
+    db.commit()
+    return buckets
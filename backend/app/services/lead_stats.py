@@ -0,0 +1,235 @@
+"""
+Lead Statistics Engine
+
+Motor de agregación para las estadísticas de leads.
+Las métricas se leen de la tabla materializada lead_daily_rollups
+(ver app.services.lead_rollups), de modo que la latencia no depende del
+tamaño del histórico de leads. Solo los seguimientos vencidos, que dependen
+de last_contact_at, se calculan sobre la tabla leads.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+
+from app.models.lead import Lead, LeadDailyRollup, LeadStatus, LeadSource, LeadPriority
+from app.schemas.lead import LeadStats, LeadFunnelStats, LeadSourcePerformance
+
+
+TREND_DAYS = 30
+
+# Estados en los que un lead ya no requiere seguimiento
+CLOSED_STATUSES = [
+    LeadStatus.completado,
+    LeadStatus.perdido,
+    LeadStatus.no_califica,
+    LeadStatus.no_contesta,
+    LeadStatus.abandono,
+]
+
+FUNNEL_STATUSES = [
+    LeadStatus.nuevo,
+    LeadStatus.contactado,
+    LeadStatus.calificado,
+    LeadStatus.cita_agendada,
+    LeadStatus.vino_a_cita,
+    LeadStatus.en_tratamiento,
+    LeadStatus.completado,
+]
+
+
+def lead_scope_filters(tenant_id: UUID, assigned_to_id: Optional[UUID] = None) -> list:
+    """
+    Filtros base sobre la tabla leads: leads activos del tenant y,
+    para médicos y closers, solo los asignados al usuario.
+    """
+    filters = [Lead.tenant_id == tenant_id, Lead.is_active == True]
+    if assigned_to_id is not None:
+        filters.append(Lead.assigned_to_id == assigned_to_id)
+    return filters
+
+
+def rollup_scope_filters(tenant_id: UUID, assigned_to_id: Optional[UUID] = None) -> list:
+    """Equivalente de lead_scope_filters sobre lead_daily_rollups."""
+    filters = [LeadDailyRollup.tenant_id == tenant_id]
+    if assigned_to_id is not None:
+        filters.append(LeadDailyRollup.assigned_to_id == assigned_to_id)
+    return filters
+
+
+def compute_lead_overview(
+    db: Session,
+    tenant_id: UUID,
+    assigned_to_id: Optional[UUID] = None,
+    now: Optional[datetime] = None
+) -> LeadStats:
+    """
+    Calcula el overview de leads con tres consultas.
+
+    1. GROUP BY status, source, priority sobre el agregado diario, con sumas
+       filtradas para hoy, últimos 7 y 30 días, conversiones y no asignados.
+    2. Tendencia de los últimos 30 días agrupada por día.
+    3. Seguimientos vencidos sobre la tabla leads.
+
+    Las ventanas de semana y mes cuentan días naturales completos
+    (hoy y los 6 / 29 días anteriores).
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy
+        tenant_id: UUID del tenant
+        assigned_to_id: Restringe a los leads asignados a este usuario (opcional)
+        now: Instante de referencia (por defecto datetime.utcnow())
+
+    Returns:
+        LeadStats: Mismo esquema de respuesta que /leads/stats/overview
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    week_start = today - timedelta(days=6)
+    trend_start = today - timedelta(days=TREND_DAYS - 1)
+    scope = rollup_scope_filters(tenant_id, assigned_to_id)
+
+    def sum_where(column, *conditions):
+        return func.coalesce(func.sum(column).filter(and_(*conditions)), 0)
+
+    count = LeadDailyRollup.lead_count
+    breakdown = db.query(
+        LeadDailyRollup.status,
+        LeadDailyRollup.source,
+        LeadDailyRollup.priority,
+        func.coalesce(func.sum(count), 0).label("total"),
+        sum_where(count, LeadDailyRollup.day == today).label("today"),
+        sum_where(count, LeadDailyRollup.day >= week_start).label("week"),
+        sum_where(count, LeadDailyRollup.day >= trend_start).label("month"),
+        func.coalesce(func.sum(LeadDailyRollup.converted_count), 0).label("converted"),
+        func.coalesce(func.sum(LeadDailyRollup.conversion_days_sum), 0).label("conversion_days"),
+        sum_where(count, LeadDailyRollup.assigned_to_id.is_(None)).label("unassigned"),
+    ).filter(*scope).group_by(
+        LeadDailyRollup.status, LeadDailyRollup.source, LeadDailyRollup.priority
+    ).all()
+
+    status_counts = {lead_status.value: 0 for lead_status in LeadStatus}
+    source_counts = {source.value: 0 for source in LeadSource}
+    priority_counts = {priority.value: 0 for priority in LeadPriority}
+    totals = dict.fromkeys(["total", "today", "week", "month", "converted", "conversion_days", "unassigned"], 0)
+    for row in breakdown:
+        status_counts[LeadStatus(row.status).value] += row.total
+        source_counts[LeadSource(row.source).value] += row.total
+        priority_counts[LeadPriority(row.priority).value] += row.total
+        for key in totals:
+            totals[key] += getattr(row, key)
+
+    trend_rows = db.query(
+        LeadDailyRollup.day, func.sum(count)
+    ).filter(*scope, LeadDailyRollup.day >= trend_start).group_by(LeadDailyRollup.day).all()
+    per_day = {day: day_count for day, day_count in trend_rows}
+    trends = []
+    for i in range(TREND_DAYS - 1, -1, -1):
+        day = today - timedelta(days=i)
+        trends.append({"date": day.isoformat(), "count": int(per_day.get(day, 0))})
+
+    overdue_follow_ups = db.query(func.count(Lead.id)).filter(
+        *lead_scope_filters(tenant_id, assigned_to_id),
+        Lead.assigned_to_id.isnot(None),
+        or_(
+            Lead.last_contact_at.is_(None),
+            Lead.last_contact_at < (now - timedelta(days=7))
+        ),
+        Lead.status.notin_(CLOSED_STATUSES)
+    ).scalar()
+
+    total_leads = int(totals["total"])
+    converted_count = int(totals["converted"])
+    conversion_rate = (converted_count / total_leads * 100) if total_leads > 0 else 0
+    avg_conversion_time = (
+        float(totals["conversion_days"]) / converted_count
+        if converted_count > 0 and totals["conversion_days"] else None
+    )
+
+    return LeadStats(
+        total_leads=total_leads,
+        new_leads_today=int(totals["today"]),
+        new_leads_this_week=int(totals["week"]),
+        new_leads_this_month=int(totals["month"]),
+        leads_by_status=status_counts,
+        leads_by_source=source_counts,
+        leads_by_priority=priority_counts,
+        conversion_rate=round(conversion_rate, 2),
+        average_conversion_time_days=avg_conversion_time,
+        unassigned_leads=int(totals["unassigned"]),
+        overdue_follow_ups=overdue_follow_ups or 0,
+        leads_trend_last_30_days=trends
+    )
+
+
+def compute_lead_funnel(
+    db: Session,
+    tenant_id: UUID,
+    assigned_to_id: Optional[UUID] = None
+) -> LeadFunnelStats:
+    """Embudo de conversión a partir de un único GROUP BY status del agregado."""
+    rows = db.query(
+        LeadDailyRollup.status, func.sum(LeadDailyRollup.lead_count)
+    ).filter(*rollup_scope_filters(tenant_id, assigned_to_id)).group_by(LeadDailyRollup.status).all()
+    counts = {LeadStatus(lead_status): int(total or 0) for lead_status, total in rows}
+    stages = [counts.get(stage, 0) for stage in FUNNEL_STATUSES]
+    nuevo, contactado, calificado, cita_agendada, vino_a_cita, en_tratamiento, completado = stages
+
+    total = sum(stages)
+
+    def safe_rate(numerator, denominator):
+        return round((numerator / denominator * 100), 2) if denominator > 0 else 0
+
+    return LeadFunnelStats(
+        nuevo=nuevo,
+        contactado=contactado,
+        calificado=calificado,
+        cita_agendada=cita_agendada,
+        vino_a_cita=vino_a_cita,
+        en_tratamiento=en_tratamiento,
+        completado=completado,
+        contactado_rate=safe_rate(sum(stages[1:]), total),
+        calificado_rate=safe_rate(sum(stages[2:]), total),
+        cita_rate=safe_rate(sum(stages[3:]), total),
+        show_up_rate=safe_rate(sum(stages[4:]), total),
+        conversion_rate=safe_rate(sum(stages[5:]), total),
+        completion_rate=safe_rate(completado, total)
+    )
+
+
+def compute_source_performance(
+    db: Session,
+    tenant_id: UUID,
+    assigned_to_id: Optional[UUID] = None
+) -> List[LeadSourcePerformance]:
+    """Rendimiento por fuente a partir de un único GROUP BY source del agregado."""
+    rows = db.query(
+        LeadDailyRollup.source,
+        func.sum(LeadDailyRollup.lead_count),
+        func.sum(LeadDailyRollup.converted_count),
+        func.sum(LeadDailyRollup.lead_score_sum),
+        func.sum(LeadDailyRollup.scored_count),
+    ).filter(*rollup_scope_filters(tenant_id, assigned_to_id)).group_by(LeadDailyRollup.source).all()
+
+    source_performance = []
+    for source, total_leads, converted_count, score_sum, scored_count in rows:
+        total_leads = int(total_leads or 0)
+        if total_leads == 0:
+            continue
+        source_performance.append(LeadSourcePerformance(
+            source=LeadSource(source),
+            total_leads=total_leads,
+            conversion_rate=round((int(converted_count or 0) / total_leads * 100), 2),
+            # Como AVG(lead_score): los leads sin puntuación no cuentan
+            average_lead_score=round(float(score_sum or 0) / scored_count, 2) if scored_count else 0,
+            cost_per_lead=None,  # Would need marketing cost data
+            cost_per_conversion=None,  # Would need marketing cost data
+            roi=None  # Would need revenue and cost data
+        ))
+
+    # Sort by conversion rate descending
+    source_performance.sort(key=lambda x: x.conversion_rate, reverse=True)
+    return source_performance
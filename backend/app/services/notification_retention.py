@@ -0,0 +1,192 @@
+"""
+Notification Retention
+
+Compactación de la tabla notifications, que solo crece:
+
+1. Elimina las notificaciones más antiguas que NOTIFICATION_RETENTION_DAYS
+   (leídas o no; las no leídas se descuentan del contador del usuario).
+2. Mueve a notifications_archive las leídas más antiguas que
+   NOTIFICATION_ARCHIVE_AFTER_DAYS.
+3. Elimina del archivo lo que supera NOTIFICATION_RETENTION_DAYS.
+
+Cada paso trabaja por lotes de NOTIFICATION_COMPACTION_BATCH_SIZE filas
+con un commit por lote, así que no mantiene bloqueos largos ni una
+transacción enorme. En PostgreSQL los lotes se toman con
+FOR UPDATE SKIP LOCKED: un mark-read simultáneo espera al lote o lo salta,
+y el contador no se descuenta dos veces.
+
+Se ejecuta desde compact_notifications.py (cron diario).
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.notifications import adjust_unread_counts
+from app.models.notification import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+
+_ARCHIVED_COLUMNS = (
+    "id", "user_id", "tenant_id", "type", "title", "message", "action_url", "read_at", "created_at"
+)
+
+
+@dataclass
+class CompactionReport:
+    deleted_expired: int = 0  # Expiradas eliminadas de notifications
+    deleted_unread: int = 0  # De ellas, no leídas (descontadas del contador)
+    archived: int = 0  # Leídas movidas a notifications_archive
+    deleted_archived: int = 0  # Eliminadas de notifications_archive
+
+    @property
+    def reclaimed(self) -> int:
+        """Filas que ya no están en notifications."""
+        return self.deleted_expired + self.archived
+
+
+def delete_expired_notifications(db: Session, cutoff: datetime, batch_size: int) -> tuple:
+    """
+    Elimina las notificaciones creadas antes de `cutoff`.
+
+    Returns:
+        Tuple of (eliminadas, de ellas no leídas)
+    """
+    deleted = unread = 0
+    while True:
+        rows = db.query(Notification.id, Notification.user_id, Notification.is_read).filter(
+            Notification.created_at < cutoff
+        ).order_by(Notification.created_at).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not rows:
+            break
+
+        db.query(Notification).filter(
+            Notification.id.in_([row.id for row in rows])
+        ).delete(synchronize_session=False)
+        unread_by_user = Counter(row.user_id for row in rows if not row.is_read)
+        if unread_by_user:
+            adjust_unread_counts(db, {user_id: -count for user_id, count in unread_by_user.items()})
+        db.commit()
+
+        deleted += len(rows)
+        unread += sum(unread_by_user.values())
+    return deleted, unread
+
+
+def archive_read_notifications(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Mueve a notifications_archive las leídas creadas antes de `cutoff`."""
+    archived = 0
+    while True:
+        ids = db.scalars(
+            select(Notification.id).where(
+                Notification.is_read == True,
+                Notification.created_at < cutoff
+            ).order_by(Notification.created_at).limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+
+        columns = [getattr(Notification, name) for name in _ARCHIVED_COLUMNS]
+        db.execute(
+            insert(NotificationArchive).from_select(
+                [*_ARCHIVED_COLUMNS, "archived_at"],
+                select(*columns, literal(datetime.utcnow(), DateTime)).where(Notification.id.in_(ids))
+            )
+        )
+        db.query(Notification).filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        archived += len(ids)
+    return archived
+
+
+def purge_archived_notifications(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Elimina de notifications_archive las creadas antes de `cutoff`."""
+    deleted = 0
+    while True:
+        ids = db.scalars(
+            select(NotificationArchive.id).where(
+                NotificationArchive.created_at < cutoff
+            ).order_by(NotificationArchive.created_at).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        db.query(NotificationArchive).filter(
+            NotificationArchive.id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+    return deleted
+
+
+def count_compactable(
+    db: Session,
+    archive_after_days: Optional[int] = None,
+    retention_days: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> CompactionReport:
+    """Lo que eliminaría y archivaría compact_notifications, sin modificar nada (--dry-run)."""
+    archive_cutoff, retention_cutoff = _cutoffs(archive_after_days, retention_days, now)
+    expired = db.query(Notification).filter(Notification.created_at < retention_cutoff)
+    return CompactionReport(
+        deleted_expired=expired.count(),
+        deleted_unread=expired.filter(Notification.is_read == False).count(),
+        archived=db.query(Notification).filter(
+            Notification.is_read == True,
+            Notification.created_at >= retention_cutoff,
+            Notification.created_at < archive_cutoff
+        ).count(),
+        deleted_archived=db.query(NotificationArchive).filter(
+            NotificationArchive.created_at < retention_cutoff
+        ).count()
+    )
+
+
+def compact_notifications(
+    db: Session,
+    archive_after_days: Optional[int] = None,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> CompactionReport:
+    """
+    Elimina las notificaciones expiradas y archiva las leídas antiguas.
+
+    Args:
+        db: Sesión de base de datos (hace commit por lote)
+        archive_after_days: Antigüedad a partir de la cual se archivan las
+            leídas (por defecto NOTIFICATION_ARCHIVE_AFTER_DAYS)
+        retention_days: Antigüedad a partir de la cual se eliminan (por
+            defecto NOTIFICATION_RETENTION_DAYS)
+        batch_size: Filas por lote (por defecto NOTIFICATION_COMPACTION_BATCH_SIZE)
+
+    Returns:
+        CompactionReport: Filas eliminadas y archivadas
+    """
+    archive_cutoff, retention_cutoff = _cutoffs(archive_after_days, retention_days, now)
+    batch_size = batch_size or settings.NOTIFICATION_COMPACTION_BATCH_SIZE
+
+    report = CompactionReport()
+    report.deleted_expired, report.deleted_unread = delete_expired_notifications(db, retention_cutoff, batch_size)
+    report.archived = archive_read_notifications(db, archive_cutoff, batch_size)
+    report.deleted_archived = purge_archived_notifications(db, retention_cutoff, batch_size)
+    logger.info(
+        "Notification compaction: %d expired (%d unread), %d archived, %d purged from archive",
+        report.deleted_expired, report.deleted_unread, report.archived, report.deleted_archived
+    )
+    return report
+
+
+def _cutoffs(archive_after_days: Optional[int], retention_days: Optional[int], now: Optional[datetime]) -> tuple:
+    now = now or datetime.utcnow()
+    if archive_after_days is None:
+        archive_after_days = settings.NOTIFICATION_ARCHIVE_AFTER_DAYS
+    if retention_days is None:
+        retention_days = settings.NOTIFICATION_RETENTION_DAYS
+    return now - timedelta(days=archive_after_days), now - timedelta(days=retention_days)
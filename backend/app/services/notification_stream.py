@@ -0,0 +1,245 @@
+"""
+Notification Stream
+
+Difusión en tiempo real de eventos de notificaciones (nueva notificación,
+cambio del contador de no leídas) a las conexiones abiertas en
+GET /notifications/stream (Server-Sent Events).
+
+    publish_notification_event(db, user_id, "unread_count", unread_count=3)
+    db.commit()   # el evento sale al confirmar la transacción
+
+En PostgreSQL el evento se envía con pg_notify dentro de la misma
+transacción, así que solo se entrega si el commit se produce. Cada proceso
+(worker de uvicorn) mantiene una conexión dedicada con LISTEN sobre el
+canal y reparte los eventos a las conexiones SSE de sus usuarios, de modo
+que funciona con varios workers:
+
+    await notification_broker.start()   # lifespan de la app
+    queue = notification_broker.subscribe(user_id)
+    await notification_broker.stop()
+
+Con otros motores (SQLite en desarrollo y tests) el evento se reparte en
+el propio proceso tras el commit.
+
+Para el mismo evento dirigido a muchos usuarios (create_notifications_bulk,
+avisos a todo un tenant) `publish_notification_events` agrupa los
+destinatarios en pocos mensajes NOTIFY, cada uno con los campos propios de
+cada usuario.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notification_events"
+_PENDING_KEY = "notification_events"
+# NOTIFY admite hasta 8000 bytes por mensaje
+MAX_PAYLOAD_BYTES = 7900
+
+
+class NotificationBroker:
+    """Suscripciones SSE del proceso y escucha del canal de PostgreSQL."""
+
+    def __init__(self, queue_size: int = settings.NOTIFICATION_STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: UUID) -> asyncio.Queue:
+        """Cola de eventos del usuario para la conexión actual."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[str(user_id)].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: UUID, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id))
+            if subscribers is None:
+                return
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                del self._subscribers[str(user_id)]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, payload: dict):
+        """Entrega un evento a las conexiones del usuario en este proceso (desde cualquier hilo)."""
+        recipients = payload.get("recipients")
+        if recipients is None:
+            self._dispatch_to(payload.get("user_id"), payload)
+            return
+        base = {key: value for key, value in payload.items() if key != "recipients"}
+        for user_id, fields in recipients.items():
+            self._dispatch_to(user_id, base, fields)
+
+    def _dispatch_to(self, user_id: Optional[str], payload: dict, fields: Optional[dict] = None):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        if not targets:
+            return
+        if fields is not None:
+            payload = {**_merge(payload, fields), "user_id": user_id}
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, payload)
+            except RuntimeError:
+                # Loop cerrado: la conexión ya terminó
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, payload: dict):
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta; el siguiente evento trae el contador actualizado
+            logger.debug("Notification stream queue full; dropping %s event", payload.get("event"))
+
+    async def start(self):
+        if self._listener is None and settings.NOTIFICATION_LISTEN_ENABLED and _uses_postgresql():
+            self._listener = asyncio.create_task(self._listen(), name="notification-listener")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        import asyncpg
+
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                logger.info("Listening for notification events on %s", CHANNEL)
+                await closed.wait()
+                logger.warning("Notification listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification listener failed; retrying")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(settings.NOTIFICATION_LISTEN_RETRY_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            self.dispatch(json.loads(payload))
+        except ValueError:
+            logger.warning("Invalid notification event payload: %.200s", payload)
+
+
+def format_sse(event_type: str, data: dict) -> str:
+    """Mensaje Server-Sent Events con nombre de evento y datos JSON."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+
+def _merge(payload: dict, fields: dict) -> dict:
+    """Campos propios del destinatario sobre el evento común (un nivel de anidación)."""
+    merged = dict(payload)
+    for key, value in fields.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def _dumps(payload: dict) -> str:
+    return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def _uses_postgresql() -> bool:
+    return make_url(settings.DATABASE_URL).get_backend_name() == "postgresql"
+
+
+def publish_notification_event(db: Session, user_id: UUID, event_type: str, **data):
+    """
+    Publica un evento para las conexiones SSE del usuario. Se entrega al
+    hacer commit de `db` y se descarta si la transacción se revierte.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (no hace commit)
+        user_id: Usuario destinatario
+        event_type: "notification" o "unread_count"
+        data: Campos del evento (serializables a JSON)
+    """
+    _emit(db, [{"event": event_type, "user_id": str(user_id), **data}])
+
+
+def publish_notification_events(db: Session, event_type: str, recipients: Dict[UUID, dict], **data):
+    """
+    Publica el mismo evento para muchos usuarios, igual que
+    publish_notification_event pero en pocos mensajes.
+
+    Args:
+        db: Sesión de base de datos SQLAlchemy (no hace commit)
+        event_type: "notification" o "unread_count"
+        recipients: {user_id: campos propios del usuario}, que se combinan con
+            `data` (p. ej. {"unread_count": 3, "notification": {"id": ...}})
+        data: Campos comunes del evento (serializables a JSON)
+    """
+    base = {"event": event_type, **data}
+    base_size = len(_dumps({**base, "recipients": {}}).encode())
+    payloads, chunk, size = [], {}, base_size
+    for user_id, fields in recipients.items():
+        key = str(user_id)
+        entry_size = len(_dumps({key: fields}).encode())
+        if chunk and size + entry_size > MAX_PAYLOAD_BYTES:
+            payloads.append({**base, "recipients": chunk})
+            chunk, size = {}, base_size
+        chunk[key] = fields
+        size += entry_size
+    if chunk:
+        payloads.append({**base, "recipients": chunk})
+    _emit(db, payloads)
+
+
+def _emit(db: Session, payloads: List[dict]):
+    if not payloads:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": [_dumps(payload) for payload in payloads]}
+        )
+    else:
+        db.info.setdefault(_PENDING_KEY, []).extend(json.loads(_dumps(payload)) for payload in payloads)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_on_commit(session):
+    for payload in session.info.pop(_PENDING_KEY, []):
+        notification_broker.dispatch(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+notification_broker = NotificationBroker()
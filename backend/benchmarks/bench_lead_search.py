@@ -0,0 +1,131 @@
+"""
+Benchmark de la búsqueda de leads (?search=).
+
+Compara el filtro anterior (ILIKE '%term%' sobre first_name, last_name,
+email, phone y concat(), sin índice posible) con text_search_filter sobre
+las columnas generadas search_text / phone_digits indexadas con pg_trgm.
+En PostgreSQL imprime además el plan de cada variante.
+
+Uso:
+    python -m benchmarks.bench_lead_search --leads 50000
+    python -m benchmarks.bench_lead_search --database-url postgresql://... --leads 1000000
+"""
+
+import random
+import uuid
+from datetime import datetime
+
+from sqlalchemy import or_, text
+
+from app.db.search import text_search_filter
+from app.models.lead import Lead, LeadStatus, LeadSource, LeadPriority
+from app.models.tenant import Tenant
+from benchmarks.common import base_parser, make_session_factory, measure, print_results
+
+
+FIRST_NAMES = ["Juan", "María", "Carlos", "Lucía", "Javier", "Elena", "Pablo", "Carmen", "Diego", "Sofía"]
+LAST_NAMES = ["García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Ruiz", "Díaz", "Moreno"]
+SEARCH_TERMS = {
+    "nombre": "garc",
+    "email": "lucia.ruiz",
+    "teléfono": "612 34",
+}
+
+
+def seed_leads(db, n: int):
+    tenant = Tenant(name="Benchmark Clinic", slug=f"bench-{uuid.uuid4().hex[:8]}", is_active=True)
+    db.add(tenant)
+    db.flush()
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        first_name, last_name = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        rows.append({
+            "id": uuid.uuid4(),
+            "tenant_id": tenant.id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": f"{first_name.lower()}.{last_name.lower()}{i}@example.com",
+            "phone": f"+34 6{random.randint(10, 99)} {random.randint(100, 999)} {random.randint(100, 999)}",
+            "source": random.choice(list(LeadSource)),
+            "status": random.choice(list(LeadStatus)),
+            "priority": random.choice(list(LeadPriority)),
+            "is_active": True,
+            "is_duplicate": False,
+            "created_at": now,
+            "updated_at": now,
+        })
+        if len(rows) == 5000:
+            db.bulk_insert_mappings(Lead, rows)
+            rows = []
+    if rows:
+        db.bulk_insert_mappings(Lead, rows)
+    db.commit()
+    return tenant.id
+
+
+def legacy_filter(term: str):
+    pattern = f"%{term}%"
+    return or_(
+        Lead.first_name.ilike(pattern),
+        Lead.last_name.ilike(pattern),
+        Lead.email.ilike(pattern),
+        Lead.phone.ilike(pattern),
+        Lead.first_name.concat(" ").concat(Lead.last_name).ilike(pattern),
+    )
+
+
+def indexed_filter(term: str):
+    return text_search_filter(Lead.search_text, Lead.phone_digits, term)
+
+
+def search_page(db, tenant_id, condition):
+    """Lo que hace GET /leads/?search=: total + primera página."""
+    query = db.query(Lead).filter(Lead.tenant_id == tenant_id, condition)
+    query.count()
+    return query.order_by(Lead.created_at.desc()).limit(20).all()
+
+
+def print_plan(db, tenant_id, condition):
+    statement = db.query(Lead.id).filter(Lead.tenant_id == tenant_id, condition).statement
+    compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    for (line,) in db.execute(text(f"EXPLAIN {compiled}".replace(":", r"\:"))):
+        print(f"    {line}")
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--leads", type=int, default=1_000_000, help="Leads sintéticos a generar")
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory(args.database_url)
+    is_postgres = engine.dialect.name == "postgresql"
+    db = SessionLocal()
+    try:
+        print(f"Generando {args.leads} leads...")
+        tenant_id = seed_leads(db, args.leads)
+        if is_postgres:
+            db.execute(text("ANALYZE leads"))
+            db.commit()
+
+        for label, term in SEARCH_TERMS.items():
+            results = {
+                "legacy (ILIKE x5)": measure(
+                    engine, lambda: search_page(db, tenant_id, legacy_filter(term)), args.iterations
+                ),
+                "pg_trgm (search_text)": measure(
+                    engine, lambda: search_page(db, tenant_id, indexed_filter(term)), args.iterations
+                ),
+            }
+            print_results(f"Búsqueda por {label} ({term!r}) con {args.leads} leads", results)
+            if is_postgres:
+                for name, condition in (("legacy", legacy_filter(term)), ("pg_trgm", indexed_filter(term))):
+                    print(f"  plan {name}:")
+                    print_plan(db, tenant_id, condition)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
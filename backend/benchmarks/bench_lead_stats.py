@@ -0,0 +1,94 @@
+"""
+Benchmark de /leads/stats/overview.
+
+Compara el motor de agregación (app.services.lead_stats, que lee de
+lead_daily_rollups) con la implementación anterior de una query COUNT por
+estado, fuente, prioridad y día sobre la tabla leads.
+
+Uso:
+    python -m benchmarks.bench_lead_stats --leads 50000
+    python -m benchmarks.bench_lead_stats --database-url postgresql://... --leads 200000
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.models.lead import Lead, LeadStatus, LeadSource, LeadPriority
+from app.models.tenant import Tenant
+from app.services.lead_rollups import rebuild_lead_rollups
+from app.services.lead_stats import compute_lead_overview
+from benchmarks.common import base_parser, make_session_factory, measure, print_results
+
+
+def seed_leads(db, n: int):
+    tenant = Tenant(name="Benchmark Clinic", slug=f"bench-{uuid.uuid4().hex[:8]}", is_active=True)
+    db.add(tenant)
+    db.flush()
+
+    now = datetime.utcnow()
+    statuses, sources, priorities = list(LeadStatus), list(LeadSource), list(LeadPriority)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(days=random.randint(0, 365), minutes=random.randint(0, 1440))
+        converted = random.random() < 0.15
+        rows.append({
+            "id": uuid.uuid4(),
+            "tenant_id": tenant.id,
+            "first_name": f"Lead{i}",
+            "phone": f"+34600{i:07d}",
+            "source": random.choice(sources),
+            "status": random.choice(statuses),
+            "priority": random.choice(priorities),
+            "lead_score": random.randint(0, 100),
+            "is_active": True,
+            "is_duplicate": False,
+            "created_at": created,
+            "updated_at": created,
+            "conversion_date": created + timedelta(days=random.randint(1, 60)) if converted else None,
+        })
+        if len(rows) == 5000:
+            db.bulk_insert_mappings(Lead, rows)
+            rows = []
+    if rows:
+        db.bulk_insert_mappings(Lead, rows)
+    db.commit()
+    return tenant.id
+
+
+def legacy_overview(db, tenant_id):
+    """Patrón anterior: una query COUNT por cada valor y por cada día."""
+    base = db.query(Lead).filter(Lead.tenant_id == tenant_id, Lead.is_active == True)
+    now = datetime.utcnow()
+    base.count()
+    for enum_cls, column in ((LeadStatus, Lead.status), (LeadSource, Lead.source), (LeadPriority, Lead.priority)):
+        for value in enum_cls:
+            base.filter(column == value).count()
+    for i in range(30):
+        base.filter(func.date(Lead.created_at) == (now - timedelta(days=i)).date()).count()
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument("--leads", type=int, default=20000, help="Leads sintéticos a generar")
+    args = parser.parse_args()
+
+    engine, SessionLocal = make_session_factory(args.database_url)
+    db = SessionLocal()
+    try:
+        print(f"Generando {args.leads} leads...")
+        tenant_id = seed_leads(db, args.leads)
+        rebuild_lead_rollups(db, tenant_id=tenant_id)
+        results = {
+            "legacy (per-count)": measure(engine, lambda: legacy_overview(db, tenant_id), args.iterations),
+            "rollup engine": measure(engine, lambda: compute_lead_overview(db, tenant_id), args.iterations),
+        }
+        print_results(f"/leads/stats/overview con {args.leads} leads", results)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Por defecto cada benchmark usa una base SQLite en memoria para poder
+ejecutarse sin infraestructura; con --database-url se puede apuntar a una
+base PostgreSQL de pruebas (nunca a producción: los benchmarks insertan datos).
+"""
+
+import argparse
+import statistics
+import time
+import warnings
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 - registra todos los modelos en Base.metadata
+from app.db.session import Base
+
+warnings.filterwarnings("ignore", category=SAWarning)
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--database-url", default="sqlite:///:memory:",
+                        help="Base de datos de pruebas (por defecto SQLite en memoria)")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="Número de llamadas medidas")
+    return parser
+
+
+def make_session_factory(database_url: str, **engine_options):
+    """Crea engine + sessionmaker y asegura que existan las tablas."""
+    if database_url.startswith("sqlite") and ":memory:" in database_url:
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    elif database_url.startswith("sqlite"):
+        # SQLite en fichero: una conexión por hilo (benchmarks concurrentes)
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            **engine_options
+        )
+    else:
+        engine = create_engine(database_url, pool_pre_ping=True, **engine_options)
+        with engine.begin() as conn:
+            # Los índices de búsqueda usan gin_trgm_ops
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(bind=engine)
+    if not database_url.startswith("sqlite"):
+        with engine.begin() as conn:
+            # audit_logs está particionada; sin partición no admite inserts
+            conn.execute(text("CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT"))
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class StatementCounter:
+    """Cuenta las sentencias SQL emitidas por un engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    @contextmanager
+    def track(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def measure(engine, fn, iterations: int) -> dict:
+    """Ejecuta fn() varias veces y devuelve queries por llamada y latencias en ms."""
+    counter = StatementCounter(engine)
+    fn()  # warm-up
+    with counter.track():
+        fn()
+    queries = counter.count
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "queries": queries,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[round(0.95 * (len(timings) - 1))],
+        "mean_ms": statistics.fmean(timings),
+    }
+
+
+def print_results(title: str, rows: dict):
+    print(f"\n{title}")
+    print(f"{'variante':<24}{'queries':>10}{'p50 ms':>12}{'p95 ms':>12}{'media ms':>12}")
+    for name, r in rows.items():
+        print(f"{name:<24}{r['queries']:>10}{r['p50_ms']:>12.2f}{r['p95_ms']:>12.2f}{r['mean_ms']:>12.2f}")
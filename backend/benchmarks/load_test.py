@@ -0,0 +1,222 @@
+"""
+Prueba de carga de login + listado de leads con tráfico concurrente.
+
+Mide p50/p95/p99 de POST /auth/login y GET /leads/ y el retraso del event
+loop (lo que tarda en despertar un `asyncio.sleep` de 5 ms mientras hay
+requests en vuelo). Con --compare ejecuta dos variantes sobre los mismos
+datos:
+
+- inline: el trabajo síncrono (ORM, bcrypt) corre en el event loop, como
+  antes de app.core.concurrency (THREADPOOL_OFFLOAD=false)
+- threadpool: el trabajo síncrono corre en el threadpool (THREADPOOL_WORKERS)
+
+El login es una ruta `def` y corre en el threadpool en ambas variantes.
+
+Por defecto la aplicación se ejecuta en proceso (httpx + ASGITransport)
+sobre una base SQLite temporal con datos sintéticos. Con --base-url se
+lanza el tráfico contra un servidor ya desplegado (uvicorn + PostgreSQL),
+usando las credenciales de --email/--password; para comparar antes/después
+en ese modo, ejecutarlo contra cada versión desplegada.
+
+Uso:
+    python -m benchmarks.load_test --compare
+    python -m benchmarks.load_test --concurrency 100 --requests 1000 --compare
+    python -m benchmarks.load_test --base-url http://localhost:8000 --email a@b.com --password ...
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from app.core.concurrency import configure_threadpool
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.lead import Lead, LeadStatus, LeadSource, LeadPriority
+from app.models.tenant import Tenant
+from app.models.user import User, UserRole
+from benchmarks.common import make_session_factory
+
+LOGIN_PATH = f"{settings.API_V1_STR}/auth/login"
+LEADS_PATH = f"{settings.API_V1_STR}/leads/"
+BENCH_EMAIL = "loadtest@example.com"
+BENCH_PASSWORD = "loadtest-password"
+
+
+def seed(db, n_leads: int):
+    """Tenant, un manager con contraseña conocida y n_leads leads."""
+    tenant = Tenant(name="Load Test Clinic", slug=f"load-{uuid.uuid4().hex[:8]}", is_active=True)
+    db.add(tenant)
+    db.flush()
+    db.add(User(
+        email=BENCH_EMAIL,
+        hashed_password=get_password_hash(BENCH_PASSWORD),
+        first_name="Load",
+        last_name="Test",
+        role=UserRole.manager,
+        tenant_id=tenant.id,
+        is_active=True
+    ))
+
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(Lead, [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant.id,
+            "first_name": f"Lead{i}",
+            "phone": f"+34600{i:07d}",
+            "source": random.choice(list(LeadSource)),
+            "status": random.choice(list(LeadStatus)),
+            "priority": random.choice(list(LeadPriority)),
+            "is_active": True,
+            "is_duplicate": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(n_leads)
+    ])
+    db.commit()
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[round(pct * (len(ordered) - 1))] if ordered else 0.0
+
+
+async def loop_lag_probe(samples: list, stop: asyncio.Event, interval: float = 0.005):
+    """Registra cuánto se retrasa el event loop respecto a `interval` (ms)."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def run_traffic(client: httpx.AsyncClient, args) -> dict:
+    """Lanza args.requests requests repartidas entre args.concurrency workers."""
+    response = await client.post(LOGIN_PATH, data={"username": args.email, "password": args.password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    latencies = {"login": [], "list_leads": []}
+    errors = 0
+    remaining = iter(range(args.requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            if random.random() < args.login_ratio:
+                kind, call = "login", client.post(
+                    LOGIN_PATH, data={"username": args.email, "password": args.password}
+                )
+            else:
+                kind, call = "list_leads", client.get(
+                    LEADS_PATH, params={"page_size": args.page_size}, headers=headers
+                )
+            start = time.perf_counter()
+            response = await call
+            latencies[kind].append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    lag, stop = [], asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(lag, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    return {"latencies": latencies, "lag": lag, "elapsed": elapsed, "errors": errors}
+
+
+async def run_in_process(args, offload: bool) -> dict:
+    from app.main import app
+
+    settings.THREADPOOL_OFFLOAD = offload
+    configure_threadpool()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=300) as client:
+        return await run_traffic(client, args)
+
+
+async def run_remote(args) -> dict:
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300) as client:
+        return await run_traffic(client, args)
+
+
+def print_report(results: dict, args):
+    print(f"\n{args.requests} requests, concurrencia {args.concurrency}, "
+          f"{args.login_ratio:.0%} logins")
+    print(f"{'variante':<12}{'endpoint':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'req/s':>9}{'lag p99':>10}{'errores':>9}")
+    for variant, r in results.items():
+        throughput = args.requests / r["elapsed"]
+        lag_p99 = percentile(r["lag"], 0.99)
+        for endpoint, values in r["latencies"].items():
+            if not values:
+                continue
+            print(f"{variant:<12}{endpoint:<12}{len(values):>6}"
+                  f"{statistics.median(values):>10.1f}{percentile(values, 0.95):>10.1f}"
+                  f"{percentile(values, 0.99):>10.1f}{throughput:>9.1f}{lag_p99:>10.1f}{r['errors']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor desplegado; si se omite, la app corre en proceso")
+    parser.add_argument("--email", default=BENCH_EMAIL)
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--database-url", help="Base para el modo en proceso (por defecto SQLite temporal)")
+    parser.add_argument("--leads", type=int, default=5000, help="Leads sintéticos (modo en proceso)")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--login-ratio", type=float, default=0.1, help="Fracción de requests que son login")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--compare", action="store_true", help="Medir inline y threadpool (modo en proceso)")
+    args = parser.parse_args()
+
+    if args.base_url:
+        print_report({"remote": asyncio.run(run_remote(args))}, args)
+        return
+
+    from app.db.session import get_db
+    from app.main import app
+
+    tmpdir = tempfile.mkdtemp(prefix="clinik-load-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'load_test.db')}"
+    # Una conexión por request en vuelo: el pool no debe ser el cuello de botella
+    engine, SessionLocal = make_session_factory(
+        database_url, pool_size=args.concurrency, max_overflow=args.concurrency
+    )
+    db = SessionLocal()
+    try:
+        print(f"Generando {args.leads} leads...")
+        seed(db, args.leads)
+    finally:
+        db.close()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    variants = {"inline": False, "threadpool": True} if args.compare else {
+        "threadpool" if settings.THREADPOOL_OFFLOAD else "inline": settings.THREADPOOL_OFFLOAD
+    }
+    results = {name: asyncio.run(run_in_process(args, offload)) for name, offload in variants.items()}
+    print_report(results, args)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
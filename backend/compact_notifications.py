@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compactación de la tabla notifications.
+
+- Elimina las notificaciones más antiguas que la retención (también las no
+  leídas, descontándolas del contador del usuario)
+- Mueve a notifications_archive las leídas más antiguas que --archive-after-days
+- Elimina del archivo lo que supera la retención
+
+Pensado para ejecutarse desde cron, p. ej. a diario:
+    python compact_notifications.py
+
+Uso:
+    python compact_notifications.py --dry-run
+    python compact_notifications.py --archive-after-days 30 --retention-days 180
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.notification_retention import compact_notifications, count_compactable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compactar notifications")
+    parser.add_argument("--archive-after-days", type=int, default=None,
+                        help="Archivar leídas más antiguas (por defecto NOTIFICATION_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--retention-days", type=int, default=None,
+                        help="Eliminar más antiguas (por defecto NOTIFICATION_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Filas por lote (por defecto NOTIFICATION_COMPACTION_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar qué se compactaría")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        if args.dry_run:
+            report = count_compactable(
+                db, archive_after_days=args.archive_after_days, retention_days=args.retention_days
+            )
+        else:
+            report = compact_notifications(
+                db,
+                archive_after_days=args.archive_after_days,
+                retention_days=args.retention_days,
+                batch_size=args.batch_size
+            )
+        prefix = "(dry-run) " if args.dry_run else ""
+        print(f"{prefix}Expiradas eliminadas: {report.deleted_expired} ({report.deleted_unread} no leídas)")
+        print(f"{prefix}Archivadas: {report.archived}")
+        print(f"{prefix}Eliminadas del archivo: {report.deleted_archived}")
+        print(f"✅ {prefix}Filas recuperadas en notifications: {report.reclaimed}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Worker de envío de emails (tabla email_outbox).
+
+Las requests solo encolan los emails (app.core.email.send_email); este
+proceso los envía por lotes, reutilizando una conexión SMTP por servidor,
+y reintenta los fallos con backoff exponencial. Ver
+app.services.email_worker. Se pueden ejecutar varias instancias a la vez
+en PostgreSQL.
+
+Uso:
+    python email_worker.py            # Bucle continuo
+    python email_worker.py --once     # Un solo lote (cron, pruebas)
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.models  # noqa: F401
+from app.core.config import settings
+from app.services.email_worker import EmailOutboxWorker
+
+
+async def run(args):
+    worker = EmailOutboxWorker(batch_size=args.batch_size, poll_interval=args.poll_interval)
+    if args.once:
+        try:
+            summary = await worker.run_once()
+        finally:
+            await worker.pool.close()
+        print(f"✅ Enviados: {summary['sent']}, reintentos: {summary['retried']}, fallidos: {summary['failed']}")
+        return
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    print(f"📬 Email worker iniciado (lotes de {args.batch_size}, cada {args.poll_interval}s)")
+    await worker.run_forever()
+    print("Email worker detenido")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enviar los emails pendientes de email_outbox")
+    parser.add_argument("--once", action="store_true", help="Procesar un solo lote y salir")
+    parser.add_argument("--batch-size", type=int, default=settings.EMAIL_WORKER_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=settings.EMAIL_WORKER_POLL_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Mantenimiento de las particiones mensuales de audit_logs (PostgreSQL).
+
+- ensure:  crea las particiones del mes actual y de los próximos meses
+- archive: exporta a disco las particiones más antiguas que la retención
+           (JSONL comprimido o Parquet) y después las separa y elimina
+- list:    muestra las particiones adjuntas
+
+Pensado para ejecutarse desde cron, p. ej. a diario:
+    python manage_audit_partitions.py ensure && python manage_audit_partitions.py archive
+
+Uso:
+    python manage_audit_partitions.py list
+    python manage_audit_partitions.py ensure --months-ahead 6
+    python manage_audit_partitions.py archive --retention-months 12 --archive-dir /backups/audit
+    python manage_audit_partitions.py archive --format parquet --dry-run
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.audit_partitions import (
+    ARCHIVE_FORMATS,
+    archive_audit_partitions,
+    ensure_audit_partitions,
+    list_audit_partitions,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones mensuales de audit_logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Listar particiones")
+
+    ensure = subparsers.add_parser("ensure", help="Crear particiones futuras")
+    ensure.add_argument("--months-ahead", type=int, default=None,
+                        help="Meses a crear por delante (por defecto AUDIT_PARTITION_MONTHS_AHEAD)")
+
+    archive = subparsers.add_parser("archive", help="Archivar y eliminar particiones antiguas")
+    archive.add_argument("--retention-months", type=int, default=None,
+                         help="Meses completos a conservar (por defecto AUDIT_RETENTION_MONTHS)")
+    archive.add_argument("--archive-dir", default=None, help="Directorio de archivo (por defecto AUDIT_ARCHIVE_DIR)")
+    archive.add_argument("--format", choices=ARCHIVE_FORMATS, default="jsonl")
+    archive.add_argument("--dry-run", action="store_true", help="Solo mostrar qué se archivaría")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        if args.command == "list":
+            for partition in list_audit_partitions(db):
+                print(f"{partition.name}: [{partition.month}, {partition.upper_bound})")
+        elif args.command == "ensure":
+            created = ensure_audit_partitions(db, months_ahead=args.months_ahead)
+            print(f"✅ {len(created)} particiones creadas" + (f": {', '.join(created)}" if created else ""))
+        else:
+            archived = archive_audit_partitions(
+                db,
+                retention_months=args.retention_months,
+                archive_dir=args.archive_dir,
+                fmt=args.format,
+                dry_run=args.dry_run,
+            )
+            for item in archived:
+                if args.dry_run:
+                    print(f"(dry-run) se archivaría {item['partition']}")
+                else:
+                    print(f"✅ {item['partition']}: {item['rows']} filas -> {item['path']}")
+            if not archived:
+                print("No hay particiones fuera de la retención")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
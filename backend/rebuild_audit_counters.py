@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla audit_daily_counters desde audit_logs.
+
+Los contadores se mantienen desde el audit writer; este script sirve para
+el backfill inicial o para repararlos tras cargas hechas fuera de la API.
+Los meses ya archivados (manage_audit_partitions.py archive) no están en
+audit_logs: usar --since para no perder sus contadores.
+
+Uso:
+    python rebuild_audit_counters.py                       # Todo
+    python rebuild_audit_counters.py --since 2026-01-01    # Desde un día
+    python rebuild_audit_counters.py --tenant <uuid>       # Un tenant
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+from uuid import UUID
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.audit_stats import rebuild_audit_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcular audit_daily_counters")
+    parser.add_argument("--tenant", type=UUID, default=None, help="UUID del tenant (opcional)")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="Recalcular solo desde este día (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        counters = rebuild_audit_counters(db, tenant_id=args.tenant, since=args.since)
+        print(f"✅ audit_daily_counters recalculada: {counters} contadores")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla lead_daily_rollups desde la tabla leads.
+
+La tabla se mantiene de forma incremental desde los endpoints de leads;
+este script sirve para el backfill inicial o para repararla tras cargas
+masivas hechas fuera de la API (importaciones, scripts de datos).
+
+Uso:
+    python rebuild_lead_rollups.py                  # Todos los tenants
+    python rebuild_lead_rollups.py --tenant <uuid>  # Un tenant
+"""
+
+import argparse
+import os
+import sys
+from uuid import UUID
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.lead_rollups import rebuild_lead_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcular lead_daily_rollups")
+    parser.add_argument("--tenant", type=UUID, default=None, help="UUID del tenant (opcional)")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        buckets = rebuild_lead_rollups(db, tenant_id=args.tenant)
+        print(f"✅ lead_daily_rollups recalculada: {buckets} buckets")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla notification_counters desde notifications y los avisos
+de tenant (notification_broadcasts) sin confirmación de lectura.
+
+Los contadores de no leídas se mantienen desde app.core.notifications; este
+script sirve para repararlos tras cambios hechos fuera del ORM (SQL manual,
+borrados en cascada de la base de datos...).
+
+Uso:
+    python rebuild_notification_counters.py                 # Todos los usuarios
+    python rebuild_notification_counters.py --user <uuid>   # Un usuario
+"""
+
+import argparse
+import os
+import sys
+from uuid import UUID
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.core.notifications import recalculate_unread_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcular notification_counters")
+    parser.add_argument("--user", type=UUID, action="append", default=None,
+                        help="UUID del usuario (opcional, se puede repetir)")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        counters = recalculate_unread_counts(db, user_ids=args.user)
+        print(f"✅ notification_counters recalculada: {counters} usuarios con no leídas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Foto diaria del inventario (inventory_daily_snapshots).
+
+Guarda por producto activo el stock y el valor al cierre del día y las
+unidades usadas en citas. Alimenta GET /inventory/stats/ (más usados y
+proyección de días hasta agotar stock).
+
+Pensado para ejecutarse desde cron poco después de medianoche (UTC):
+    python snapshot_inventory.py
+
+Uso:
+    python snapshot_inventory.py --day 2026-10-01
+    python snapshot_inventory.py --backfill-days 30
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.inventory_snapshots import take_inventory_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Foto diaria del inventario")
+    parser.add_argument("--day", type=date.fromisoformat, default=None,
+                        help="Día de la foto, YYYY-MM-DD (por defecto ayer)")
+    parser.add_argument("--backfill-days", type=int, default=None,
+                        help="Generar las fotos de los últimos N días hasta ayer")
+    args = parser.parse_args()
+
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    if args.backfill_days:
+        days = [yesterday - timedelta(days=offset) for offset in range(args.backfill_days - 1, -1, -1)]
+    else:
+        days = [args.day or yesterday]
+
+    db = maintenance_session()
+    try:
+        for day in days:
+            products = take_inventory_snapshot(db, day)
+            print(f"{day}: {products} productos")
+        print(f"✅ Fotos de inventario generadas: {len(days)} días")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
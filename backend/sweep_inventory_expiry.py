@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Barrido de vencimientos del inventario.
+
+Crea en una pasada, para todos los tenants, las alertas "expired" y
+"expiring_soon" de los productos activos que vencen pronto y desactiva las
+que ya no aplican. Es idempotente: un producto con alerta activa no
+recibe otra.
+
+Pensado para ejecutarse desde cron una vez al día:
+    python sweep_inventory_expiry.py
+
+Uso:
+    python sweep_inventory_expiry.py --days 14
+    python sweep_inventory_expiry.py --tenant-id <uuid>
+"""
+
+import argparse
+import os
+import sys
+from uuid import UUID
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import maintenance_session
+import app.models  # noqa: F401
+from app.services.inventory_expiry import EXPIRED, EXPIRING_SOON, EXPIRING_SOON_DAYS, sweep_expiry_alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de vencimientos del inventario")
+    parser.add_argument("--days", type=int, default=EXPIRING_SOON_DAYS,
+                        help=f"Días de antelación para 'expiring_soon' (por defecto {EXPIRING_SOON_DAYS})")
+    parser.add_argument("--tenant-id", type=UUID, default=None,
+                        help="Limitar el barrido a un tenant")
+    args = parser.parse_args()
+
+    db = maintenance_session()
+    try:
+        result = sweep_expiry_alerts(db, days=args.days, tenant_id=args.tenant_id)
+        db.commit()
+        print(f"Vencidos: {result[EXPIRED]}, próximos a vencer: {result[EXPIRING_SOON]}, "
+              f"alertas desactivadas: {result['resolved']}")
+        print("✅ Barrido de vencimientos completado")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
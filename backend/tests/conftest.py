@@ -5,24 +5,37 @@ Este archivo se ejecuta antes de todas las pruebas y proporciona fixtures compar
 import os
 import pytest
 import asyncio
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
 # Set testing environment
 os.environ["TESTING"] = "true"
+# El audit writer solo vuelca al cerrar el cliente o con audit_writer.flush():
+# la base de tests es una única conexión compartida entre hilos
+os.environ["AUDIT_FLUSH_INTERVAL_SECONDS"] = "3600"
+# Sin PostgreSQL: los eventos de notificaciones se reparten en proceso
+os.environ["NOTIFICATION_LISTEN_ENABLED"] = "false"
 
 from app.main import app
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.models.user import Base
+from app.core.auth_cache import clear_auth_cache
+from app.core.mail_config import clear_mail_config_cache
+from app.core.template_cache import clear_template_cache
+from app.services.audit_writer import audit_writer
 from app.core.security import create_access_token, verify_password
 from app.models.tenant import Tenant
 from app.models.user import User, UserRole
 
-# Test database URL - usando SQLite en memoria para tests
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL - usando SQLite en memoria para tests. La base es
+# compartida (cache=shared) para que el engine async vea los mismos datos;
+# la conexión del StaticPool la mantiene viva durante toda la sesión.
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///file:clinik_test?mode=memory&cache=shared&uri=true"
+SQLALCHEMY_ASYNC_TEST_DATABASE_URL = "sqlite+aiosqlite:///file:clinik_test?mode=memory&cache=shared&uri=true"
 
 # Crear engine para testing
 test_engine = create_engine(
@@ -37,6 +50,18 @@ TestingSessionLocal = sessionmaker(
     bind=test_engine
 )
 
+# Engine async para las rutas que usan get_async_db
+async_test_engine = create_async_engine(
+    SQLALCHEMY_ASYNC_TEST_DATABASE_URL,
+    poolclass=NullPool,
+)
+
+AsyncTestingSessionLocal = async_sessionmaker(
+    async_test_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -55,7 +80,15 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async para usar la base de datos de testing."""
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+audit_writer.session_factory = TestingSessionLocal
 
 
 @pytest.fixture(scope="function")
@@ -64,6 +97,9 @@ def db_session():
     # Limpiar y crear todas las tablas
     Base.metadata.drop_all(bind=test_engine)
     Base.metadata.create_all(bind=test_engine)
+    clear_auth_cache()
+    clear_mail_config_cache()
+    clear_template_cache()
     
     # Crear sesión
     session = TestingSessionLocal()
@@ -76,6 +112,37 @@ def db_session():
         Base.metadata.drop_all(bind=test_engine)
 
 
+class QueryCounter:
+    """Registra las sentencias SQL emitidas contra el engine de testing."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture(scope="function")
+def query_counter(db_session):
+    """Contador de queries para tests de regresión de rendimiento."""
+    counter = QueryCounter()
+    engines = (test_engine, async_test_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", counter)
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Cliente de testing para FastAPI."""
@@ -398,4 +465,105 @@ def sample_leads(db_session, test_tenant, doctor_user, commercial_user):
     for lead in leads:
         db_session.refresh(lead)
     
-    return leads
\ No newline at end of file
+    return leads
+
+
+# ============== FIXTURES DE INVENTARIO ==============
+
+@pytest.fixture
+def inventory_category(db_session, test_tenant):
+    """Categoría de inventario del tenant de pruebas."""
+    from app.models.inventory import InventoryCategory
+
+    category = InventoryCategory(tenant_id=test_tenant.id, name="Material de curas")
+    db_session.add(category)
+    db_session.commit()
+    return category
+
+
+@pytest.fixture
+def make_product(db_session, test_tenant, inventory_category):
+    """Crea un producto de inventario; `expires_in` es el tiempo hasta su vencimiento."""
+    from datetime import datetime
+    from app.models.inventory import InventoryProduct
+
+    def make(name="Gasas", current_stock=10, minimum_stock=0, expires_in=None, is_active=True, tenant_id=None):
+        product = InventoryProduct(
+            tenant_id=tenant_id or test_tenant.id,
+            category_id=inventory_category.id,
+            name=name,
+            current_stock=current_stock,
+            minimum_stock=minimum_stock,
+            is_active=is_active,
+            expiration_date=datetime.utcnow() + expires_in if expires_in is not None else None
+        )
+        db_session.add(product)
+        db_session.commit()
+        return product
+
+    return make
+
+
+@pytest.fixture
+def make_service(db_session, test_tenant, inventory_category):
+    """Crea un servicio con un producto por cantidad en `stock`."""
+    from app.models.inventory import InventoryProduct, ServiceProduct
+    from app.models.service import Service, ServiceCategory
+
+    service_category = ServiceCategory(tenant_id=test_tenant.id, name="Curas", is_active=True)
+    db_session.add(service_category)
+    db_session.flush()
+
+    def make(name, stock, quantity=2):
+        service = Service(
+            tenant_id=test_tenant.id,
+            category_id=service_category.id,
+            name=name,
+            duration_minutes=30,
+            is_active=True
+        )
+        db_session.add(service)
+        db_session.flush()
+        for i, current_stock in enumerate(stock):
+            product = InventoryProduct(
+                tenant_id=test_tenant.id,
+                category_id=inventory_category.id,
+                name=f"{name} - producto {i}",
+                current_stock=current_stock,
+                minimum_stock=0
+            )
+            db_session.add(product)
+            db_session.flush()
+            db_session.add(ServiceProduct(
+                tenant_id=test_tenant.id,
+                service_id=service.id,
+                product_id=product.id,
+                default_quantity=quantity
+            ))
+        db_session.commit()
+        return service
+
+    return make
+
+
+@pytest.fixture
+def make_appointment(db_session, test_tenant, doctor_user):
+    """Crea una cita para mañana con el servicio dado."""
+    from datetime import datetime, timedelta
+    from app.models.appointment import Appointment
+
+    def make(service):
+        appointment = Appointment(
+            tenant_id=test_tenant.id,
+            provider_id=doctor_user.id,
+            service_id=service.id,
+            scheduled_at=datetime.utcnow() + timedelta(days=1),
+            duration_minutes=30,
+            patient_name="Paciente",
+            patient_phone="+34600000000"
+        )
+        db_session.add(appointment)
+        db_session.commit()
+        return appointment
+
+    return make
@@ -319,6 +319,43 @@ class TestAppointments:
         assert "page_size" in data
         assert "total" in data
     
+    def test_appointment_cursor_pagination(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        doctor_user,
+        patient_user,
+        auth_headers_manager
+    ):
+        """Test que el modo cursor devuelve X-Next-Cursor y recorre todas las citas."""
+        from app.models.appointment import Appointment
+
+        scheduled_at = datetime.utcnow() + timedelta(days=1)
+        for i in range(5):
+            db_session.add(Appointment(
+                tenant_id=test_tenant.id,
+                provider_id=doctor_user.id,
+                patient_id=patient_user.id,
+                scheduled_at=scheduled_at + timedelta(hours=i // 2),
+                duration_minutes=30,
+                patient_name=f"Patient {i}",
+                patient_phone="+34600000000"
+            ))
+        db_session.commit()
+
+        seen = []
+        url = "/api/v1/appointments/?pagination=cursor&page_size=2"
+        while url:
+            response = client.get(url, headers=auth_headers_manager)
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item["id"] for item in response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            url = f"/api/v1/appointments/?page_size=2&cursor={next_cursor}" if next_cursor else None
+
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
     def test_appointment_date_filter(
         self, 
         client, 
@@ -386,4 +423,57 @@ class TestAppointmentConfirmation:
             f"/api/v1/appointments/{sample_appointment.id}/confirm",
             headers=auth_headers_patient
         )
-        assert response.status_code == status.HTTP_403_FORBIDDEN
\ No newline at end of file
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+class TestAppointmentStats:
+    """Pruebas para estadísticas de citas."""
+
+    def test_summary_aggregates_in_sql(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        doctor_user,
+        patient_user,
+        auth_headers_manager,
+        query_counter
+    ):
+        """Test que el resumen agrega estados, tipos y duraciones sin cargar las citas."""
+        from app.models.appointment import Appointment, AppointmentStatus, AppointmentType
+
+        base = {
+            "tenant_id": test_tenant.id,
+            "provider_id": doctor_user.id,
+            "patient_id": patient_user.id,
+            "duration_minutes": 30,
+            "patient_name": "Test Patient",
+            "patient_phone": "+34600000000",
+        }
+        db_session.add_all([
+            Appointment(**base, status=AppointmentStatus.completed, type=AppointmentType.treatment,
+                        scheduled_at=datetime.utcnow() - timedelta(days=2), actual_duration_minutes=40),
+            Appointment(**base, status=AppointmentStatus.completed, type=AppointmentType.consultation,
+                        scheduled_at=datetime.utcnow() - timedelta(days=3), actual_duration_minutes=20),
+            Appointment(**base, status=AppointmentStatus.cancelled_by_patient, type=AppointmentType.consultation,
+                        scheduled_at=datetime.utcnow() - timedelta(days=1)),
+            Appointment(**base, status=AppointmentStatus.scheduled, type=AppointmentType.consultation,
+                        scheduled_at=datetime.utcnow() + timedelta(hours=3)),
+        ])
+        db_session.commit()
+
+        query_counter.reset()
+        response = client.get(
+            "/api/v1/appointments/stats/summary",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert query_counter.count <= 2
+
+        data = response.json()
+        assert data["total_appointments"] == 4
+        assert data["upcoming_appointments"] == 1
+        assert data["completed_appointments"] == 2
+        assert data["cancelled_appointments"] == 1
+        assert data["appointments_by_type"]["consultation"] == 3
+        assert data["average_duration"] == 30.0
+        assert data["show_up_rate"] == pytest.approx(200 / 3)
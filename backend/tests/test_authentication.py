@@ -213,4 +213,204 @@ class TestTenantIsolation:
         
         # Verificar aislamiento (los leads deberían ser diferentes)
         assert len(first_tenant_leads.get("items", [])) > 0
-        assert len(second_tenant_leads.get("items", [])) == 0
\ No newline at end of file
+        assert len(second_tenant_leads.get("items", [])) == 0
+
+class TestAuthCache:
+    """Pruebas de la caché de usuario y membresía por token."""
+
+    def test_cached_user_skips_lookup(self, client, auth_headers_manager, query_counter):
+        """Test que la segunda request con el mismo token no vuelve a consultar el usuario."""
+        client.get("/api/v1/leads/", headers=auth_headers_manager)
+
+        query_counter.reset()
+        response = client.get("/api/v1/leads/", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_200_OK
+        assert not any("FROM users" in statement for statement in query_counter.statements)
+
+    def test_deactivated_user_is_invalidated(self, client, db_session, auth_headers_manager, manager_user):
+        """Test que desactivar al usuario invalida su entrada en la caché."""
+        response = client.get("/api/v1/leads/", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_200_OK
+
+        manager_user.is_active = False
+        db_session.commit()
+
+        response = client.get("/api/v1/leads/", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_membership_changes_apply_to_existing_tokens(self, client, db_session, test_tenant, manager_user):
+        """Test que el rol y la baja de la membresía se aplican sin emitir un token nuevo."""
+        from app.core.security import create_access_token
+        from app.models.tenant_membership import TenantMembership
+        from app.models.user import UserRole
+
+        membership = TenantMembership(
+            user_id=manager_user.id,
+            tenant_id=test_tenant.id,
+            role=UserRole.manager,
+            is_active=True
+        )
+        db_session.add(membership)
+        db_session.commit()
+
+        token = create_access_token(data={
+            "sub": manager_user.email,
+            "user_id": manager_user.id,
+            "role": UserRole.manager.value,
+            "tenant_id": test_tenant.id,
+            "membership_id": membership.id,
+        })
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/v1/leads/", headers=headers).status_code == status.HTTP_200_OK
+
+        membership.role = UserRole.patient
+        db_session.commit()
+        assert client.get("/api/v1/leads/", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+
+        membership.is_active = False
+        db_session.commit()
+        assert client.get("/api/v1/leads/", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestAuditWriter:
+    """Pruebas de la escritura por lotes de audit_logs."""
+
+    def test_login_audit_is_queued_and_flushed(self, client, db_session, tenant_admin_user):
+        """Test que el login encola la auditoría y el writer la escribe al volcar."""
+        from app.models.audit_log import AuditAction, AuditLog
+        from app.services.audit_writer import audit_writer
+
+        client.post(
+            "/api/v1/auth/login",
+            data={"username": tenant_admin_user.email, "password": "testpass123"}
+        )
+        client.post(
+            "/api/v1/auth/login",
+            data={"username": tenant_admin_user.email, "password": "wrongpassword"}
+        )
+        assert audit_writer.pending() == 2
+        assert db_session.query(AuditLog).count() == 0
+
+        assert audit_writer.flush() == 2
+        actions = {log.action for log in db_session.query(AuditLog).all()}
+        assert actions == {AuditAction.LOGIN_SUCCESS, AuditAction.LOGIN_FAILED}
+
+    def test_sync_mode_writes_immediately(self, db_session, tenant_admin_user):
+        """Test que sync=True persiste la entrada en la sesión del llamador."""
+        from app.api.v1.audit_logs import create_audit_log
+        from app.models.audit_log import AuditAction, AuditLog
+
+        audit_log = create_audit_log(
+            db=db_session,
+            action=AuditAction.TENANT_DELETED,
+            user_id=tenant_admin_user.id,
+            sync=True
+        )
+        assert audit_log is not None
+        assert db_session.query(AuditLog).filter(AuditLog.id == audit_log.id).count() == 1
+
+    def test_stats_are_limited_to_requested_range(self, client, db_session, superadmin_user, auth_headers_superadmin):
+        """Test que /audit-logs/stats cuenta solo el rango de fechas pedido."""
+        from datetime import datetime
+        from app.api.v1.audit_logs import create_audit_log
+        from app.models.audit_log import AuditAction, AuditCategory, AuditLog
+        from app.services.audit_stats import rebuild_audit_counters
+
+        for action, category in (
+            (AuditAction.TENANT_CREATED, AuditCategory.TENANT),
+            (AuditAction.USER_CREATED, AuditCategory.USER),
+        ):
+            create_audit_log(db=db_session, action=action, category=category, sync=True)
+        old = db_session.query(AuditLog).filter(AuditLog.action == AuditAction.TENANT_CREATED).one()
+        old.timestamp = datetime(2025, 1, 15)
+        db_session.commit()
+        rebuild_audit_counters(db_session)
+
+        response = client.get(
+            "/api/v1/audit-logs/stats",
+            params={"start_date": "2026-01-01T00:00:00"},
+            headers=auth_headers_superadmin
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_logs"] == 1
+        assert data["actions_by_category"] == {AuditCategory.USER: 1}
+        assert data["recent_critical_actions"] == []
+
+        response = client.get("/api/v1/audit-logs/stats", headers=auth_headers_superadmin)
+        assert response.json()["total_logs"] == 2
+
+    def test_writer_maintains_counters(
+        self, client, db_session, tenant_admin_user, auth_headers_tenant_admin, auth_headers_superadmin
+    ):
+        """Test que el writer actualiza los contadores y /tenant/stats los usa."""
+        from app.models.audit_log import AuditDailyCounter
+        from app.services.audit_writer import audit_writer
+
+        for password in ("testpass123", "wrongpassword", "wrongpassword"):
+            client.post(
+                "/api/v1/auth/login",
+                data={"username": tenant_admin_user.email, "password": password}
+            )
+        audit_writer.flush()
+        assert db_session.query(AuditDailyCounter).count() == 2
+
+        response = client.get("/api/v1/audit-logs/stats", headers=auth_headers_superadmin)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_logs"] == 3
+        assert data["logins_today"] == 1
+        assert data["failed_logins_today"] == 2
+        assert data["logs_last_7_days"] == 3
+        assert data["actions_by_category"] == {"auth": 3}
+
+        # Los logins fallidos por credenciales no llevan tenant
+        response = client.get("/api/v1/audit-logs/tenant/stats", headers=auth_headers_tenant_admin)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_logs"] == 1
+        assert data["logins_today"] == 1
+        assert data["failed_logins_today"] == 0
+
+    def test_counters_upsert_one_row_per_key(self, db_session, test_tenant):
+        """Test que lotes sucesivos suman sobre la misma fila del contador, también sin tenant."""
+        from datetime import datetime
+        from sqlalchemy import func
+        from app.models.audit_log import AuditDailyCounter
+        from app.services.audit_stats import record_audit_counts
+
+        now = datetime.utcnow()
+        for tenant_id in (test_tenant.id, None):
+            for batch in (2, 1, 3):
+                record_audit_counts(db_session, [
+                    {"tenant_id": tenant_id, "timestamp": now, "category": "auth", "action": "LOGIN_FAILED"}
+                ] * batch)
+                db_session.commit()
+
+        rows = db_session.query(
+            AuditDailyCounter.tenant_id, func.count(), func.sum(AuditDailyCounter.count)
+        ).group_by(AuditDailyCounter.tenant_id).all()
+        assert sorted((count, total) for _, count, total in rows) == [(1, 6), (1, 6)]
+
+    def test_tenant_delete_drops_its_counters(self, db_session, test_tenant):
+        """Test que borrar un tenant borra sus contadores sin chocar con los de toda la plataforma."""
+        from datetime import datetime
+        from app.models.audit_log import AuditDailyCounter
+        from app.services.audit_stats import record_audit_counts
+
+        now = datetime.utcnow()
+        record_audit_counts(db_session, [
+            {"tenant_id": tenant_id, "timestamp": now, "category": "auth", "action": "LOGIN_FAILED"}
+            for tenant_id in (test_tenant.id, None)
+        ])
+        db_session.commit()
+
+        db_session.connection().exec_driver_sql("PRAGMA foreign_keys=ON")
+        try:
+            db_session.delete(test_tenant)
+            db_session.commit()
+            rows = db_session.query(AuditDailyCounter.tenant_id, AuditDailyCounter.count).all()
+            assert rows == [(None, 1)]
+        finally:
+            db_session.rollback()
+            db_session.connection().exec_driver_sql("PRAGMA foreign_keys=OFF")
@@ -308,4 +308,66 @@ class TestCommercialStats:
         data = response.json()
         
         # Verificar que la respuesta contiene datos filtrados
-        assert "overview" in data
\ No newline at end of file
+        assert "overview" in data
+
+    def test_stats_use_bounded_number_of_queries(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        auth_headers_manager,
+        sample_leads,
+        doctor_user,
+        patient_user,
+        query_counter
+    ):
+        """Test que las estadísticas no emiten una query por estado ni por médico."""
+        from app.core.security import get_password_hash
+        from app.models.appointment import Appointment, AppointmentStatus
+        from app.models.user import User, UserRole
+
+        # Más médicos no deben añadir queries
+        for i in range(5):
+            db_session.add(User(
+                email=f"doctor{i}@testclinic.com",
+                hashed_password=get_password_hash("testpass123"),
+                first_name="Doctor",
+                last_name=str(i),
+                role=UserRole.medico,
+                tenant_id=test_tenant.id,
+                is_active=True
+            ))
+        for appointment_status in (AppointmentStatus.completed, AppointmentStatus.in_progress):
+            db_session.add(Appointment(
+                tenant_id=test_tenant.id,
+                provider_id=doctor_user.id,
+                patient_id=patient_user.id,
+                status=appointment_status,
+                scheduled_at=datetime.utcnow() - timedelta(days=1),
+                duration_minutes=30,
+                patient_name="Test Patient",
+                patient_phone="+34600000000"
+            ))
+        db_session.commit()
+
+        query_counter.reset()
+        response = client.get(
+            "/api/v1/commercial-stats/",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        # Autenticación + leads + citas + médicos
+        assert query_counter.count <= 4
+
+        data = response.json()
+        assert data["overview"]["total_leads"] == 3
+        assert data["overview"]["active_patients"] == 1
+        assert data["funnel"]["nuevo"] == 2
+        assert data["sources"]["facebook"] == 2
+        assert data["sources"]["instagram"] == 2
+
+        doctors = {d["name"]: d for d in data["doctors_performance"]}
+        assert len(doctors) == 6
+        assert doctors["Dr. Test Doctor"]["leads_assigned"] == 1
+        assert doctors["Dr. Test Doctor"]["active_patients"] == 1
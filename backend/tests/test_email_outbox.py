@@ -0,0 +1,209 @@
+"""
+Pruebas del outbox de emails y su worker contra un servidor SMTP local (aiosmtpd).
+"""
+import asyncio
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi import status
+
+from app.core.config import settings
+from app.core.email import send_email
+from app.core.mail_config import encrypt_password, get_tenant_smtp_settings
+from app.models.email_outbox import EmailOutbox, EmailStatus
+from app.services.email_worker import EmailOutboxWorker
+from tests.conftest import TestingSessionLocal
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """Guarda los mensajes recibidos y rechaza los destinatarios rejected@..."""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("rejected@"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.peers.add(session.peer)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_SERVER", controller.hostname)
+    monkeypatch.setattr(settings, "MAIL_PORT", controller.port)
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(settings, "USE_CREDENTIALS", False)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def tenant_with_smtp(db_session, test_tenant):
+    test_tenant.smtp_enabled = True
+    test_tenant.smtp_host = "smtp.tenant.test"
+    test_tenant.smtp_port = 2525
+    test_tenant.smtp_username = "mailer"
+    test_tenant.smtp_password_encrypted = encrypt_password("smtp-secret")
+    db_session.commit()
+    return test_tenant
+
+
+def _queue(db_session, *recipients):
+    for recipient in recipients:
+        asyncio.run(send_email(
+            email_to=recipient,
+            subject="Prueba",
+            html_content="<p>Hola</p>",
+            db=db_session
+        ))
+
+
+def _outbox(db_session):
+    db_session.expire_all()
+    return {row.email_to: row for row in db_session.query(EmailOutbox).all()}
+
+
+class TestEmailOutbox:
+    """Pruebas del envío en segundo plano."""
+
+    def test_forgot_password_only_queues(self, client, db_session, manager_user, smtp_server):
+        """Test que la request responde con el email encolado, sin enviarlo."""
+        response = client.post(
+            "/api/v1/auth/forgot-password",
+            json={"email": manager_user.email}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        row = _outbox(db_session)[manager_user.email]
+        assert row.status == EmailStatus.PENDING
+        assert row.attempts == 0
+        assert smtp_server.messages == []
+
+    def test_worker_reuses_connection(self, db_session, smtp_server):
+        """Test que el worker envía varios lotes por una sola conexión SMTP."""
+        _queue(db_session, "a@example.com", "b@example.com", "c@example.com")
+        worker = EmailOutboxWorker(session_factory=TestingSessionLocal, batch_size=2)
+
+        async def run():
+            try:
+                first = await worker.run_once()
+                second = await worker.run_once()
+            finally:
+                await worker.pool.close()
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first["sent"] == 2
+        assert second["sent"] == 1
+        assert worker.pool.opened == 1
+        assert len(smtp_server.messages) == 3
+        assert len(smtp_server.peers) == 1
+
+        rows = _outbox(db_session)
+        assert all(row.status == EmailStatus.SENT and row.sent_at for row in rows.values())
+
+    def test_failed_delivery_backs_off_then_fails(self, db_session, monkeypatch):
+        """Test que un fallo de conexión se reintenta con backoff hasta EMAIL_MAX_ATTEMPTS."""
+        monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+        monkeypatch.setattr(settings, "MAIL_PORT", _free_port())  # Nadie escuchando
+        monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 2)
+        _queue(db_session, "a@example.com")
+        worker = EmailOutboxWorker(session_factory=TestingSessionLocal)
+
+        summary = asyncio.run(worker.run_once())
+        assert summary == {"sent": 0, "retried": 1, "failed": 0}
+        row = _outbox(db_session)["a@example.com"]
+        assert row.status == EmailStatus.PENDING
+        assert row.attempts == 1
+        assert row.last_error
+        delay = row.next_attempt_at - datetime.utcnow()
+        assert timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS - 5) < delay
+        assert delay <= timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS)
+
+        # No se reintenta antes de tiempo
+        assert asyncio.run(worker.run_once())["retried"] == 0
+
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        assert asyncio.run(worker.run_once()) == {"sent": 0, "retried": 0, "failed": 1}
+        assert _outbox(db_session)["a@example.com"].status == EmailStatus.FAILED
+
+    def test_rejected_recipient_fails_without_retry(self, db_session, smtp_server):
+        """Test que un 5xx del destinatario no se reintenta ni afecta al resto del lote."""
+        _queue(db_session, "rejected@example.com", "ok@example.com")
+        worker = EmailOutboxWorker(session_factory=TestingSessionLocal)
+
+        async def run():
+            try:
+                return await worker.run_once()
+            finally:
+                await worker.pool.close()
+
+        assert asyncio.run(run()) == {"sent": 1, "retried": 0, "failed": 1}
+        rows = _outbox(db_session)
+        assert rows["rejected@example.com"].status == EmailStatus.FAILED
+        assert rows["rejected@example.com"].attempts == 1
+        assert rows["ok@example.com"].status == EmailStatus.SENT
+        assert [message.rcpt_tos for message in smtp_server.messages] == [["ok@example.com"]]
+
+
+class TestMailConfigCache:
+    """Pruebas de la caché de configuración SMTP por tenant."""
+
+    def test_settings_are_cached(self, db_session, tenant_with_smtp, query_counter):
+        """Test que la configuración del tenant se lee y descifra una sola vez."""
+        tenant_id = tenant_with_smtp.id
+        query_counter.reset()
+        smtp = get_tenant_smtp_settings(db_session, tenant_id)
+        assert smtp.host == "smtp.tenant.test"
+        assert smtp.password == "smtp-secret"
+        assert query_counter.count == 1
+
+        for _ in range(5):
+            assert get_tenant_smtp_settings(db_session, tenant_id) is smtp
+        assert query_counter.count == 1
+
+    def test_settings_update_invalidates(
+        self,
+        client,
+        db_session,
+        tenant_with_smtp,
+        auth_headers_tenant_admin
+    ):
+        """Test que cambiar el SMTP por la API invalida la caché."""
+        assert get_tenant_smtp_settings(db_session, tenant_with_smtp.id).host == "smtp.tenant.test"
+
+        response = client.put(
+            "/api/v1/tenant-settings/my-tenant/settings",
+            json={"smtp_host": "smtp.changed.test", "smtp_password": "new-secret"},
+            headers=auth_headers_tenant_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        smtp = get_tenant_smtp_settings(db_session, tenant_with_smtp.id)
+        assert (smtp.host, smtp.password) == ("smtp.changed.test", "new-secret")
+
+        response = client.delete(
+            "/api/v1/tenant-settings/my-tenant/smtp/password",
+            headers=auth_headers_tenant_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert get_tenant_smtp_settings(db_session, tenant_with_smtp.id) is None
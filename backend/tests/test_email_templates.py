@@ -0,0 +1,103 @@
+"""
+Pruebas de la caché de plantillas de email.
+"""
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.core import template_cache
+from app.core.email import get_email_template_from_db, render_email_template, send_notification_email
+from app.models.email_outbox import EmailOutbox
+from app.models.email_template import EmailTemplate, EmailTemplateType
+
+
+@pytest.fixture
+def notification_template(db_session):
+    template = EmailTemplate(
+        name="Notificación",
+        template_type=EmailTemplateType.NOTIFICATION,
+        subject="Aviso para {{ user_name }}",
+        html_content="<p>{{ message }}</p>",
+        is_active=True
+    )
+    db_session.add(template)
+    db_session.commit()
+    return template
+
+
+@pytest.fixture
+def compile_counter(monkeypatch):
+    """Cuenta las compilaciones de Jinja."""
+    calls = []
+    compile_ = template_cache.jinja_env.compile
+
+    def counting_compile(source, name=None, *args, **kwargs):
+        calls.append(name)
+        return compile_(source, name, *args, **kwargs)
+
+    monkeypatch.setattr(template_cache.jinja_env, "compile", counting_compile)
+    # Sin bytecode previo de otras ejecuciones
+    template_cache.jinja_env.bytecode_cache.clear()
+    return calls
+
+
+class TestEmailTemplateCache:
+    """Pruebas de plantillas compiladas y su invalidación."""
+
+    def test_bulk_send_compiles_once(self, db_session, notification_template, compile_counter, query_counter):
+        """Test que muchos envíos con la misma plantilla la compilan y consultan una sola vez."""
+        query_counter.reset()
+
+        async def send_all():
+            for i in range(20):
+                await send_notification_email(
+                    db=db_session,
+                    email_to=f"user{i}@example.com",
+                    message=f"Mensaje {i}",
+                    user_name=f"Usuario {i}"
+                )
+
+        asyncio.run(send_all())
+
+        assert len(compile_counter) == 2  # HTML y asunto
+        template_queries = [sql for sql in query_counter.statements if "FROM email_templates" in sql]
+        assert len(template_queries) == 1
+
+        emails = db_session.query(EmailOutbox).order_by(EmailOutbox.email_to).all()
+        assert len(emails) == 20
+        assert emails[0].subject == "Aviso para Usuario 0"
+        assert emails[0].html_content == "<p>Mensaje 0</p>"
+
+    def test_update_and_delete_invalidate(
+        self,
+        client,
+        db_session,
+        notification_template,
+        auth_headers_superadmin
+    ):
+        """Test que PUT y DELETE /email-templates invalidan la caché."""
+        template_id = notification_template.id
+
+        def render():
+            template = asyncio.run(get_email_template_from_db(db_session, EmailTemplateType.NOTIFICATION))
+            if template is None:
+                return None
+            return asyncio.run(render_email_template(template, {"user_name": "Ana", "message": "Hola"}))
+
+        assert render() == ("Aviso para Ana", "<p>Hola</p>")
+
+        response = client.put(
+            f"/api/v1/email-templates/{template_id}",
+            json={"html_content": "<div>{{ message }}</div>"},
+            headers=auth_headers_superadmin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert render() == ("Aviso para Ana", "<div>Hola</div>")
+
+        response = client.delete(
+            f"/api/v1/email-templates/{template_id}",
+            headers=auth_headers_superadmin
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert render() is None
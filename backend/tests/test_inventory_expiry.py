@@ -0,0 +1,92 @@
+"""
+Pruebas del barrido de vencimientos y del listado de productos por vencer.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.inventory import InventoryAlert
+from app.services.inventory_expiry import sweep_expiry_alerts
+
+
+def _active_alerts(db_session):
+    return sorted(
+        (alert.product.name, alert.alert_type)
+        for alert in db_session.query(InventoryAlert).filter(InventoryAlert.is_active == True)
+    )
+
+
+class TestExpirySweep:
+    """Pruebas de sweep_expiry_alerts."""
+
+    def test_sweep_all_tenants_in_one_pass(self, db_session, make_product, query_counter):
+        """Test que el barrido alerta a todos los tenants sin duplicar y desactiva las alertas obsoletas."""
+        make_product("Vencido", expires_in=timedelta(days=-2))
+        soon = make_product("Por vencer", expires_in=timedelta(days=3))
+        make_product("Lejano", expires_in=timedelta(days=30))
+        make_product("Sin vencimiento")
+        make_product("Inactivo", expires_in=timedelta(days=-2), is_active=False)
+        make_product("Otra clínica", expires_in=timedelta(days=1), tenant_id=uuid.uuid4())
+
+        query_counter.reset()
+        assert sweep_expiry_alerts(db_session) == {"expired": 1, "expiring_soon": 2, "resolved": 0}
+        db_session.commit()
+        assert query_counter.count == 3
+        assert _active_alerts(db_session) == [
+            ("Otra clínica", "expiring_soon"), ("Por vencer", "expiring_soon"), ("Vencido", "expired")
+        ]
+
+        # Repetir no crea alertas nuevas
+        assert sweep_expiry_alerts(db_session) == {"expired": 0, "expiring_soon": 0, "resolved": 0}
+
+        # Al vencer, la alerta "expiring_soon" se sustituye por "expired"
+        soon.expiration_date = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+        assert sweep_expiry_alerts(db_session) == {"expired": 1, "expiring_soon": 0, "resolved": 1}
+        db_session.commit()
+        assert _active_alerts(db_session) == [
+            ("Otra clínica", "expiring_soon"), ("Por vencer", "expired"), ("Vencido", "expired")
+        ]
+
+
+class TestExpiringEndpoint:
+    """Pruebas de GET /inventory/expiring/."""
+
+    def test_keyset_pages(self, client, db_session, make_product, auth_headers_manager):
+        """Test que el listado recorre por cursor los productos por vencimiento usando el índice parcial."""
+        for name, days in (("D", 20), ("A", -5), ("C", 10), ("B", 2), ("E", 60)):
+            make_product(name, expires_in=timedelta(days=days))
+        make_product("Sin vencimiento")
+
+        names, cursor = [], None
+        while True:
+            params = {"days": 30, "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/inventory/expiring/", params=params, headers=auth_headers_manager)
+            assert response.status_code == status.HTTP_200_OK
+            names += [(item["name"], item["is_expired"]) for item in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert names == [("A", True), ("B", False), ("C", False), ("D", False)]
+
+        response = client.get(
+            "/api/v1/inventory/expiring/",
+            params={"days": 5, "include_expired": False},
+            headers=auth_headers_manager
+        )
+        assert [(item["name"], item["days_until_expiry"]) for item in response.json()] == [("B", 2)]
+
+        executed = []
+        listener = lambda conn, cursor, sql, params, context, many: executed.append((sql, params))
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            client.get("/api/v1/inventory/expiring/", headers=auth_headers_manager)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+        sql, params = next(item for item in executed if "FROM inventory_products" in item[0])
+        plan = db_session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+        assert any("ix_inventory_products_expiration" in row[-1] for row in plan)
@@ -0,0 +1,256 @@
+"""
+Pruebas del ledger de stock de inventario.
+"""
+import threading
+import uuid
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.inventory import InventoryAlert, InventoryMovement, InventoryProduct, MovementType
+from app.services.inventory_ledger import InsufficientStockError, StockMovement, apply_movement, apply_movements
+
+
+@pytest.fixture
+def file_session_factory(tmp_path):
+    """Base SQLite en fichero: cada hilo usa su propia conexión, como los workers en producción."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'ledger.db'}", connect_args={"timeout": 30})
+    InventoryProduct.__table__.create(engine)
+    InventoryMovement.__table__.create(engine)
+    InventoryAlert.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestStockLedger:
+    """Pruebas de apply_movements."""
+
+    def test_apply_movements_batch(self, db_session, make_product, test_tenant, manager_user, query_counter):
+        """Test que un lote actualiza el stock en una sentencia y calcula stock_after por movimiento."""
+        gauze = make_product("Gasas", current_stock=10)
+        syringes = make_product("Jeringas", current_stock=5)
+        query_counter.reset()
+
+        stock = apply_movements(db_session, test_tenant.id, manager_user.id, [
+            StockMovement(gauze.id, -2, MovementType.OUT_USAGE),
+            StockMovement(syringes.id, 20, MovementType.IN_PURCHASE, unit_cost=0.5),
+            StockMovement(gauze.id, -3, MovementType.OUT_USAGE),
+        ])
+        db_session.commit()
+
+        assert stock == {gauze.id: 5, syringes.id: 25}
+        assert len([sql for sql in query_counter.statements if sql.startswith("UPDATE")]) == 1
+        assert len([sql for sql in query_counter.statements if sql.startswith("INSERT")]) == 1
+        assert (gauze.current_stock, syringes.current_stock) == (5, 25)
+
+        movements = db_session.query(InventoryMovement).all()
+        assert sorted((m.quantity, m.stock_after, m.total_cost) for m in movements) == [
+            (-3, 5, None), (-2, 8, None), (20, 25, 10.0)
+        ]
+
+    def test_insufficient_stock(self, db_session, make_product, test_tenant, manager_user):
+        """Test que una salida mayor que el stock se rechaza sin registrar movimientos."""
+        gauze = make_product("Gasas", current_stock=10)
+        syringes = make_product("Jeringas", current_stock=1)
+
+        with pytest.raises(InsufficientStockError) as exc_info:
+            apply_movements(db_session, test_tenant.id, manager_user.id, [
+                StockMovement(gauze.id, -2, MovementType.OUT_USAGE),
+                StockMovement(syringes.id, -3, MovementType.OUT_USAGE),
+            ])
+        db_session.rollback()
+
+        assert (exc_info.value.product_id, exc_info.value.available, exc_info.value.requested) == (syringes.id, 1, 3)
+        assert (gauze.current_stock, syringes.current_stock) == (10, 1)
+        assert db_session.query(InventoryMovement).count() == 0
+
+        with pytest.raises(LookupError):
+            apply_movement(db_session, uuid.uuid4(), manager_user.id, StockMovement(gauze.id, -1, MovementType.OUT_USAGE))
+
+    def test_concurrent_movements_do_not_lose_updates(self, file_session_factory):
+        """Test de estrés: muchos hilos descontando a la vez no pierden actualizaciones ni venden de más."""
+        tenant_id, user_id = uuid.uuid4(), uuid.uuid4()
+        with file_session_factory() as db:
+            products = [
+                InventoryProduct(tenant_id=tenant_id, category_id=uuid.uuid4(), name=f"Producto {i}", current_stock=150)
+                for i in range(3)
+            ]
+            db.add_all(products)
+            db.commit()
+            product_ids = [product.id for product in products]
+
+        threads_count, iterations = 8, 25
+        applied, rejected, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker(worker_index):
+            # Los lotes de cada hilo recorren los productos en distinto orden
+            order = product_ids if worker_index % 2 else product_ids[::-1]
+            with file_session_factory() as db:
+                for _ in range(iterations):
+                    try:
+                        apply_movements(db, tenant_id, user_id, [
+                            StockMovement(product_id, -1, MovementType.OUT_USAGE) for product_id in order
+                        ])
+                        apply_movement(db, tenant_id, user_id, StockMovement(order[0], -1, MovementType.OUT_USAGE))
+                        db.commit()
+                        result = applied
+                    except InsufficientStockError:
+                        db.rollback()
+                        result = rejected
+                    except Exception as e:
+                        db.rollback()
+                        with lock:
+                            errors.append(e)
+                        return
+                    with lock:
+                        result.append(order[0])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(applied) + len(rejected) == threads_count * iterations
+        assert rejected  # Se pide más stock del que hay
+
+        with file_session_factory() as db:
+            for product_id in product_ids:
+                product = db.get(InventoryProduct, product_id)
+                movements = db.query(InventoryMovement).filter(InventoryMovement.product_id == product_id).all()
+                # Cada movimiento confirmado se refleja en el stock, que nunca baja de cero
+                assert product.current_stock == 150 + sum(m.quantity for m in movements)
+                assert product.current_stock >= 0
+                assert product.current_stock == 150 - len(applied) - applied.count(product_id)
+                # Cada movimiento vio un stock distinto: ninguna actualización se pisó
+                assert len({m.stock_after for m in movements}) == len(movements)
+
+
+class TestLedgerEndpoints:
+    """Pruebas de los endpoints que mueven stock a través del ledger."""
+
+    def test_record_usage_rejects_oversell(
+        self,
+        client,
+        db_session,
+        make_service,
+        make_appointment,
+        make_product,
+        auth_headers_manager
+    ):
+        """Test que registrar uso descuenta stock y rechaza pedir más del disponible."""
+        appointment = make_appointment(make_service("Cura", stock=[]))
+        product = make_product(current_stock=3)
+        url = f"/api/v1/inventory-usage/appointments/{appointment.id}/usage/"
+        payload = {"appointment_id": str(appointment.id), "product_id": str(product.id), "quantity_used": 2}
+
+        response = client.post(url, json=payload, headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_200_OK
+
+        response = client.post(url, json=payload, headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Disponible: 1" in response.json()["detail"]
+
+        db_session.expire_all()
+        assert product.current_stock == 1
+        assert [m.stock_after for m in db_session.query(InventoryMovement).all()] == [1]
+
+    def test_stock_update_records_difference(self, client, db_session, make_product, auth_headers_tenant_admin):
+        """Test que PUT /products/{id}/stock registra la diferencia con el stock vigente."""
+        product = make_product(current_stock=10)
+
+        response = client.put(
+            f"/api/v1/inventory/products/{product.id}/stock",
+            json={"current_stock": 4, "movement_type": "ajuste_salida"},
+            headers=auth_headers_tenant_admin
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["current_stock"] == 4
+
+        movement = db_session.query(InventoryMovement).one()
+        assert (movement.quantity, movement.stock_after, movement.movement_type) == (-6, 4, MovementType.OUT_ADJUSTMENT)
+
+
+class TestStockAlerts:
+    """Pruebas de las alertas generadas al cruzar el stock mínimo."""
+
+    def test_alerts_follow_threshold_crossings(self, db_session, make_product, test_tenant, manager_user):
+        """Test que solo se crean alertas al cruzar el mínimo o agotarse, y se desactivan al reponer."""
+        product = make_product(current_stock=12, minimum_stock=10)
+
+        def move(quantity, movement_type=MovementType.OUT_USAGE):
+            apply_movement(db_session, test_tenant.id, manager_user.id, StockMovement(product.id, quantity, movement_type))
+            db_session.commit()
+            return sorted(
+                (alert.alert_type, alert.is_active)
+                for alert in db_session.query(InventoryAlert).filter(InventoryAlert.product_id == product.id)
+            )
+
+        assert move(-1) == []
+        assert move(-2) == [("low_stock", True)]
+        assert move(-1) == [("low_stock", True)]
+        assert move(-8) == [("low_stock", True), ("out_of_stock", True)]
+        assert move(5, MovementType.IN_PURCHASE) == [("low_stock", True), ("out_of_stock", False)]
+        assert move(15, MovementType.IN_PURCHASE) == [("low_stock", False), ("out_of_stock", False)]
+        assert move(-15) == [("low_stock", False), ("low_stock", True), ("out_of_stock", False)]
+
+    def test_alerts_on_create_and_threshold_changes(
+        self,
+        client,
+        db_session,
+        inventory_category,
+        auth_headers_tenant_admin
+    ):
+        """Test que crear el producto, cambiar su mínimo o desactivarlo también crea o resuelve alertas."""
+        response = client.post("/api/v1/inventory/products/", json={
+            "category_id": str(inventory_category.id),
+            "name": "Guantes",
+            "current_stock": 5,
+            "minimum_stock": 10
+        }, headers=auth_headers_tenant_admin)
+        assert response.status_code == status.HTTP_200_OK
+        product_id = response.json()["id"]
+
+        def update(**fields):
+            response = client.put(
+                f"/api/v1/inventory/products/{product_id}", json=fields, headers=auth_headers_tenant_admin
+            )
+            assert response.status_code == status.HTTP_200_OK
+            return sorted(
+                (alert.alert_type, alert.is_active)
+                for alert in db_session.query(InventoryAlert).filter(InventoryAlert.product_id == uuid.UUID(product_id))
+            )
+
+        assert update(name="Guantes de nitrilo") == [("low_stock", True)]
+        assert update(minimum_stock=3) == [("low_stock", False)]
+        assert update(minimum_stock=8) == [("low_stock", False), ("low_stock", True)]
+        assert update(is_active=False) == [("low_stock", False), ("low_stock", False)]
+        assert update(is_active=True) == [("low_stock", False), ("low_stock", False), ("low_stock", True)]
+
+    def test_low_stock_endpoint_uses_partial_index(
+        self,
+        client,
+        db_session,
+        make_product,
+        auth_headers_manager,
+        query_counter
+    ):
+        """Test que /low-stock-alerts/ lee el índice parcial y agrega el uso en una consulta."""
+        for stock in (0, 3, 50, 8):
+            product = make_product(f"Producto {stock}", current_stock=stock, minimum_stock=10)
+
+        query_counter.reset()
+        response = client.get("/api/v1/inventory/low-stock-alerts/", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_200_OK
+        assert [alert["current_stock"] for alert in response.json()] == [0, 3, 8]
+        inventory_queries = [sql for sql in query_counter.statements if "inventory_" in sql]
+        assert len(inventory_queries) == 2
+
+        plan = db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + inventory_queries[0], (product.tenant_id.hex,)
+        ).all()
+        assert any("ix_inventory_products_low_stock" in row[-1] for row in plan)
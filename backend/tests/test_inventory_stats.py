@@ -0,0 +1,120 @@
+"""
+Pruebas de las fotos diarias y las estadísticas de inventario.
+"""
+from datetime import datetime, time, timedelta
+
+import pytest
+from fastapi import status
+
+from app.models.inventory import InventoryDailySnapshot, InventoryMovement, InventoryProduct, MovementType
+from app.services.inventory_snapshots import project_stockouts, take_inventory_snapshot
+
+
+@pytest.fixture
+def stocked_products(db_session, test_tenant, inventory_category, manager_user):
+    """
+    Gasas (stock 20, 2.0 €/u) y Jeringas (stock 100, sin coste), con usos
+    anteayer, ayer y hoy.
+    """
+    today = datetime.utcnow().date()
+    gauze = InventoryProduct(
+        tenant_id=test_tenant.id, category_id=inventory_category.id, name="Gasas",
+        current_stock=20, minimum_stock=5, cost_per_unit=2.0,
+        created_at=datetime.combine(today - timedelta(days=10), time.min)
+    )
+    syringes = InventoryProduct(
+        tenant_id=test_tenant.id, category_id=inventory_category.id, name="Jeringas",
+        current_stock=100, minimum_stock=5,
+        created_at=datetime.combine(today - timedelta(days=10), time.min)
+    )
+    db_session.add_all([gauze, syringes])
+    db_session.flush()
+
+    def used(product, quantity, days_ago, hour=12):
+        created_at = datetime.combine(today - timedelta(days=days_ago), time(hour))
+        if days_ago == 0:
+            created_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.add(InventoryMovement(
+            tenant_id=test_tenant.id, product_id=product.id, movement_type=MovementType.OUT_USAGE,
+            quantity=-quantity, user_id=manager_user.id, stock_after=0, created_at=created_at
+        ))
+
+    used(gauze, 4, days_ago=2)
+    used(gauze, 2, days_ago=1)
+    used(gauze, 3, days_ago=0)
+    used(syringes, 1, days_ago=1)
+    db_session.commit()
+    return gauze, syringes
+
+
+class TestInventorySnapshots:
+    """Pruebas del job nocturno y del dashboard."""
+
+    def test_snapshot_reconstructs_closing_stock(self, db_session, stocked_products):
+        """Test que la foto de un día pasado descuenta los movimientos posteriores y es idempotente."""
+        gauze, syringes = stocked_products
+        today = datetime.utcnow().date()
+
+        for _ in range(2):
+            assert take_inventory_snapshot(db_session, today - timedelta(days=2)) == 2
+            assert take_inventory_snapshot(db_session, today - timedelta(days=1)) == 2
+
+        snapshots = {
+            (row.product_id, (today - row.day).days): (row.stock, row.inventory_value, row.usage_out)
+            for row in db_session.query(InventoryDailySnapshot).all()
+        }
+        assert snapshots == {
+            (gauze.id, 2): (25, 50.0, 4),
+            (gauze.id, 1): (23, 46.0, 2),
+            (syringes.id, 2): (101, 0.0, 0),
+            (syringes.id, 1): (100, 0.0, 1),
+        }
+
+        # Los productos creados después del día no aparecen en su foto
+        assert take_inventory_snapshot(db_session, today - timedelta(days=20)) == 0
+
+    def test_stats_combine_snapshots_with_intraday_usage(
+        self,
+        client,
+        db_session,
+        stocked_products,
+        auth_headers_manager,
+        query_counter
+    ):
+        """Test que /stats/ suma fotos y movimientos de hoy y proyecta días hasta agotar stock."""
+        gauze, syringes = stocked_products
+        today = datetime.utcnow().date()
+        take_inventory_snapshot(db_session, today - timedelta(days=2))
+        take_inventory_snapshot(db_session, today - timedelta(days=1))
+
+        query_counter.reset()
+        response = client.get("/api/v1/inventory/stats/", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+
+        assert data["total_products"] == 2
+        assert data["total_categories"] == 1
+        assert data["products_low_stock"] == 0
+        assert data["total_inventory_value"] == 40.0
+        assert data["most_used_products"] == [
+            {"name": "Gasas", "total_used": 9},
+            {"name": "Jeringas", "total_used": 1},
+        ]
+        assert [
+            (item["product_name"], item["avg_daily_usage"], item["days_until_stockout"])
+            for item in data["stockout_projection"]
+        ] == [("Gasas", 3.0, 6), ("Jeringas", 0.5, 200)]
+
+        inventory_queries = [sql for sql in query_counter.statements if "inventory_" in sql]
+        assert len(inventory_queries) == 5
+
+    def test_projection_window(self, db_session, stocked_products, test_tenant):
+        """Test que la proyección solo promedia los días de la ventana."""
+        today = datetime.utcnow().date()
+        take_inventory_snapshot(db_session, today - timedelta(days=2))
+        take_inventory_snapshot(db_session, today - timedelta(days=1))
+
+        projection = project_stockouts(db_session, test_tenant.id, window_days=1, today=today)
+        assert [
+            (item["product_name"], item["avg_daily_usage"], item["days_until_stockout"]) for item in projection
+        ] == [("Gasas", 2.0, 10), ("Jeringas", 1.0, 100)]
@@ -0,0 +1,100 @@
+"""
+Pruebas del consumo de inventario en citas.
+"""
+from fastapi import status
+
+from app.models.inventory import (
+    AppointmentInventoryUsage, InventoryMovement, InventoryProduct, MovementType, ServiceProduct
+)
+
+
+def _auto_consume(client, appointment, headers):
+    response = client.post(
+        f"/api/v1/inventory-usage/appointments/{appointment.id}/auto-consume/",
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def _stock(db_session, service):
+    db_session.expire_all()
+    return sorted(
+        product.current_stock
+        for product in db_session.query(InventoryProduct).join(ServiceProduct).filter(
+            ServiceProduct.service_id == service.id
+        )
+    )
+
+
+class TestAutoConsume:
+    """Pruebas del consumo automático de los productos del servicio."""
+
+    def test_consumes_and_tops_up(self, client, db_session, make_service, make_appointment, auth_headers_manager):
+        """Test que consume, completa usos parciales y no vende stock inexistente."""
+        service = make_service("Cura", stock=[10, 1, 5])
+        appointment = make_appointment(service)
+        products = {
+            product.current_stock: product
+            for product in db_session.query(InventoryProduct).join(ServiceProduct).filter(
+                ServiceProduct.service_id == service.id
+            )
+        }
+        # Uso parcial previo del producto con stock 5
+        db_session.add(AppointmentInventoryUsage(
+            tenant_id=appointment.tenant_id,
+            appointment_id=appointment.id,
+            product_id=products[5].id,
+            quantity_used=1,
+            recorded_by_id=appointment.provider_id
+        ))
+        db_session.commit()
+
+        data = _auto_consume(client, appointment, auth_headers_manager)
+        actions = sorted((item["action"], item["quantity"]) for item in data["consumed_products"])
+        assert actions == [("consumed", 2), ("updated", 1)]
+        assert [item["available"] for item in data["insufficient_stock"]] == [1]
+        assert _stock(db_session, service) == [1, 4, 8]
+
+        movements = db_session.query(InventoryMovement).filter(
+            InventoryMovement.appointment_id == appointment.id
+        ).all()
+        assert sorted((m.quantity, m.stock_after) for m in movements) == [(-2, 8), (-1, 4)]
+        assert all(m.movement_type == MovementType.OUT_USAGE for m in movements)
+        usages = {
+            usage.product_id: usage.quantity_used
+            for usage in db_session.query(AppointmentInventoryUsage).filter(
+                AppointmentInventoryUsage.appointment_id == appointment.id
+            )
+        }
+        assert usages == {products[10].id: 2, products[5].id: 2}
+
+        # Repetir no vuelve a descontar
+        data = _auto_consume(client, appointment, auth_headers_manager)
+        assert {item["action"] for item in data["consumed_products"]} == {"already_consumed"}
+        assert _stock(db_session, service) == [1, 4, 8]
+
+    def test_query_count_is_constant(
+        self,
+        client,
+        db_session,
+        make_service,
+        make_appointment,
+        auth_headers_manager,
+        query_counter
+    ):
+        """Test que el número de consultas de inventario no crece con los productos del servicio."""
+        def inventory_queries(service):
+            appointment = make_appointment(service)
+            query_counter.reset()
+            data = _auto_consume(client, appointment, auth_headers_manager)
+            assert len(data["consumed_products"]) == len(_stock(db_session, service))
+            return [
+                sql for sql in query_counter.statements
+                if "inventory_products" in sql or "appointment_inventory_usage" in sql
+                or "inventory_movements" in sql
+            ]
+
+        small = inventory_queries(make_service("Cura corta", stock=[10] * 2))
+        large = inventory_queries(make_service("Cura larga", stock=[10] * 12))
+        assert len(large) == len(small)
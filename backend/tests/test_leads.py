@@ -2,6 +2,7 @@
 Pruebas para la funcionalidad de gestión de leads.
 """
 import pytest
+from datetime import datetime, timedelta
 from fastapi import status
 
 
@@ -307,6 +308,30 @@ class TestLeadsFiltering:
         found = any("Juan" in lead["first_name"] for lead in leads)
         assert found
     
+    def test_search_matches_name_email_and_formatted_phone(
+        self,
+        client,
+        auth_headers_manager,
+        sample_leads
+    ):
+        """Test que la búsqueda indexada cubre nombre completo, email y teléfono normalizado."""
+        def search(term):
+            response = client.get(
+                "/api/v1/leads/",
+                params={"search": term},
+                headers=auth_headers_manager
+            )
+            assert response.status_code == status.HTTP_200_OK
+            return sorted(lead["first_name"] for lead in response.json()["items"])
+
+        assert search("juan pérez") == ["Juan"]
+        assert search("MARIA@TEST") == ["María"]
+        # +34600123457 escrito con separadores
+        assert search("600 12 34 57") == ["María"]
+        assert search("(600) 123-45") == ["Carlos", "Juan", "María"]
+        # Los comodines de LIKE se tratan como texto
+        assert search("%") == []
+
     def test_pagination_leads(self, client, auth_headers_manager, sample_leads):
         """Test paginación de leads."""
         response = client.get(
@@ -320,6 +345,109 @@ class TestLeadsFiltering:
         # Verificar que devuelve máximo 2 leads
         assert len(leads) <= 2
 
+    def _walk_cursor(self, client, headers, url):
+        """Recorre todas las páginas siguiendo next_cursor."""
+        seen = []
+        cursor = None
+        while True:
+            page_url = url + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(page_url, headers=headers)
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                return seen, data
+
+    def test_cursor_pagination_visits_each_lead_once(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        auth_headers_manager
+    ):
+        """Test que el modo cursor recorre todos los leads sin duplicados aunque empaten en la clave."""
+        from app.models.lead import Lead
+
+        created_at = datetime.utcnow()
+        for i in range(7):
+            db_session.add(Lead(
+                tenant_id=test_tenant.id,
+                first_name=f"Cursor{i}",
+                phone=f"+3460020{i:04d}",
+                source="website",
+                status="nuevo",
+                priority="media",
+                created_at=created_at,
+                last_contact_at=created_at - timedelta(days=i) if i % 2 else None,
+                is_active=True
+            ))
+        db_session.commit()
+
+        seen, last_page = self._walk_cursor(
+            client, auth_headers_manager,
+            "/api/v1/leads/?pagination=cursor&page_size=3&count_mode=none"
+        )
+        assert len(seen) == 7
+        assert len(set(seen)) == 7
+        assert last_page["total"] is None
+
+        # Clave de orden con NULLs
+        seen, _ = self._walk_cursor(
+            client, auth_headers_manager,
+            "/api/v1/leads/?pagination=cursor&page_size=2&order_by=last_contact_at&order_direction=asc"
+        )
+        assert len(set(seen)) == 7
+
+    def test_invalid_cursor_is_rejected(self, client, auth_headers_manager, sample_leads):
+        """Test que un cursor manipulado devuelve 400."""
+        response = client.get(
+            "/api/v1/leads/?cursor=not-a-cursor",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+    def test_list_resolves_computed_fields_in_batch(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        auth_headers_manager,
+        doctor_user,
+        commercial_user,
+        query_counter
+    ):
+        """Test que el listado no hace lookups de servicio/usuario por cada lead."""
+        from app.models.lead import Lead
+
+        for i in range(20):
+            db_session.add(Lead(
+                tenant_id=test_tenant.id,
+                first_name=f"Batch{i}",
+                phone=f"+3460010{i:04d}",
+                source="website",
+                status="nuevo",
+                priority="media",
+                assigned_to_id=doctor_user.id if i % 2 else commercial_user.id,
+                is_active=True
+            ))
+        db_session.commit()
+        assigned_emails = {doctor_user.email, commercial_user.email}
+
+        query_counter.reset()
+        response = client.get(
+            "/api/v1/leads/?page_size=20",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+        items = response.json()["items"]
+        assert len(items) == 20
+        assert {item["assigned_to_email"] for item in items} == assigned_emails
+
+        # Autenticación + count + página + usuarios asignados
+        assert query_counter.count <= 5
+
 
 class TestLeadsConversion:
     """Pruebas para conversión de leads a pacientes."""
@@ -381,4 +509,194 @@ class TestLeadsConversion:
             json=conversion_data,
             headers=auth_headers_manager
         )
-        assert response.status_code == status.HTTP_400_BAD_REQUEST
\ No newline at end of file
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+class TestLeadsStats:
+    """Pruebas para estadísticas de leads."""
+
+    @pytest.fixture
+    def rollups(self, db_session, sample_leads):
+        """Los leads de muestra se insertan sin pasar por la API."""
+        from app.services.lead_rollups import rebuild_lead_rollups
+        rebuild_lead_rollups(db_session)
+        return sample_leads
+
+    def test_overview_counts(self, client, auth_headers_manager, rollups):
+        """Test que el overview agrega correctamente por estado, fuente y prioridad."""
+        response = client.get(
+            "/api/v1/leads/stats/overview",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+
+        assert data["total_leads"] == 3
+        assert data["new_leads_today"] == 3
+        assert data["unassigned_leads"] == 1
+        assert data["leads_by_status"]["nuevo"] == 2
+        assert data["leads_by_status"]["contactado"] == 1
+        assert data["leads_by_source"]["facebook"] == 2
+        assert data["leads_by_priority"]["alta"] == 1
+        assert len(data["leads_trend_last_30_days"]) == 30
+        assert data["leads_trend_last_30_days"][-1]["count"] == 3
+
+    def test_overview_query_count_is_constant(
+        self,
+        client,
+        auth_headers_manager,
+        rollups,
+        query_counter
+    ):
+        """Test que el overview no emite una query por estado, fuente o día."""
+        query_counter.reset()
+        response = client.get(
+            "/api/v1/leads/stats/overview",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        # Autenticación + tres consultas de agregación
+        assert query_counter.count <= 4
+
+    def test_rollups_follow_lead_changes(self, client, auth_headers_manager, test_tenant):
+        """Test que crear, cambiar estado y eliminar un lead actualiza el agregado."""
+        response = client.post(
+            "/api/v1/leads/",
+            json={
+                "first_name": "Rollup",
+                "phone": "+34600999888",
+                "source": "google",
+                "priority": "alta"
+            },
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        lead_id = response.json()["id"]
+
+        response = client.put(
+            f"/api/v1/leads/{lead_id}/status",
+            json={"status": "calificado"},
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        funnel = client.get("/api/v1/leads/stats/funnel", headers=auth_headers_manager).json()
+        assert funnel["nuevo"] == 0
+        assert funnel["calificado"] == 1
+
+        sources = client.get("/api/v1/leads/stats/source-performance", headers=auth_headers_manager).json()
+        assert [s["source"] for s in sources] == ["google"]
+        assert sources[0]["total_leads"] == 1
+
+        response = client.delete(f"/api/v1/leads/{lead_id}", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        overview = client.get("/api/v1/leads/stats/overview", headers=auth_headers_manager).json()
+        assert overview["total_leads"] == 0
+
+    def test_rollup_bucket_is_upserted(self, client, db_session, auth_headers_manager):
+        """Test que los leads del mismo bucket comparten una sola fila del agregado."""
+        from app.models.lead import LeadDailyRollup
+
+        for i in range(3):
+            response = client.post(
+                "/api/v1/leads/",
+                json={"first_name": f"Bucket {i}", "phone": f"+3460099900{i}", "source": "google", "priority": "alta"},
+                headers=auth_headers_manager
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+
+        response = client.delete(f"/api/v1/leads/{response.json()['id']}", headers=auth_headers_manager)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        rollups = db_session.query(LeadDailyRollup).all()
+        assert [rollup.lead_count for rollup in rollups] == [2]
+
+    def test_rollups_do_not_block_deletes(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        doctor_user,
+        commercial_user,
+        auth_headers_superadmin
+    ):
+        """Test que el agregado no impide borrar usuarios ni tenants con las claves foráneas activas."""
+        from app.models.lead import Lead, LeadDailyRollup
+        from app.services.lead_rollups import lead_rollup_state, record_lead_change
+
+        db_session.commit()
+        db_session.connection().exec_driver_sql("PRAGMA foreign_keys=ON")
+        try:
+            lead = Lead(
+                tenant_id=test_tenant.id, first_name="Ana", phone="+34600111222", source="google",
+                status="nuevo", priority="alta", assigned_to_id=doctor_user.id, is_active=True
+            )
+            db_session.add(lead)
+            db_session.flush()
+            record_lead_change(db_session, None, lead)
+            db_session.commit()
+
+            def reassign(user_id):
+                before = lead_rollup_state(lead)
+                lead.assigned_to_id = user_id
+                record_lead_change(db_session, before, lead)
+                db_session.commit()
+                return [(rollup.assigned_to_id, rollup.lead_count) for rollup in db_session.query(LeadDailyRollup)]
+
+            # El bucket que se queda sin leads se borra y ya no referencia al médico
+            assert reassign(commercial_user.id) == [(commercial_user.id, 1)]
+            response = client.delete(f"/api/v1/users/{doctor_user.id}", headers=auth_headers_superadmin)
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+
+            assert reassign(None) == [(None, 1)]
+            response = client.delete(f"/api/v1/tenants/{test_tenant.id}", headers=auth_headers_superadmin)
+            assert response.status_code == status.HTTP_204_NO_CONTENT
+            assert db_session.query(LeadDailyRollup).count() == 0
+        finally:
+            db_session.rollback()
+            db_session.connection().exec_driver_sql("PRAGMA foreign_keys=OFF")
+
+    def test_unassign_merges_buckets(self, db_session, test_tenant, doctor_user):
+        """Test que los buckets de un usuario borrado se funden con los de "sin asignar"."""
+        from app.models.lead import Lead, LeadDailyRollup
+        from app.services.lead_rollups import record_lead_change, unassign_lead_rollups
+
+        for i, assigned_to_id in enumerate((doctor_user.id, None)):
+            lead = Lead(
+                tenant_id=test_tenant.id, first_name=f"Lead {i}", phone=f"+3460011122{i}", source="google",
+                status="nuevo", priority="alta", assigned_to_id=assigned_to_id, lead_score=10, is_active=True
+            )
+            db_session.add(lead)
+            db_session.flush()
+            record_lead_change(db_session, None, lead)
+
+        unassign_lead_rollups(db_session, [doctor_user.id])
+        db_session.commit()
+        assert [
+            (rollup.assigned_to_id, rollup.lead_count, rollup.lead_score_sum)
+            for rollup in db_session.query(LeadDailyRollup)
+        ] == [(None, 2, 20)]
+
+    def test_average_score_ignores_unscored_leads(self, client, db_session, test_tenant, auth_headers_manager):
+        """Test que la puntuación media por fuente ignora los leads sin puntuación, como AVG(lead_score)."""
+        from app.models.lead import Lead
+        from app.services.lead_rollups import rebuild_lead_rollups, record_lead_change
+
+        for i, score in enumerate((80, None, 60)):
+            lead = Lead(
+                tenant_id=test_tenant.id, first_name=f"Lead {i}", phone=f"+3460033344{i}", source="google",
+                status="nuevo", priority="alta", is_active=True
+            )
+            db_session.add(lead)
+            db_session.flush()
+            # Asignado tras el INSERT: al crear, None toma el default 0 de la columna
+            lead.lead_score = score
+            db_session.flush()
+            record_lead_change(db_session, None, lead)
+        db_session.commit()
+
+        for _ in range(2):
+            sources = client.get("/api/v1/leads/stats/source-performance", headers=auth_headers_manager).json()
+            assert [(s["source"], s["total_leads"], s["average_lead_score"]) for s in sources] == [("google", 3, 70.0)]
+            rebuild_lead_rollups(db_session, test_tenant.id)
@@ -0,0 +1,509 @@
+"""
+Pruebas para las notificaciones in-app.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+
+from app.core.notifications import (
+    create_notification,
+    create_notifications_bulk,
+    mark_all_as_read,
+    tenant_user_ids
+)
+from app.models.user import UserRole
+from app.services.notification_retention import compact_notifications
+from app.main import app
+from app.models.notification import (
+    Notification,
+    NotificationArchive,
+    NotificationBroadcast,
+    NotificationCounter,
+    NotificationType
+)
+from app.services.notification_stream import notification_broker, publish_notification_event
+
+
+@pytest.fixture
+def manager_notifications(db_session, manager_user, doctor_user, test_tenant):
+    """Tres notificaciones del manager (una leída) y una de otro usuario."""
+    notifications = [
+        Notification(
+            user_id=manager_user.id,
+            tenant_id=test_tenant.id,
+            type=NotificationType.INFO,
+            title=f"Aviso {i}",
+            message="Mensaje de prueba",
+            is_read=(i == 0)
+        )
+        for i in range(3)
+    ]
+    notifications.append(Notification(
+        user_id=doctor_user.id,
+        tenant_id=test_tenant.id,
+        type=NotificationType.INFO,
+        title="Aviso ajeno",
+        message="Mensaje de prueba"
+    ))
+    db_session.add_all(notifications)
+    db_session.commit()
+    return notifications
+
+
+class TestNotifications:
+    """Pruebas de las rutas de notificaciones (sesión async)."""
+
+    def test_count_only_includes_own_unread(
+        self,
+        client,
+        auth_headers_manager,
+        manager_notifications
+    ):
+        """Test que el contador solo incluye las no leídas del usuario."""
+        response = client.get(
+            "/api/v1/notifications/count",
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["unread_count"] == 2
+
+    def test_list_paginates_with_cursor(
+        self,
+        client,
+        auth_headers_manager,
+        manager_notifications
+    ):
+        """Test que el listado pagina por cursor sin mezclar usuarios."""
+        response = client.get(
+            "/api/v1/notifications/",
+            params={"pagination": "cursor", "limit": 2},
+            headers=auth_headers_manager
+        )
+        assert response.status_code == status.HTTP_200_OK
+        first = response.json()
+        assert first["total"] == 3
+        assert first["unread_count"] == 2
+        assert len(first["notifications"]) == 2
+
+        response = client.get(
+            "/api/v1/notifications/",
+            params={"cursor": first["next_cursor"], "limit": 2},
+            headers=auth_headers_manager
+        )
+        second = response.json()
+        assert len(second["notifications"]) == 1
+        assert second["next_cursor"] is None
+
+        titles = {n["title"] for n in first["notifications"] + second["notifications"]}
+        assert titles == {"Aviso 0", "Aviso 1", "Aviso 2"}
+
+
+
+class TestUnreadCounter:
+    """Pruebas del contador de no leídas (notification_counters)."""
+
+    def _counter(self, db_session, user):
+        db_session.expire_all()
+        counter = db_session.get(NotificationCounter, user.id)
+        return counter.unread_count if counter else 0
+
+    def test_count_reads_counter_by_primary_key(
+        self,
+        client,
+        auth_headers_manager,
+        manager_notifications,
+        query_counter
+    ):
+        """Test que el badge no cuenta filas de notifications."""
+        query_counter.reset()
+        response = client.get("/api/v1/notifications/count", headers=auth_headers_manager)
+        assert response.json()["unread_count"] == 2
+
+        badge = [sql for sql in query_counter.statements if "notification" in sql]
+        assert len(badge) == 1
+        assert "FROM notification_counters" in badge[0]
+
+    def test_read_and_delete_update_counter(
+        self,
+        client,
+        db_session,
+        manager_user,
+        auth_headers_manager,
+        manager_notifications
+    ):
+        """Test que marcar como leída (dos veces) y eliminar ajustan el contador una vez."""
+        unread = [n.id for n in manager_notifications[1:3]]
+        read = manager_notifications[0].id
+
+        for _ in range(2):
+            response = client.patch(f"/api/v1/notifications/{unread[0]}/read", headers=auth_headers_manager)
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["is_read"] is True
+        assert self._counter(db_session, manager_user) == 1
+
+        client.delete(f"/api/v1/notifications/{read}", headers=auth_headers_manager)
+        assert self._counter(db_session, manager_user) == 1
+        client.delete(f"/api/v1/notifications/{unread[1]}", headers=auth_headers_manager)
+        assert self._counter(db_session, manager_user) == 0
+
+    def test_mark_all_read_single_update(
+        self,
+        client,
+        db_session,
+        manager_user,
+        doctor_user,
+        auth_headers_manager,
+        manager_notifications,
+        query_counter
+    ):
+        """Test que mark-all-read es un único UPDATE y solo afecta al usuario."""
+        query_counter.reset()
+        response = client.post("/api/v1/notifications/mark-all-read", headers=auth_headers_manager)
+        assert response.json()["count"] == 2
+
+        updates = [sql for sql in query_counter.statements if sql.startswith("UPDATE notifications")]
+        assert len(updates) == 1
+        assert self._counter(db_session, manager_user) == 0
+        assert self._counter(db_session, doctor_user) == 1
+        assert db_session.query(Notification).filter(Notification.is_read == False).count() == 1
+
+
+
+def _unread(client, headers) -> int:
+    return client.get("/api/v1/notifications/count", headers=headers).json()["unread_count"]
+
+
+class TestBulkNotifications:
+    """Pruebas de create_notifications_bulk y de los avisos a todo el tenant."""
+
+    def test_bulk_inserts_in_one_statement(
+        self,
+        db_session,
+        manager_user,
+        doctor_user,
+        tenant_admin_user,
+        query_counter
+    ):
+        """Test que una lista de destinatarios se inserta con un INSERT y actualiza los contadores."""
+        recipients = [manager_user.id, doctor_user.id, manager_user.id]
+        query_counter.reset()
+        ids = asyncio.run(create_notifications_bulk(
+            db=db_session,
+            recipients=recipients,
+            type=NotificationType.WARNING,
+            title="Stock bajo",
+            message="Quedan 2 unidades de guantes"
+        ))
+
+        assert len(ids) == 2
+        inserts = [sql for sql in query_counter.statements if sql.startswith("INSERT INTO notifications")]
+        assert len(inserts) == 1
+        counters = [sql for sql in query_counter.statements if "notification_counters" in sql]
+        assert len(counters) == 1
+
+        db_session.expire_all()
+        assert db_session.get(NotificationCounter, manager_user.id).unread_count == 1
+        assert db_session.get(NotificationCounter, doctor_user.id).unread_count == 1
+        assert db_session.get(NotificationCounter, tenant_admin_user.id) is None
+
+    def test_bulk_from_recipient_query(self, db_session, test_tenant, manager_user, tenant_admin_user):
+        """Test que tenant_user_ids selecciona los destinatarios por rol."""
+        admins = tenant_user_ids(test_tenant.id, roles=[UserRole.tenant_admin, UserRole.manager])
+        asyncio.run(create_notifications_bulk(
+            db=db_session,
+            recipients=admins,
+            type=NotificationType.INFO,
+            title="Nuevo miembro en el equipo",
+            message="Ana se ha unido como Médico",
+            tenant_id=test_tenant.id
+        ))
+
+        rows = db_session.query(Notification.user_id).all()
+        assert {user_id for user_id, in rows} == {manager_user.id, tenant_admin_user.id}
+
+    def test_tenant_broadcast_read_receipts(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        manager_user,
+        doctor_user,
+        auth_headers_tenant_admin,
+        auth_headers_manager,
+        auth_headers_doctor
+    ):
+        """Test que un aviso se guarda una vez y cada usuario lo marca como leído por separado."""
+        response = client.post(
+            "/api/v1/notifications/broadcasts",
+            json={"type": "warning", "title": "Mantenimiento", "message": "El domingo de 8:00 a 9:00"},
+            headers=auth_headers_tenant_admin
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        broadcast_id = response.json()["id"]
+        assert db_session.query(NotificationBroadcast).count() == 1
+        assert db_session.query(Notification).count() == 0
+
+        assert _unread(client, auth_headers_manager) == 1
+        assert _unread(client, auth_headers_doctor) == 1
+
+        listing = client.get("/api/v1/notifications/broadcasts", headers=auth_headers_manager).json()
+        assert listing["total"] == 1
+        assert listing["broadcasts"][0]["is_read"] is False
+
+        for _ in range(2):
+            response = client.patch(
+                f"/api/v1/notifications/broadcasts/{broadcast_id}/read",
+                headers=auth_headers_manager
+            )
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["is_read"] is True
+        assert _unread(client, auth_headers_manager) == 0
+        assert _unread(client, auth_headers_doctor) == 1
+
+        response = client.post("/api/v1/notifications/mark-all-read", headers=auth_headers_doctor)
+        assert response.json()["count"] == 1
+        assert _unread(client, auth_headers_doctor) == 0
+        listing = client.get("/api/v1/notifications/broadcasts", headers=auth_headers_doctor).json()
+        assert listing["broadcasts"][0]["is_read"] is True
+
+    def test_broadcast_hidden_from_later_members(
+        self,
+        client,
+        db_session,
+        test_tenant,
+        auth_headers_tenant_admin,
+        auth_headers_manager
+    ):
+        """Test que quien se une al tenant después no ve ni cuenta avisos anteriores."""
+        client.post(
+            "/api/v1/notifications/broadcasts",
+            json={"title": "Bienvenida", "message": "Nuevo horario de la clínica"},
+            headers=auth_headers_tenant_admin
+        )
+        db_session.add(NotificationBroadcast(
+            tenant_id=test_tenant.id,
+            title="Aviso antiguo",
+            message="Anterior a todos los usuarios",
+            created_at=datetime.utcnow() - timedelta(days=30)
+        ))
+        db_session.commit()
+
+        listing = client.get("/api/v1/notifications/broadcasts", headers=auth_headers_manager).json()
+        assert [b["title"] for b in listing["broadcasts"]] == ["Bienvenida"]
+        assert _unread(client, auth_headers_manager) == 1
+
+
+
+    def test_broadcasts_count_only_in_their_tenant(self, client, db_session, manager_user, auth_headers_manager):
+        """Test que los avisos de otro tenant no suman al badge ni al contador y dejan de contar al salir."""
+        from app.core.notifications import create_tenant_broadcast, get_unread_count
+        from app.core.security import create_access_token
+        from app.models.tenant import Tenant
+        from app.models.tenant_membership import TenantMembership
+
+        other = Tenant(name="Otra Clínica", slug="otraclinica", is_active=True)
+        db_session.add(other)
+        db_session.flush()
+        membership = TenantMembership(
+            user_id=manager_user.id,
+            tenant_id=other.id,
+            role=UserRole.medico,
+            joined_at=datetime.utcnow() - timedelta(days=1)
+        )
+        db_session.add(membership)
+        db_session.commit()
+        other_headers = {
+            "Authorization": f"Bearer {create_access_token(data={'sub': manager_user.email, 'tenant_id': str(other.id)})}"
+        }
+
+        asyncio.run(create_tenant_broadcast(
+            db=db_session,
+            tenant_id=other.id,
+            type=NotificationType.INFO,
+            title="Solo en la otra clínica",
+            message="Cambio de horario"
+        ))
+        assert db_session.get(NotificationCounter, manager_user.id) is None
+        assert _unread(client, auth_headers_manager) == 0
+        assert _unread(client, other_headers) == 1
+
+        # Al salir del tenant el aviso deja de verse y de contar
+        membership.is_active = False
+        db_session.commit()
+        assert get_unread_count(db_session, manager_user.id, other.id) == 0
+        listing = client.get("/api/v1/notifications/broadcasts", headers=other_headers).json()
+        assert listing["total"] == 0
+        assert mark_all_as_read(db_session, manager_user.id, other.id) == 0
+
+        membership.is_active = True
+        db_session.commit()
+        response = client.post("/api/v1/notifications/mark-all-read", headers=other_headers)
+        assert response.json()["count"] == 1
+        assert _unread(client, other_headers) == 0
+        assert db_session.get(NotificationCounter, manager_user.id) is None
+
+
+class TestNotificationCompaction:
+    """Pruebas de la compactación de notifications."""
+
+    def test_compaction_archives_and_expires(self, db_session, manager_user, test_tenant):
+        """Test que se archivan las leídas antiguas y se eliminan las expiradas por lotes."""
+        now = datetime.utcnow()
+
+        def add(title, days_ago, is_read):
+            db_session.add(Notification(
+                user_id=manager_user.id,
+                tenant_id=test_tenant.id,
+                title=title,
+                message="Mensaje de prueba",
+                is_read=is_read,
+                created_at=now - timedelta(days=days_ago)
+            ))
+
+        add("Reciente", 1, True)
+        add("Reciente sin leer", 1, False)
+        for i in range(3):
+            add(f"Antigua leída {i}", 100, True)
+        add("Antigua sin leer", 100, False)
+        add("Expirada sin leer", 400, False)
+        add("Expirada leída", 400, True)
+        db_session.add(NotificationArchive(
+            id=uuid4(),
+            user_id=manager_user.id,
+            title="Archivada expirada",
+            message="Mensaje de prueba",
+            type=NotificationType.INFO,
+            created_at=now - timedelta(days=500)
+        ))
+        db_session.commit()
+        assert db_session.get(NotificationCounter, manager_user.id).unread_count == 3
+
+        report = compact_notifications(
+            db_session, archive_after_days=90, retention_days=365, batch_size=2, now=now
+        )
+        assert (report.deleted_expired, report.deleted_unread) == (2, 1)
+        assert report.archived == 3
+        assert report.deleted_archived == 1
+        assert report.reclaimed == 5
+
+        db_session.expire_all()
+        remaining = {n.title for n in db_session.query(Notification).all()}
+        assert remaining == {"Reciente", "Reciente sin leer", "Antigua sin leer"}
+        archived = {n.title for n in db_session.query(NotificationArchive).all()}
+        assert archived == {f"Antigua leída {i}" for i in range(3)}
+        assert db_session.get(NotificationCounter, manager_user.id).unread_count == 2
+
+        assert compact_notifications(db_session, now=now).reclaimed == 0
+
+
+class NotificationStream:
+    """Conexión a GET /notifications/stream sobre ASGI, leyendo los eventos de uno en uno."""
+
+    def __init__(self, token: str):
+        self.token = token
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.task = None
+
+    async def __aenter__(self):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/v1/notifications/stream",
+            "raw_path": b"/api/v1/notifications/stream",
+            "root_path": "",
+            "query_string": f"access_token={self.token}".encode(),
+            "headers": [(b"host", b"testserver")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+
+        async def receive():
+            await self.disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        self.task = asyncio.create_task(app(scope, receive, self.messages.put))
+        start = await asyncio.wait_for(self.messages.get(), 5)
+        assert start["status"] == status.HTTP_200_OK
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+    async def next_event(self) -> tuple:
+        """(nombre del evento, datos) del siguiente evento SSE."""
+        while True:
+            message = await asyncio.wait_for(self.messages.get(), 5)
+            lines = dict(
+                line.split(": ", 1) for line in message["body"].decode().splitlines() if ": " in line
+            )
+            if "event" in lines:
+                return lines["event"], json.loads(lines["data"])
+
+
+class TestNotificationStream:
+    """Pruebas del canal de eventos en tiempo real."""
+
+    def test_stream_pushes_committed_events(self, db_session, manager_user, manager_token):
+        """Test que el stream recibe nuevas notificaciones y cambios del contador tras el commit."""
+        user_id = manager_user.id
+
+        async def scenario():
+            async with NotificationStream(manager_token) as stream:
+                assert await stream.next_event() == ("unread_count", {"unread_count": 0})
+
+                # Un evento de una transacción revertida no se entrega
+                publish_notification_event(db_session, user_id, "unread_count", unread_count=99)
+                db_session.rollback()
+
+                await create_notification(
+                    db=db_session,
+                    user_id=user_id,
+                    type=NotificationType.INFO,
+                    title="Nueva cita",
+                    message="Tienes una nueva cita asignada"
+                )
+                event, data = await stream.next_event()
+                assert event == "notification"
+                assert data["notification"]["title"] == "Nueva cita"
+                assert data["unread_count"] == 1
+
+                mark_all_as_read(db_session, user_id)
+                assert await stream.next_event() == ("unread_count", {"unread_count": 0})
+
+        asyncio.run(scenario())
+        assert notification_broker.subscriber_count() == 0
+
+    def test_stream_receives_bulk_notifications(self, db_session, manager_user, doctor_user, manager_token):
+        """Test que los eventos de create_notifications_bulk llevan los datos propios de cada usuario."""
+        async def scenario():
+            async with NotificationStream(manager_token) as stream:
+                await stream.next_event()
+                ids = await create_notifications_bulk(
+                    db=db_session,
+                    recipients=[doctor_user.id, manager_user.id],
+                    type=NotificationType.INFO,
+                    title="Reunión de equipo",
+                    message="Mañana a las 9:00"
+                )
+                event, data = await stream.next_event()
+                assert event == "notification"
+                assert data["notification"]["id"] == str(ids[1])
+                assert data["notification"]["user_id"] == str(manager_user.id)
+                assert data["notification"]["title"] == "Reunión de equipo"
+                assert data["unread_count"] == 1
+
+        asyncio.run(scenario())
+
+    def test_stream_requires_token(self, client):
+        """Test que el stream rechaza conexiones sin token."""
+        response = client.get("/api/v1/notifications/stream")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED